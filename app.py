@@ -11,11 +11,14 @@ Zone: Chablais/Annemasse, Haute-Savoie (74)
 import streamlit as st
 import pandas as pd
 import logging
+import os
 from datetime import datetime
 
 from src.utils.config import Config
 from src.supabase_data_retriever import SupabaseDataRetriever
 from src.estimation_algorithm import EstimationAlgorithm
+from src.price_grid import PriceGrid
+from src.estimate_table import EstimateTable
 from src.streamlit_components.form_input import render_form_input, get_well_params
 from src.streamlit_components.dashboard_metrics import render_dashboard_metrics
 from src.streamlit_components.comparables_table import render_comparables_table
@@ -86,6 +89,24 @@ def init_estimation_algorithm():
     return EstimationAlgorithm()
 
 
+@st.cache_resource
+def init_price_grid():
+    """Charger grille prix/m² pré-calculée (None si absente)"""
+    try:
+        return PriceGrid.load()
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"[WARNING] Grille prix/m² indisponible: {e}")
+        return None
+
+
+@st.cache_resource
+def init_estimate_table():
+    """Ouvrir table des estimations pré-calculées (None si absente)"""
+    if not os.path.exists(EstimateTable.DEFAULT_PATH):
+        return None
+    return EstimateTable(EstimateTable.DEFAULT_PATH)
+
+
 # ===================================
 # SESSION STATE INITIALIZATION
 # ===================================
@@ -204,6 +225,44 @@ else:
         logger.error(f"Init error: {e}")
         st.stop()
 
+    # Estimation pré-calculée (batch nocturne), uniquement si la table a été construite avec
+    # les mêmes critères de recherche : un hit fournit l'estimation et ses comparables
+    # (déjà scorés), sans requête Supabase ni calcul
+    if st.session_state['estimation_result'] is None:
+        estimate_table = init_estimate_table()
+        precomputed = estimate_table.lookup_point(
+            bien_params['latitude'],
+            bien_params['longitude'],
+            bien_params['type_bien'],
+            bien_params['surface']
+        ) if estimate_table and estimate_table.serves(
+            rayon_km=rayon_km,
+            annees=anciennete_max_ans,
+            surface_tolerance=surface_tolerance_pct / 100
+        ) else None
+        if precomputed:
+            st.session_state['estimation_result'] = precomputed
+            st.session_state['comparables_df'] = pd.DataFrame(
+                precomputed['comparables_with_scores']
+            )
+
+    # Estimation provisoire instantanée (grille prix/m²) en attendant les comparables
+    provisional_placeholder = st.empty()
+    if st.session_state['estimation_result'] is None:
+        price_grid = init_price_grid()
+        provisional = price_grid.provisional_estimate(
+            bien_params['latitude'],
+            bien_params['longitude'],
+            bien_params['surface'],
+            bien_params['type_bien']
+        ) if price_grid else None
+        if provisional:
+            provisional_placeholder.info(
+                f"⏳ Estimation provisoire : {provisional['prix_estime_eur']:,.0f}€ "
+                f"({provisional['prix_au_m2_eur']:,.0f}€/m², moyenne lissée du secteur) "
+                "- affinage avec les comparables en cours..."
+            )
+
     # Récupérer comparables depuis Supabase
     if st.session_state['comparables_df'] is None:
         with st.spinner("Recherche comparables en cours..."):
@@ -268,6 +327,7 @@ else:
                 st.stop()
 
     estimation_result = st.session_state['estimation_result']
+    provisional_placeholder.empty()
 
     # ===================================
     # AFFICHAGE TABS (3 onglets)
@@ -184,12 +184,13 @@ async def demo_workflow_composition() -> None:
             f"within {retriever_result.metadata.get('radius_km')}km"
         )
 
-        properties = data["comparable_properties"]
+        properties = data["comparable_properties"].head(3).to_records()
         print("\nTop properties:")
-        for i, prop in enumerate(properties[:3], 1):
+        for i, prop in enumerate(properties, 1):
             print(
-                f"  {i}. {prop['address']}: "
-                f"€{prop['price']:,} ({prop['distance_km']}km away)"
+                f"  {i}. {prop['idmutation']}: "
+                f"€{prop['valeurfonc']:,.0f} "
+                f"({prop['distance_km']:.1f}km away)"
             )
 
 
@@ -0,0 +1,640 @@
+"""AI provider access for the compound system: prompts, cache, stub.
+
+The AI components (Claude, Grok, Perplexity) ask market questions
+whose answers barely change within a week for a given commune. Each
+question is an AIPrompt built from a few normalized fields: the task,
+the commune, the property type and a price bucket. Its text is the
+cache key, so two estimates in the same commune, type and price range
+share one provider answer.
+
+An AIClient sends prompts to a provider through an AIResponseCache:
+a SQLite table (a file for persistence across processes and restarts,
+or in memory) with a time-to-live and an LRU size bound.
+
+When many workflows run at once, an AIBatcher placed in front of the
+provider collects their prompts for a short window (or up to a number
+of prompts), sends them as one ``complete_many`` call and fans the
+answers back out, e.g.::
+
+    set_ai_client("claude", AIClient(AIBatcher(provider), get_ai_cache()))
+
+StubAIProvider answers deterministically from the prompt text, with an
+optional simulated latency, so the AI components can be exercised and
+benchmarked offline. It is the default provider until the MCP
+integrations land.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.compound_cache import CacheStats
+from src.compound_scheduler import Priority, ResourceLimiter
+
+logger = logging.getLogger(__name__)
+
+# SQLite file of the process-wide response cache (in memory if unset)
+AI_CACHE_ENV_VAR = "COMPOUND_AI_CACHE"
+
+# Width of the price buckets used in prompts
+PRICE_BUCKET_EUR = 50_000
+
+# Market context is refreshed weekly
+DEFAULT_AI_CACHE_TTL_S = 7 * 24 * 3600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ai_responses_lru
+    ON ai_responses (last_used_at);
+"""
+
+
+def normalize_commune(name: str) -> str:
+    """Normalize a commune name (case, accents, separators).
+
+    "Thonon-les-Bains", "THONON LES BAINS" and "thonon-lès-bains" all
+    become "thonon les bains".
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    for separator in "-'’_":
+        ascii_name = ascii_name.replace(separator, " ")
+    return " ".join(ascii_name.split()).casefold()
+
+
+def commune_from_address(address: str) -> str:
+    """Best-effort commune of a free-form French address.
+
+    Takes the last comma-separated part that is not the country, and
+    drops its postal code ("10 rue X, 74200 Thonon, France" -> "Thonon").
+    """
+    parts = [part.strip() for part in address.split(",") if part.strip()]
+    if len(parts) > 1 and parts[-1].casefold() == "france":
+        parts = parts[:-1]
+    if not parts:
+        return ""
+    words = [word for word in parts[-1].split() if not word.isdigit()]
+    return " ".join(words)
+
+
+def price_bucket(price: Optional[float]) -> Optional[str]:
+    """Price range of ``price`` in PRICE_BUCKET_EUR steps.
+
+    Returns:
+        e.g. "300000-350000", None if the price is unknown
+    """
+    if not price or price <= 0:
+        return None
+    low = int(price // PRICE_BUCKET_EUR) * PRICE_BUCKET_EUR
+    return f"{low}-{low + PRICE_BUCKET_EUR}"
+
+
+@dataclass(frozen=True)
+class AIPrompt:
+    """Normalized AI question; its text is the cache key."""
+
+    task: str
+    commune: str
+    type_bien: str
+    price_bucket: Optional[str] = None
+
+    @classmethod
+    def build(
+        cls,
+        task: str,
+        commune: str,
+        type_bien: str,
+        price: Optional[float] = None,
+    ) -> "AIPrompt":
+        """Build a prompt from raw values.
+
+        Args:
+            task: Question asked (e.g. "market_analysis")
+            commune: Commune name, any spelling
+            type_bien: Property type (Appartement, Maison...)
+            price: Estimated price, bucketed (None to leave it out)
+
+        Returns:
+            Normalized prompt
+        """
+        return cls(
+            task=task,
+            commune=normalize_commune(commune),
+            type_bien=" ".join(type_bien.split()).casefold(),
+            price_bucket=price_bucket(price),
+        )
+
+    @property
+    def text(self) -> str:
+        fields = [
+            f"task={self.task}",
+            f"commune={self.commune}",
+            f"type={self.type_bien}",
+        ]
+        if self.price_bucket is not None:
+            fields.append(f"price={self.price_bucket}")
+        return "|".join(fields)
+
+
+@dataclass
+class AIResponse:
+    """Answer of a provider, possibly served from the cache."""
+
+    provider: str
+    prompt: AIPrompt
+    data: Dict[str, Any]
+    cached: bool = False
+
+
+class StubAIProvider:
+    """Deterministic offline provider.
+
+    Answers are derived from a hash of the prompt text, so the same
+    prompt always gets the same answer, and have the shape of the real
+    answer of each task.
+    """
+
+    def __init__(self, name: str = "stub", latency_s: float = 0.0):
+        """Initialize stub.
+
+        Args:
+            name: Provider name reported in responses
+            latency_s: Simulated latency of each call
+        """
+        self.name = name
+        self.latency_s = latency_s
+        self.calls = 0
+        self.batch_sizes: List[int] = []
+
+    async def complete(self, prompt: AIPrompt) -> Dict[str, Any]:
+        """Answer one prompt."""
+        self.calls += 1
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return self.answer(prompt)
+
+    async def complete_many(
+        self, prompts: Sequence[AIPrompt]
+    ) -> List[Dict[str, Any]]:
+        """Answer several prompts in one call (one latency)."""
+        self.calls += 1
+        self.batch_sizes.append(len(prompts))
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return [self.answer(prompt) for prompt in prompts]
+
+    @staticmethod
+    def answer(prompt: AIPrompt) -> Dict[str, Any]:
+        """Deterministic answer to ``prompt``."""
+        digest = hashlib.sha256(prompt.text.encode("utf-8")).digest()
+        # Stable pseudo-random values in [0, 1)
+        draws = [byte / 256 for byte in digest]
+        place = f"{prompt.type_bien} in {prompt.commune or 'the area'}"
+
+        if prompt.task == "price_reasoning":
+            return {
+                "market_analysis": f"Demand for {place} is "
+                + ("rising" if draws[0] > 0.5 else "stable"),
+                "price_justification": (
+                    f"Prices of {place} in the {prompt.price_bucket} range "
+                    "are consistent with recent sales"
+                ),
+                "risk_factors": ["Market volatility", "Location risks"][
+                    : 1 + (draws[1] > 0.5)
+                ],
+                "opportunities": ["Renovation potential"],
+            }
+        if prompt.task == "market_research":
+            return {
+                "market_trends": [
+                    f"Transactions {'up' if draws[2] > 0.5 else 'down'} "
+                    f"{draws[3] * 10:.1f}% over a year",
+                    f"Typical sale delay {30 + int(draws[4] * 60)} days",
+                ],
+                "economic_factors": ["Cross-border employment", "Tourism"],
+                "regional_info": {
+                    "population": str(5000 + int(draws[5] * 30000)),
+                    "growth": f"+{draws[6] * 3:.1f}%",
+                    "unemployment": f"{3 + draws[7] * 4:.1f}%",
+                },
+            }
+        return {
+            "insights": [
+                f"Comparable sales of {place} are "
+                + ("dense" if draws[8] > 0.5 else "sparse"),
+                f"Price per m2 dispersion is {int(draws[9] * 20)}%",
+            ],
+            "recommendations": [
+                "Check recent sales in the same street",
+                "Adjust for floor and condition",
+            ],
+            "confidence": round(0.8 + draws[10] * 0.19, 2),
+        }
+
+
+class AIResponseCache:
+    """Persistent TTL + LRU cache of provider answers.
+
+    Safe to share between threads; several processes may share a file.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_size: int = 10_000,
+        ttl_s: float = DEFAULT_AI_CACHE_TTL_S,
+    ):
+        """Open (or create) the cache.
+
+        Args:
+            path: SQLite database file, ":memory:" for no persistence
+            max_size: Entries kept; least recently used ones are evicted
+            ttl_s: Time-to-live of an answer in seconds (wall clock,
+                since entries outlive the process)
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.path = path
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.stats = CacheStats()
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(
+            path,
+            timeout=30.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(provider: str, prompt: AIPrompt) -> str:
+        return f"{provider}:{prompt.text}"
+
+    def get(
+        self, provider: str, prompt: AIPrompt
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached answer, or None on miss or expiry."""
+        key = self.key(provider, prompt)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM ai_responses "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and row[1] + self.ttl_s <= now:
+                self.conn.execute(
+                    "DELETE FROM ai_responses WHERE key = ?", (key,)
+                )
+                self.stats.expirations += 1
+                row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.conn.execute(
+                "UPDATE ai_responses SET last_used_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self.stats.hits += 1
+        return json.loads(row[0])
+
+    def put(
+        self, provider: str, prompt: AIPrompt, response: Dict[str, Any]
+    ) -> None:
+        """Store an answer, evicting the least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ai_responses "
+                "(key, provider, prompt, response, created_at, last_used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(provider, prompt),
+                    provider,
+                    prompt.text,
+                    json.dumps(response, default=repr),
+                    now,
+                    now,
+                ),
+            )
+            evicted = self.conn.execute(
+                "DELETE FROM ai_responses WHERE key IN ("
+                "SELECT key FROM ai_responses "
+                "ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            ).rowcount
+            self.stats.evictions += max(evicted, 0)
+
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns how many were removed."""
+        with self._lock:
+            removed = self.conn.execute(
+                "DELETE FROM ai_responses WHERE created_at <= ?",
+                (time.time() - self.ttl_s,),
+            ).rowcount
+            self.stats.expirations += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove all entries and reset statistics."""
+        with self._lock:
+            self.conn.execute("DELETE FROM ai_responses")
+            self.stats = CacheStats()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM ai_responses"
+            ).fetchone()[0]
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            "path": self.path,
+            "size": len(self),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl_s,
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "evictions": self.stats.evictions,
+            "expirations": self.stats.expirations,
+            "hit_rate": self.stats.hit_rate,
+        }
+
+
+class _Batch:
+    __slots__ = ("prompts", "futures", "flusher")
+
+    def __init__(self) -> None:
+        # One slot per distinct prompt text, with its waiting futures
+        self.prompts: Dict[str, AIPrompt] = {}
+        self.futures: Dict[str, List[asyncio.Future]] = {}
+        self.flusher: Optional[asyncio.TimerHandle] = None
+
+
+class AIBatcher:
+    """Micro-batches concurrent prompts into one provider call.
+
+    The first prompt of a batch opens a window of ``window_s``; the
+    batch is sent when the window closes or when it holds ``max_batch``
+    distinct prompts, whichever comes first. Identical prompts in a
+    batch are sent once. Batches are kept per event loop.
+
+    It exposes ``complete`` like a provider, so it slots between an
+    AIClient and its provider. Providers without ``complete_many`` are
+    called once per prompt, concurrently.
+    """
+
+    def __init__(
+        self,
+        provider: Any,
+        window_s: float = 0.02,
+        max_batch: int = 16,
+        limiter: Optional[ResourceLimiter] = None,
+    ):
+        """Initialize batcher.
+
+        Args:
+            provider: Provider with ``complete`` and ideally
+                ``complete_many``
+            window_s: Longest time a prompt waits for companions
+            max_batch: Distinct prompts per provider call at most
+            limiter: Provider quota, acquired once per provider call
+                (in place of a per-component limit on the resource)
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.provider = provider
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.limiter = limiter
+        self.batches = 0
+        self.prompts = 0
+        self.deduplicated = 0
+        self.max_batch_size = 0
+        self._pending: Dict[asyncio.AbstractEventLoop, _Batch] = {}
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    async def complete(self, prompt: AIPrompt) -> Dict[str, Any]:
+        """Answer ``prompt`` as part of the next batch."""
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(loop)
+        if batch is None:
+            batch = self._pending[loop] = _Batch()
+            batch.flusher = loop.call_later(
+                self.window_s, self._flush, loop, batch
+            )
+
+        future = loop.create_future()
+        if prompt.text in batch.prompts:
+            self.deduplicated += 1
+        else:
+            batch.prompts[prompt.text] = prompt
+        batch.futures.setdefault(prompt.text, []).append(future)
+        self.prompts += 1
+        if len(batch.prompts) >= self.max_batch:
+            self._flush(loop, batch)
+        # A caller giving up (timeout) does not cancel the shared call
+        return await asyncio.shield(future)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, batch: _Batch) -> None:
+        if self._pending.get(loop) is not batch:
+            return  # already sent
+        del self._pending[loop]
+        if batch.flusher is not None:
+            batch.flusher.cancel()
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, len(batch.prompts))
+        loop.create_task(self._send(batch))
+
+    async def _send(self, batch: _Batch) -> None:
+        texts = list(batch.prompts)
+        interruption: Optional[BaseException] = None
+        try:
+            if self.limiter is not None:
+                await self.limiter.acquire(Priority.INTERACTIVE)
+            answers = await self._call(
+                [batch.prompts[text] for text in texts]
+            )
+            if len(answers) != len(texts):
+                raise RuntimeError(
+                    f"{self.name} answered {len(answers)} of "
+                    f"{len(texts)} prompts"
+                )
+        except BaseException as e:
+            error = e
+            if not isinstance(e, Exception):
+                # Cancelled (e.g. loop shutdown): waiters must not hang,
+                # nor see a cancellation that is not theirs
+                interruption = e
+                error = RuntimeError(f"{self.name} batch call was cancelled")
+                error.__cause__ = e
+            outcomes: List[Tuple[str, Any, Optional[BaseException]]] = [
+                (text, None, error) for text in texts
+            ]
+        else:
+            outcomes = [
+                (text, answer, None) for text, answer in zip(texts, answers)
+            ]
+
+        for text, answer, error in outcomes:
+            for future in batch.futures[text]:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(answer)
+        if interruption is not None:
+            raise interruption
+
+    async def _call(
+        self, prompts: List[AIPrompt]
+    ) -> List[Dict[str, Any]]:
+        complete_many = getattr(self.provider, "complete_many", None)
+        if complete_many is not None:
+            return list(await complete_many(prompts))
+        return list(
+            await asyncio.gather(
+                *(self.provider.complete(prompt) for prompt in prompts)
+            )
+        )
+
+    def get_status(self) -> Dict[str, Any]:
+        """Batching counters."""
+        return {
+            "window_s": self.window_s,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "prompts": self.prompts,
+            "deduplicated": self.deduplicated,
+            "mean_batch_size": (
+                (self.prompts - self.deduplicated) / self.batches
+                if self.batches
+                else 0.0
+            ),
+            "max_batch_size": self.max_batch_size,
+        }
+
+
+class AIClient:
+    """Provider behind a response cache."""
+
+    def __init__(self, provider: Any, cache: Optional[AIResponseCache]):
+        """Initialize client.
+
+        Args:
+            provider: Object with ``async complete(prompt) -> dict`` and
+                a ``name``
+            cache: Response cache, None to always call the provider
+        """
+        self.provider = provider
+        self.cache = cache
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    async def ask(self, prompt: AIPrompt) -> AIResponse:
+        """Answer ``prompt`` from the cache, else from the provider.
+
+        Provider errors propagate (and are not cached), so the calling
+        component's retry policy and circuit breaker apply.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self.name, prompt)
+            if cached is not None:
+                return AIResponse(self.name, prompt, cached, cached=True)
+        data = await self.provider.complete(prompt)
+        if self.cache is not None:
+            self.cache.put(self.name, prompt, data)
+        return AIResponse(self.name, prompt, data)
+
+
+_clients: Dict[str, AIClient] = {}
+_default_cache: Optional[AIResponseCache] = None
+_clients_lock = threading.Lock()
+
+
+def get_ai_cache() -> AIResponseCache:
+    """Return the process-wide response cache, creating it once.
+
+    Stored in the SQLite file named by the COMPOUND_AI_CACHE env var,
+    in memory if it is unset.
+    """
+    global _default_cache
+    with _clients_lock:
+        if _default_cache is None:
+            _default_cache = AIResponseCache(
+                os.getenv(AI_CACHE_ENV_VAR) or ":memory:"
+            )
+        return _default_cache
+
+
+def get_ai_client(name: str) -> AIClient:
+    """Return the process-wide client of a provider, creating it once.
+
+    Providers without a registered client get a StubAIProvider behind
+    the process-wide cache.
+
+    Args:
+        name: Provider name ("claude", "grok", "perplexity")
+
+    Returns:
+        AIClient
+    """
+    client = _clients.get(name)
+    if client is None:
+        cache = get_ai_cache()
+        with _clients_lock:
+            client = _clients.setdefault(
+                name, AIClient(StubAIProvider(name), cache)
+            )
+    return client
+
+
+def set_ai_client(name: str, client: Optional[AIClient]) -> None:
+    """Register the client of a provider (None to reset it)."""
+    with _clients_lock:
+        if client is None:
+            _clients.pop(name, None)
+        else:
+            _clients[name] = client
+
+
+def reset_ai_clients() -> None:
+    """Forget every client and the process-wide cache (for tests)."""
+    global _default_cache
+    with _clients_lock:
+        _clients.clear()
+        if _default_cache is not None:
+            _default_cache.close()
+        _default_cache = None
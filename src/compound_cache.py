@@ -0,0 +1,240 @@
+"""Result cache for compound engineering components.
+
+Components that opt in (``cacheable=True``) have their successful
+results memoized under a stable hash of their class, name,
+configuration, declared ``user_input`` fields and dependency results.
+Entries expire after a TTL and the cache is bounded by an LRU policy,
+so repeated and overlapping workflows skip steps that were already
+computed.
+"""
+
+import datetime
+import enum
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from src.compound_engineering import ComponentResult
+
+
+def _array_digest(array: np.ndarray) -> str:
+    digest = hashlib.sha256(f"{array.dtype.str}:{array.shape}:".encode())
+    if array.dtype.hasobject:
+        digest.update(stable_hash(array.tolist()).encode("utf-8"))
+    else:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _hash_default(value: Any) -> Any:
+    """JSON stand-in of a non-JSON value, derived from its full content."""
+    fingerprint = getattr(value, "fingerprint", None)
+    if callable(fingerprint):
+        return {"__fingerprint__": fingerprint()}
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": _array_digest(value)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        columns = value.columns if isinstance(value, pd.DataFrame) else []
+        return {
+            "__pandas__": _array_digest(
+                pd.util.hash_pandas_object(value, index=True).to_numpy()
+            ),
+            "columns": [str(column) for column in columns],
+            "dtypes": [str(dtype) for dtype in np.atleast_1d(value.dtypes)],
+        }
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=stable_hash)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(
+        f"Cannot build a cache key from {type(value).__name__} values"
+    )
+
+
+def stable_hash(payload: Any) -> str:
+    """Return a deterministic SHA-256 hex digest of a JSON-like payload.
+
+    Args:
+        payload: Data to hash; values with a ``fingerprint()`` method
+            (e.g. ColumnarPayload), NumPy arrays and pandas objects
+            hash by content
+
+    Returns:
+        Hex digest
+
+    Raises:
+        TypeError: If the payload holds a value of an unsupported type
+            (its repr() could hide differences, e.g. truncated arrays)
+    """
+    encoded = json.dumps(
+        payload, sort_keys=True, default=_hash_default, separators=(",", ":")
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def normalize_input(value: Any) -> Any:
+    """Normalize user input so equivalent requests compare equal.
+
+    Strings are case-folded with whitespace collapsed, numbers become
+    floats (100 == 100.0) and containers are normalized recursively.
+
+    Args:
+        value: User input (dict, list, scalar)
+
+    Returns:
+        Normalized copy
+    """
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): normalize_input(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_input(v) for v in value]
+    return value
+
+
+@dataclass
+class CacheStats:
+    """Counters of a ResultCache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """Size-bounded LRU cache of ComponentResults with TTL.
+
+    Safe to share between workflows and threads.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_s: float = 3600.0):
+        """Initialize cache.
+
+        Args:
+            max_size: Maximum number of entries kept
+            ttl_s: Default time-to-live of an entry in seconds
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[float, ComponentResult]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional["ComponentResult"]:
+        """Return a cached result, marked as a hit, or None.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Copy of the cached ComponentResult with ``cache="hit"`` in
+            its metadata, None on miss or expiry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            result = entry[1]
+
+        return replace(
+            result,
+            metadata={**result.metadata, "cache": "hit"},
+            execution_time_ms=0.0,
+        )
+
+    def put(
+        self,
+        key: str,
+        result: "ComponentResult",
+        ttl_s: Optional[float] = None,
+    ) -> None:
+        """Store a result, evicting the least recently used entries.
+
+        Args:
+            key: Cache key
+            result: Result to store
+            ttl_s: Time-to-live override in seconds
+        """
+        expires_at = time.monotonic() + (
+            self.ttl_s if ttl_s is None else ttl_s
+        )
+        with self._lock:
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        """Remove one entry if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries and reset statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.stats = CacheStats()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get cache statistics.
+
+        Returns:
+            Dictionary with size, capacity and hit/miss counters
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl_s,
+                "hits": self.stats.hits,
+                "misses": self.stats.misses,
+                "evictions": self.stats.evictions,
+                "expirations": self.stats.expirations,
+                "hit_rate": self.stats.hit_rate,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Process-wide cache shared by workflows that do not supply their own,
+# so overlapping workflows reuse each other's results.
+default_result_cache = ResultCache()
@@ -8,18 +8,32 @@ Components implement domain-specific logic for real estate analysis:
 - AI-powered analysis
 """
 
+import asyncio
+import functools
 import logging
 import time
 from typing import Any, Dict, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
 
 from src.compound_engineering import (
+    BlockingComponent,
     Component,
     ComponentResult,
     ComponentStatus,
     ComponentType,
+    ExecutionMode,
     WorkflowContext,
+    get_executor,
+)
+from src.compound_payloads import ColumnarPayload
+from src.compound_resilience import DEFAULT_RETRY_POLICY, get_circuit_breaker
+from src.compound_sources import get_comparables_source
+from src.compound_tracing import trace_span
+from src.estimation_algorithm import (
+    ComparablesStats,
+    ConfidenceCalculator,
+    SimilarityScorer,
 )
 
 logger = logging.getLogger(__name__)
@@ -37,6 +51,12 @@ class GeocodingComponent(Component):
             name="geocoding",
             component_type=ComponentType.DATA_PROCESSOR,
             description="Convert addresses to geographic coordinates",
+            cacheable=True,
+            input_fields=("address",),
+            retry_policy=DEFAULT_RETRY_POLICY,
+            idempotent=True,
+            circuit_breaker=get_circuit_breaker("geocoding"),
+            resource="geocoding",
         )
 
     async def execute(
@@ -65,13 +85,14 @@ class GeocodingComponent(Component):
             # This is a placeholder implementation
             logger.debug(f"Geocoding address: {address}")
 
-            # Simulated result
-            coordinates = {
-                "latitude": 46.2044,
-                "longitude": 6.1432,
-                "address": address,
-                "confidence": 0.95,
-            }
+            with trace_span("geocode", address=address):
+                # Simulated result
+                coordinates = {
+                    "latitude": 46.2044,
+                    "longitude": 6.1432,
+                    "address": address,
+                    "confidence": 0.95,
+                }
 
             execution_time = (time.time() - start_time) * 1000
 
@@ -92,20 +113,52 @@ class GeocodingComponent(Component):
 
 
 class DataRetrieverComponent(Component):
-    """Retrieves DV3F data for the target location.
+    """Retrieves DV3F comparables for the target location.
 
-    Fetches comparable property transactions from the DV3F database
-    based on geographic coordinates and filters.
+    Queries the process-wide comparables source (Supabase, or an
+    in-memory snapshot of the zone's mutations, see compound_sources)
+    from the shared thread pool, so that concurrent workflows share one
+    connection pool or dataset handle.
     """
 
-    def __init__(self):
+    DEFAULT_RADIUS_KM = 5.0
+    DEFAULT_TYPE = "Appartement"
+    # Comparables kept within ±50% of the target surface
+    SURFACE_TOLERANCE = 0.5
+    LIMIT = 50
+
+    def __init__(self, source: Optional[Any] = None):
+        """Initialize component.
+
+        Args:
+            source: Comparables source (defaults to the process-wide
+                source from get_comparables_source)
+        """
         super().__init__(
             name="data_retriever",
             component_type=ComponentType.RETRIEVER,
             description="Retrieve DV3F comparable properties",
+            cacheable=True,
+            input_fields=("radius_km", "surface", "type_bien"),
+            retry_policy=DEFAULT_RETRY_POLICY,
+            idempotent=True,
+            circuit_breaker=get_circuit_breaker("dv3f_database"),
+            resource="dv3f_database",
         )
+        self.source = source
         self.add_dependency("geocoding")
 
+    def cache_config(self) -> Dict[str, Any]:
+        """Search settings and the source instance queried."""
+        source = self.source or get_comparables_source()
+        return {
+            "source": f"{type(source).__qualname__}@{id(source):x}",
+            "radius_km": self.DEFAULT_RADIUS_KM,
+            "type_bien": self.DEFAULT_TYPE,
+            "surface_tolerance": self.SURFACE_TOLERANCE,
+            "limit": self.LIMIT,
+        }
+
     async def execute(
         self, context: WorkflowContext
     ) -> ComponentResult:
@@ -115,7 +168,8 @@ class DataRetrieverComponent(Component):
             context: Workflow context with geocoding results
 
         Returns:
-            ComponentResult with DataFrame of comparable properties
+            ComponentResult with a ColumnarPayload of comparable
+            properties (read-only, passed by reference downstream)
         """
         start_time = time.time()
 
@@ -130,24 +184,36 @@ class DataRetrieverComponent(Component):
                 )
 
             coords = geo_result.data
-            radius_km = context.user_input.get("radius_km", 5)
+            radius_km = context.user_input.get(
+                "radius_km", self.DEFAULT_RADIUS_KM
+            )
+            surface = context.user_input.get("surface", 100)
+            type_bien = context.user_input.get("type_bien", self.DEFAULT_TYPE)
 
             logger.debug(
                 f"Retrieving properties within {radius_km}km "
                 f"of {coords['address']}"
             )
 
-            # TODO: Implement actual DV3F data retrieval
-            # This is a placeholder implementation
-            comparable_data = pd.DataFrame(
-                {
-                    "id": [1, 2, 3],
-                    "address": ["Address 1", "Address 2", "Address 3"],
-                    "price": [250000, 280000, 300000],
-                    "surface": [100, 110, 120],
-                    "distance_km": [0.5, 1.2, 2.1],
-                }
+            source = self.source or get_comparables_source()
+            query = functools.partial(
+                source.get_comparables,
+                latitude=coords["latitude"],
+                longitude=coords["longitude"],
+                type_bien=type_bien,
+                surface_min=surface * (1 - self.SURFACE_TOLERANCE),
+                surface_max=surface * (1 + self.SURFACE_TOLERANCE),
+                rayon_km=radius_km,
+                limit=self.LIMIT,
             )
+            # Blocking database / NumPy work stays off the event loop
+            loop = asyncio.get_running_loop()
+            with trace_span("sql", radius_km=radius_km) as span:
+                comparable_data = await loop.run_in_executor(
+                    get_executor(ExecutionMode.THREAD), query
+                )
+                if span is not None:
+                    span.set(rows=len(comparable_data))
 
             execution_time = (time.time() - start_time) * 1000
 
@@ -155,10 +221,12 @@ class DataRetrieverComponent(Component):
                 component_name=self.name,
                 status=ComponentStatus.SUCCESS,
                 data={
-                    "comparable_properties": comparable_data.to_dict("records"),
+                    "comparable_properties": ColumnarPayload.from_frame(
+                        comparable_data
+                    ),
                     "count": len(comparable_data),
                 },
-                metadata={"radius_km": radius_km},
+                metadata={"radius_km": radius_km, "type_bien": type_bien},
                 execution_time_ms=execution_time,
             )
 
@@ -171,219 +239,261 @@ class DataRetrieverComponent(Component):
             )
 
 
-class ScoringComponent(Component):
-    """Scores comparable properties based on relevance criteria.
+class ScoringComponent(BlockingComponent):
+    """Scores comparable properties with the production scorer.
 
-    Calculates relevance scores for each comparable property
-    considering factors like distance, age, size, etc.
+    Applies SimilarityScorer (distance, surface, type and age
+    sub-scores) to all comparables at once, on their columns. The
+    vectorized NumPy work releases the GIL, so it runs in the shared
+    thread pool by default and the read-only payload is passed by
+    reference. ExecutionMode.PROCESS pickles the payload to a worker
+    and back, which only pays off for very large comparable sets.
     """
 
-    def __init__(self):
+    def __init__(
+        self, execution_mode: ExecutionMode = ExecutionMode.THREAD
+    ):
         super().__init__(
             name="scoring",
             component_type=ComponentType.SCORER,
             description="Score comparable properties",
+            execution_mode=execution_mode,
+            input_fields=("surface", "type_bien"),
         )
         self.add_dependency("data_retriever")
 
-    async def execute(
-        self, context: WorkflowContext
-    ) -> ComponentResult:
-        """Score comparable properties.
+    def build_payload(self, context: WorkflowContext) -> Any:
+        """Collect comparable properties and the target property.
 
         Args:
             context: Workflow context with retrieved data
 
         Returns:
-            ComponentResult with scored properties
+            Payload for compute(), or FAILED result
         """
-        start_time = time.time()
-
-        try:
-            # Get comparable properties
-            retriever_result = context.get_result("data_retriever")
-            if not retriever_result or not retriever_result.is_success():
-                return ComponentResult(
-                    component_name=self.name,
-                    status=ComponentStatus.FAILED,
-                    error="Data retrieval not available",
-                )
-
-            properties = retriever_result.data["comparable_properties"]
-            target_surface = context.user_input.get("surface", 100)
-
-            logger.debug(
-                f"Scoring {len(properties)} properties "
-                f"against target surface {target_surface}m²"
-            )
-
-            # TODO: Implement sophisticated scoring algorithm
-            # This is a simplified version
-            scored_properties = []
-            for prop in properties:
-                score = self._calculate_score(
-                    prop, target_surface
-                )
-                prop["score"] = score
-                scored_properties.append(prop)
-
-            # Sort by score
-            scored_properties.sort(
-                key=lambda x: x["score"], reverse=True
-            )
-
-            execution_time = (time.time() - start_time) * 1000
-
-            return ComponentResult(
-                component_name=self.name,
-                status=ComponentStatus.SUCCESS,
-                data={
-                    "scored_properties": scored_properties,
-                    "top_count": len(scored_properties),
-                },
-                metadata={"target_surface": target_surface},
-                execution_time_ms=execution_time,
-            )
-
-        except Exception as e:
-            logger.error(f"Scoring failed: {str(e)}")
+        # Get comparable properties
+        retriever_result = context.get_result("data_retriever")
+        geo_result = context.get_result("geocoding")
+        if not retriever_result or not retriever_result.is_success():
             return ComponentResult(
                 component_name=self.name,
                 status=ComponentStatus.FAILED,
-                error=str(e),
+                error="Data retrieval not available",
             )
 
+        return {
+            "properties": retriever_result.data["comparable_properties"],
+            "target_latitude": geo_result.data["latitude"],
+            "target_longitude": geo_result.data["longitude"],
+            "target_surface": context.user_input.get("surface", 100),
+            "target_type": context.user_input.get(
+                "type_bien", DataRetrieverComponent.DEFAULT_TYPE
+            ),
+        }
+
     @staticmethod
-    def _calculate_score(
-        property_data: Dict[str, Any], target_surface: float
-    ) -> float:
-        """Calculate relevance score for a property.
+    def compute(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Score and rank comparable properties.
 
         Args:
-            property_data: Property information
-            target_surface: Target property surface
+            payload: Properties and target property
 
         Returns:
-            Relevance score (0-100)
+            Scored properties sorted by decreasing score
         """
-        score = 100.0
+        properties = ColumnarPayload.coerce(payload["properties"])
+
+        logger.debug(
+            f"Scoring {len(properties)} properties "
+            f"against target surface {payload['target_surface']}m²"
+        )
+
+        # No comparables (the retriever may return a frame without
+        # columns): nothing to score
+        if not len(properties):
+            return {
+                "scored_properties": properties.with_columns(
+                    score=np.empty(0)
+                ),
+                "top_count": 0,
+            }
 
-        # Distance penalty
-        distance = property_data.get("distance_km", 0)
-        score -= distance * 5  # 5 points per km
+        scores = SimilarityScorer.calculate_scores_array(
+            payload["target_latitude"],
+            payload["target_longitude"],
+            payload["target_surface"],
+            payload["target_type"],
+            properties,
+        )
 
-        # Surface difference penalty
-        surface_diff = abs(
-            property_data.get("surface", target_surface) - target_surface
+        # Sort by score (stable, ties keep retrieval order). The input
+        # columns are read-only and shared, so take() builds new ones.
+        order = np.argsort(-scores, kind="stable")
+        scored_properties = properties.take(order).with_columns(
+            score=scores[order]
         )
-        score -= (surface_diff / target_surface) * 10
 
-        return max(0, min(100, score))
+        return {
+            "scored_properties": scored_properties,
+            "top_count": len(scored_properties),
+        }
+
+    def build_result(
+        self, data: Dict[str, Any], payload: Dict[str, Any]
+    ) -> ComponentResult:
+        return ComponentResult(
+            component_name=self.name,
+            status=ComponentStatus.SUCCESS,
+            data=data,
+            metadata={"target_surface": payload["target_surface"]},
+        )
 
 
-class EstimationComponent(Component):
+class EstimationComponent(BlockingComponent):
     """Calculates price estimation based on scored comparables.
 
     Produces a statistical estimation with confidence intervals
-    using the scored comparable properties.
+    using the scored comparable properties, and its reliability
+    (ConfidenceCalculator) over the comparables it used. Like scoring,
+    it runs in the shared thread pool by default (the payload is
+    passed by reference); ExecutionMode.PROCESS is an opt-in for very
+    large comparable sets.
     """
 
-    def __init__(self):
+    def __init__(
+        self, execution_mode: ExecutionMode = ExecutionMode.THREAD
+    ):
         super().__init__(
             name="estimation",
             component_type=ComponentType.ANALYZER,
             description="Calculate price estimation",
+            execution_mode=execution_mode,
+            input_fields=("surface",),
         )
         self.add_dependency("scoring")
 
-    async def execute(
-        self, context: WorkflowContext
-    ) -> ComponentResult:
-        """Calculate price estimation.
+    def build_payload(self, context: WorkflowContext) -> Any:
+        """Collect scored properties and target surface.
 
         Args:
             context: Workflow context with scored data
 
         Returns:
-            ComponentResult with price estimation
+            Payload for compute(), or FAILED result
         """
-        start_time = time.time()
-
-        try:
-            # Get scored properties
-            scoring_result = context.get_result("scoring")
-            if not scoring_result or not scoring_result.is_success():
-                return ComponentResult(
-                    component_name=self.name,
-                    status=ComponentStatus.FAILED,
-                    error="Scoring not available",
-                )
-
-            properties = scoring_result.data["scored_properties"]
-            target_surface = context.user_input.get("surface", 100)
-
-            logger.debug(
-                f"Calculating estimation from {len(properties)} properties"
+        # Get scored properties
+        scoring_result = context.get_result("scoring")
+        if not scoring_result or not scoring_result.is_success():
+            return ComponentResult(
+                component_name=self.name,
+                status=ComponentStatus.FAILED,
+                error="Scoring not available",
             )
 
-            # Extract prices per m²
-            prices_per_m2 = [
-                p["price"] / p["surface"]
-                for p in properties
-                if p.get("surface", 0) > 0
-            ]
+        return {
+            "properties": scoring_result.data["scored_properties"],
+            "target_surface": context.user_input.get("surface", 100),
+        }
 
-            if not prices_per_m2:
-                return ComponentResult(
-                    component_name=self.name,
-                    status=ComponentStatus.FAILED,
-                    error="No valid pricing data",
-                )
-
-            # Calculate statistics
-            import statistics
+    @staticmethod
+    def compute(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate the price estimation.
 
-            median_price_m2 = statistics.median(prices_per_m2)
-            mean_price_m2 = statistics.mean(prices_per_m2)
-            std_dev = (
-                statistics.stdev(prices_per_m2)
-                if len(prices_per_m2) > 1
-                else 0
-            )
+        Args:
+            payload: Scored properties and target surface
 
-            # Estimate target property price
-            estimated_price = median_price_m2 * target_surface
-            low_estimate = (median_price_m2 - std_dev) * target_surface
-            high_estimate = (median_price_m2 + std_dev) * target_surface
+        Returns:
+            Estimation data, or an ``error`` entry if no price is usable
+        """
+        properties = ColumnarPayload.coerce(payload["properties"])
+        target_surface = payload["target_surface"]
 
-            execution_time = (time.time() - start_time) * 1000
+        logger.debug(
+            f"Calculating estimation from {len(properties)} properties"
+        )
 
-            return ComponentResult(
-                component_name=self.name,
-                status=ComponentStatus.SUCCESS,
-                data={
-                    "estimated_price": estimated_price,
-                    "low_estimate": max(0, low_estimate),
-                    "high_estimate": high_estimate,
-                    "price_per_m2": median_price_m2,
-                    "comparables_count": len(properties),
-                    "confidence": 0.85,
-                },
-                metadata={
-                    "std_dev": std_dev,
-                    "mean_price": mean_price_m2,
-                },
-                execution_time_ms=execution_time,
-            )
+        # Extract prices per m² (DV3F columns)
+        if "valeurfonc" not in properties or "sbati" not in properties:
+            return {"error": "No valid pricing data"}
+        surfaces = properties["sbati"].astype(float)
+        prices = properties["valeurfonc"].astype(float)
+        valid = surfaces > 0
+        prices_per_m2 = prices[valid] / surfaces[valid]
+
+        if not len(prices_per_m2):
+            return {"error": "No valid pricing data"}
+
+        # Calculate statistics
+        median_price_m2 = float(np.median(prices_per_m2))
+        mean_price_m2 = float(np.mean(prices_per_m2))
+        std_dev = (
+            float(np.std(prices_per_m2, ddof=1))
+            if len(prices_per_m2) > 1
+            else 0
+        )
 
-        except Exception as e:
-            logger.error(f"Estimation failed: {str(e)}")
+        # Estimate target property price
+        estimated_price = median_price_m2 * target_surface
+        low_estimate = (median_price_m2 - std_dev) * target_surface
+        high_estimate = (median_price_m2 + std_dev) * target_surface
+
+        # Reliability of the comparables behind the estimate (volume,
+        # similarity, price dispersion and age); ``confidence`` is its
+        # global score as a fraction (0-1)
+        scores = properties.get("score")
+        if scores is None:
+            scores = np.zeros(len(properties))
+        dates = properties.get("datemut")
+        if dates is None:
+            dates = np.full(len(properties), None)
+        elif dates.dtype.kind == "M":
+            # tolist() yields datetime objects only at this resolution
+            dates = dates.astype("datetime64[us]")
+        stats = ComparablesStats()
+        for price, date, score in zip(
+            prices[valid].tolist(),
+            dates[valid].tolist(),
+            scores[valid].tolist(),
+        ):
+            stats.add({"valeurfonc": price, "datemut": date}, score)
+        fiabilite = ConfidenceCalculator.calculate_confidence([], stats)
+
+        return {
+            "estimated_price": estimated_price,
+            "low_estimate": max(0, low_estimate),
+            "high_estimate": high_estimate,
+            "price_per_m2": median_price_m2,
+            "comparables_count": len(prices_per_m2),
+            "confidence": fiabilite["score_global"] / 100,
+            "fiabilite": fiabilite,
+            "std_dev": std_dev,
+            "mean_price": mean_price_m2,
+        }
+
+    def build_result(
+        self, data: Dict[str, Any], payload: Dict[str, Any]
+    ) -> ComponentResult:
+        if "error" in data:
             return ComponentResult(
                 component_name=self.name,
                 status=ComponentStatus.FAILED,
-                error=str(e),
+                error=data["error"],
             )
 
+        return ComponentResult(
+            component_name=self.name,
+            status=ComponentStatus.SUCCESS,
+            data={
+                key: value
+                for key, value in data.items()
+                if key not in ("std_dev", "mean_price")
+            },
+            metadata={
+                "std_dev": data["std_dev"],
+                "mean_price": data["mean_price"],
+            },
+        )
+
 
 class FormatterComponent(Component):
     """Formats final results for presentation.
@@ -397,6 +507,7 @@ class FormatterComponent(Component):
             name="formatter",
             component_type=ComponentType.FORMATTER,
             description="Format results for output",
+            input_fields=(),
         )
         self.add_dependency("estimation")
 
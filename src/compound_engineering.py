@@ -12,15 +12,69 @@ Architecture:
 
 import asyncio
 import logging
+import os
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, TypeVar
+from types import MappingProxyType
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import pandas as pd
 
+from src.compound_cache import (
+    ResultCache,
+    default_result_cache,
+    normalize_input,
+    stable_hash,
+)
+from src.compound_metrics import MetricsRegistry
+from src.compound_resilience import (
+    CircuitBreaker,
+    RetryPolicy,
+    circuit_breakers_status,
+)
+from src.compound_runlog import RunLog, build_run_record
+from src.compound_scheduler import (
+    Priority,
+    RateLimiter,
+    default_rate_limiter,
+)
+from src.compound_tracing import (
+    Tracer,
+    default_tracer,
+    span_context,
+    trace_span,
+)
+
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
 
 class ComponentType(Enum):
     """Types of components in the compound system."""
@@ -42,6 +96,124 @@ class ComponentStatus(Enum):
     SUCCESS = "success"
     FAILED = "failed"
     SKIPPED = "skipped"
+    TIMED_OUT = "timed_out"
+
+
+class ExecutionMode(Enum):
+    """Where a component's body runs."""
+
+    ASYNC = "async"  # on the event loop (I/O-bound, awaits)
+    THREAD = "thread"  # shared thread pool (blocking I/O)
+    PROCESS = "process"  # shared process pool (CPU-bound)
+
+
+_executors: Dict[ExecutionMode, Executor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(mode: ExecutionMode) -> Executor:
+    """Return the process-wide executor for an execution mode.
+
+    Executors are created lazily and shared by all workflows, so
+    concurrent workflows scale across threads or cores.
+
+    Args:
+        mode: THREAD or PROCESS
+
+    Returns:
+        Shared executor
+
+    Raises:
+        ValueError: If mode is ASYNC
+    """
+    if mode == ExecutionMode.ASYNC:
+        raise ValueError("ASYNC components run on the event loop")
+    with _executors_lock:
+        if mode not in _executors:
+            workers = os.cpu_count() or 1
+            if mode == ExecutionMode.THREAD:
+                _executors[mode] = ThreadPoolExecutor(
+                    max_workers=min(32, workers + 4),
+                    thread_name_prefix="compound",
+                )
+            else:
+                _executors[mode] = ProcessPoolExecutor(max_workers=workers)
+        return _executors[mode]
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down the shared executors (recreated on next use)."""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=wait)
+        _executors.clear()
+
+
+class ConcurrencyLimit:
+    """Bound on components in flight, shared by every workflow using it.
+
+    asyncio semaphores belong to one event loop, so the limit keeps one
+    semaphore per running loop.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        """Initialize limit.
+
+        Args:
+            limit: Maximum number of components running at once across
+                all workflows (None for unbounded)
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self._semaphores: "weakref.WeakKeyDictionary[Any, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        """Semaphore of the running event loop, None if unbounded."""
+        if not self.limit:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._semaphores.get(loop)
+            # A changed limit applies to new acquisitions; holders release
+            # the semaphore they acquired
+            if entry is None or entry[0] != self.limit:
+                entry = (self.limit, asyncio.Semaphore(self.limit))
+                self._semaphores[loop] = entry
+        return entry[1]
+
+
+class _ConcurrencySlots:
+    """Semaphores a component holds while it runs (workflow, global)."""
+
+    __slots__ = ("semaphores",)
+
+    def __init__(self, semaphores: List[asyncio.Semaphore]):
+        self.semaphores = semaphores
+
+    async def acquire(self) -> None:
+        # Always in the same order (workflow, then global): no deadlock
+        acquired: List[asyncio.Semaphore] = []
+        try:
+            for semaphore in self.semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+
+    def release(self) -> None:
+        for semaphore in self.semaphores:
+            semaphore.release()
+
+
+# Process-wide limit shared by all workflows (unbounded by default; set
+# ``default_concurrency_limit.limit`` to cap components in flight)
+default_concurrency_limit = ConcurrencyLimit()
 
 
 @dataclass
@@ -63,6 +235,28 @@ class ComponentResult:
         """Check if component failed."""
         return self.status == ComponentStatus.FAILED
 
+    def is_timed_out(self) -> bool:
+        """Check if component was cut off by a timeout or deadline."""
+        return self.status == ComponentStatus.TIMED_OUT
+
+    def is_condition_skipped(self) -> bool:
+        """Check if a run condition deliberately skipped the component."""
+        return (
+            self.status == ComponentStatus.SKIPPED
+            and "skip_condition" in self.metadata
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form (status as its string value)."""
+        return {
+            "component_name": self.component_name,
+            "status": self.status.value,
+            "data": self.data,
+            "error": self.error,
+            "metadata": self.metadata,
+            "execution_time_ms": self.execution_time_ms,
+        }
+
 
 @dataclass
 class WorkflowContext:
@@ -74,6 +268,18 @@ class WorkflowContext:
         default_factory=dict
     )
     metadata: Dict[str, Any] = field(default_factory=dict)
+    deadline: Optional[float] = None  # time.monotonic() timestamp
+    priority: int = Priority.INTERACTIVE
+
+    def remaining_time(self) -> Optional[float]:
+        """Seconds left before the workflow deadline (None if unbounded)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def is_expired(self) -> bool:
+        """Check if the workflow deadline has passed."""
+        return self.deadline is not None and time.monotonic() >= self.deadline
 
     def get_result(self, component_name: str) -> Optional[ComponentResult]:
         """Get result from a specific component."""
@@ -88,6 +294,22 @@ class WorkflowContext:
         """Store component result in context."""
         self.intermediate_results[result.component_name] = result
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form, e.g. to store or send the outcome of a run.
+
+        The deadline is left out: it is a local monotonic timestamp.
+        """
+        return {
+            "workflow_id": self.workflow_id,
+            "user_input": self.user_input,
+            "results": {
+                name: result.to_dict()
+                for name, result in self.intermediate_results.items()
+            },
+            "metadata": self.metadata,
+            "priority": int(self.priority),
+        }
+
 
 class Component(ABC):
     """Base interface for all compound system components.
@@ -101,6 +323,15 @@ class Component(ABC):
         name: str,
         component_type: ComponentType,
         description: str = "",
+        timeout_s: Optional[float] = None,
+        optional: bool = False,
+        cacheable: bool = False,
+        input_fields: Optional[Sequence[str]] = None,
+        cache_ttl_s: Optional[float] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        idempotent: bool = False,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        resource: Optional[str] = None,
     ):
         """Initialize component.
 
@@ -108,12 +339,49 @@ class Component(ABC):
             name: Unique identifier for this component
             component_type: Type of component
             description: Human-readable description
+            timeout_s: Maximum execution time in seconds (None for
+                no per-component limit; the workflow deadline still
+                applies)
+            optional: Whether the workflow can succeed without this
+                component. Optional components are skipped when the
+                remaining time budget is shorter than their timeout.
+            cacheable: Whether successful results may be memoized in
+                the workflow's result cache
+            input_fields: Keys of ``user_input`` the component reads
+                (None if undeclared: every key is assumed to matter).
+                Used for cache keys and by Workflow.rerun().
+            cache_ttl_s: Cache time-to-live override in seconds
+            retry_policy: Backoff policy for failed attempts
+            idempotent: Whether the component may safely run more than
+                once for the same input; retries only apply if True
+            circuit_breaker: Breaker of the external service called
+                (usually shared, see get_circuit_breaker)
+            resource: External resource used, for rate limiting
+                (falls back to the component type)
         """
         self.name = name
         self.component_type = component_type
         self.description = description
         self.enabled = True
         self.dependencies: List[str] = []
+        self.timeout_s = timeout_s
+        self.optional = optional
+        self.cacheable = cacheable
+        self.input_fields = (
+            tuple(input_fields) if input_fields is not None else None
+        )
+        self.cache_ttl_s = cache_ttl_s
+        self.retry_policy = retry_policy
+        self.idempotent = idempotent
+        self.circuit_breaker = circuit_breaker
+        self.resource = resource
+        # (predicate, reason) pairs that must all hold for the component
+        # to run, see run_if()
+        self.conditions: List[
+            Tuple[Callable[[WorkflowContext], bool], str]
+        ] = []
+        # Called when the dependency graph changes (plan invalidation)
+        self._graph_listeners: List[Callable[[], None]] = []
 
     @abstractmethod
     async def execute(
@@ -139,8 +407,131 @@ class Component(ABC):
             Self for chaining
         """
         self.dependencies.append(component_name)
+        for listener in self._graph_listeners:
+            listener()
         return self
 
+    def run_if(
+        self,
+        predicate: Callable[[WorkflowContext], bool],
+        reason: str = "",
+        after: Sequence[str] = (),
+    ) -> "Component":
+        """Run the component only when a predicate holds (conditional edge).
+
+        The predicate is evaluated on the WorkflowContext once the
+        component's dependencies have succeeded. When it returns False
+        the component is SKIPPED without cost, with ``reason`` in
+        ``metadata["skip_condition"]``; its dependents are skipped the
+        same way, and the workflow still counts as successful.
+
+        Args:
+            predicate: Function of the context, True to run
+            reason: Why the component is skipped when it is False
+            after: Components whose results the predicate reads (added
+                as dependencies so they complete first)
+
+        Returns:
+            Self for chaining
+        """
+        for dep in after:
+            if dep not in self.dependencies:
+                self.add_dependency(dep)
+        self.conditions.append((predicate, reason))
+        return self
+
+    def failed_condition(self, context: WorkflowContext) -> Optional[str]:
+        """Return the reason of the first unmet run condition, if any.
+
+        A predicate that raises is logged and treated as met, so a
+        faulty rule never silently drops work.
+
+        Args:
+            context: Workflow context with dependency results
+
+        Returns:
+            Skip reason, None if the component should run
+        """
+        for predicate, reason in self.conditions:
+            try:
+                if not predicate(context):
+                    return reason or "Run condition not met"
+            except Exception as e:
+                logger.warning(
+                    f"Run condition of {self.name} failed: {str(e)}"
+                )
+        return None
+
+    def cache_key(self, context: WorkflowContext) -> str:
+        """Compute the result cache key for this execution.
+
+        The key hashes the component class, name and configuration
+        (see cache_config), its declared ``user_input`` fields and the
+        results of its dependencies. A cacheable dependency contributes
+        its own cache key, so large upstream payloads are not
+        re-serialized.
+
+        Args:
+            context: Workflow context with user input and previous results
+
+        Returns:
+            Hex digest identifying the component's inputs
+
+        Raises:
+            TypeError: If an input holds a value that cannot be hashed
+                by content
+        """
+        deps = {}
+        for dep in sorted(self.dependencies):
+            result = context.get_result(dep)
+            if result is None:
+                deps[dep] = None
+            elif "cache_key" in result.metadata:
+                deps[dep] = result.metadata["cache_key"]
+            else:
+                deps[dep] = stable_hash(result.data)
+
+        cls = type(self)
+        return stable_hash(
+            {
+                "component": self.name,
+                "class": f"{cls.__module__}.{cls.__qualname__}",
+                "config": self.cache_config(),
+                "inputs": (
+                    context.user_input
+                    if self.input_fields is None
+                    else {
+                        field: context.user_input.get(field)
+                        for field in self.input_fields
+                    }
+                ),
+                "dependencies": deps,
+            }
+        )
+
+    def cache_config(self) -> Dict[str, Any]:
+        """Configuration that changes the component's output.
+
+        Part of the cache key, so that same-named components configured
+        differently do not share cache entries. Override in cacheable
+        components that take parameters.
+        """
+        return {}
+
+    def reads_any(self, keys: Set[str]) -> bool:
+        """Check whether the component reads one of the given input keys.
+
+        Args:
+            keys: Changed ``user_input`` keys
+
+        Returns:
+            True if a declared input is among keys, or if inputs are
+            undeclared and keys is not empty
+        """
+        if self.input_fields is None:
+            return bool(keys)
+        return not keys.isdisjoint(self.input_fields)
+
     def __repr__(self) -> str:
         return (
             f"<{self.__class__.__name__} name={self.name} "
@@ -148,24 +539,247 @@ class Component(ABC):
         )
 
 
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Validated, immutable schedule of a workflow's component graph.
+
+    Built once by Workflow.compile() and reused by every execution
+    until a component or dependency is added.
+    """
+
+    order: Tuple[str, ...]
+    levels: Tuple[Tuple[str, ...], ...]
+    dependencies: Mapping[str, Tuple[str, ...]]
+    dependents: Mapping[str, Tuple[str, ...]]
+
+    @property
+    def roots(self) -> Tuple[str, ...]:
+        """Components without dependencies."""
+        return self.levels[0] if self.levels else ()
+
+    @classmethod
+    def build(
+        cls, order: Sequence[str], components: Dict[str, "Component"]
+    ) -> "ExecutionPlan":
+        """Build a plan from a topological order.
+
+        Args:
+            order: Component names, dependencies first
+            components: Components by name
+
+        Returns:
+            Frozen ExecutionPlan
+        """
+        dependencies = {
+            name: tuple(dict.fromkeys(components[name].dependencies))
+            for name in order
+        }
+        dependents: Dict[str, List[str]] = {name: [] for name in order}
+        depth: Dict[str, int] = {}
+        for name in order:
+            deps = dependencies[name]
+            depth[name] = 1 + max((depth[d] for d in deps), default=-1)
+            for dep in deps:
+                dependents[dep].append(name)
+
+        nb_levels = max(depth.values(), default=-1) + 1
+        levels: List[List[str]] = [[] for _ in range(nb_levels)]
+        for name in order:
+            levels[depth[name]].append(name)
+
+        return cls(
+            order=tuple(order),
+            levels=tuple(tuple(level) for level in levels),
+            dependencies=MappingProxyType(dependencies),
+            dependents=MappingProxyType(
+                {name: tuple(deps) for name, deps in dependents.items()}
+            ),
+        )
+
+
+class BlockingComponent(Component):
+    """Component whose body blocks: CPU-bound work or blocking I/O.
+
+    The body is split in three steps so that only plain data crosses
+    the executor boundary:
+
+    1. ``build_payload`` runs on the event loop and extracts what the
+       computation needs from the context (must be picklable for
+       PROCESS mode).
+    2. ``compute`` is a static function run in the shared thread or
+       process pool.
+    3. ``build_result`` runs on the event loop and wraps the output.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        component_type: ComponentType,
+        description: str = "",
+        execution_mode: ExecutionMode = ExecutionMode.THREAD,
+        **kwargs: Any,
+    ):
+        """Initialize component.
+
+        Args:
+            name: Unique identifier for this component
+            component_type: Type of component
+            description: Human-readable description
+            execution_mode: THREAD for blocking I/O, PROCESS for
+                CPU-bound work, ASYNC to run inline (debugging)
+            **kwargs: Forwarded to Component
+        """
+        super().__init__(name, component_type, description, **kwargs)
+        self.execution_mode = execution_mode
+
+    @abstractmethod
+    def build_payload(self, context: WorkflowContext) -> Any:
+        """Extract the computation input from the context.
+
+        Args:
+            context: Workflow context with user input and previous results
+
+        Returns:
+            Payload passed to compute(), or a ComponentResult to
+            return immediately (e.g. missing dependency)
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def compute(payload: Any) -> Dict[str, Any]:
+        """Run the blocking computation.
+
+        Must be a module-level reachable static function without side
+        effects on the component, so it can run in another process.
+
+        Args:
+            payload: Output of build_payload()
+
+        Returns:
+            Result data
+        """
+        pass
+
+    def build_result(
+        self, data: Dict[str, Any], payload: Any
+    ) -> ComponentResult:
+        """Wrap compute() output into a ComponentResult."""
+        return ComponentResult(
+            component_name=self.name,
+            status=ComponentStatus.SUCCESS,
+            data=data,
+        )
+
+    async def execute(
+        self, context: WorkflowContext
+    ) -> ComponentResult:
+        """Run compute() in the executor matching execution_mode."""
+        start_time = time.time()
+
+        try:
+            payload = self.build_payload(context)
+            if isinstance(payload, ComponentResult):
+                return payload
+
+            with trace_span(
+                "compute", execution_mode=self.execution_mode.value
+            ):
+                if self.execution_mode == ExecutionMode.ASYNC:
+                    data = self.compute(payload)
+                else:
+                    loop = asyncio.get_running_loop()
+                    data = await loop.run_in_executor(
+                        get_executor(self.execution_mode),
+                        type(self).compute,
+                        payload,
+                    )
+
+            result = self.build_result(data, payload)
+            result.execution_time_ms = (time.time() - start_time) * 1000
+            result.metadata.setdefault(
+                "execution_mode", self.execution_mode.value
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"Component {self.name} failed: {str(e)}")
+            return ComponentResult(
+                component_name=self.name,
+                status=ComponentStatus.FAILED,
+                error=str(e),
+            )
+
+
 class Workflow:
     """Orchestrates a sequence of components.
 
     Manages component execution order, dependency resolution,
-    and error handling.
+    and error handling. Components are scheduled as a DAG: each one
+    starts as soon as all of its dependencies have completed, so
+    independent branches run concurrently.
     """
 
-    def __init__(self, name: str, description: str = ""):
+    # Extra wait for components that do not honour cancellation
+    CANCEL_GRACE_S = 0.05
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        max_concurrency: Optional[int] = None,
+        deadline_s: Optional[float] = None,
+        result_cache: Optional[ResultCache] = None,
+        tracer: Optional[Tracer] = None,
+        coalesce: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency_limit: Optional[ConcurrencyLimit] = None,
+    ):
         """Initialize workflow.
 
         Args:
             name: Unique workflow identifier
             description: Human-readable description
+            max_concurrency: Maximum number of components of this
+                workflow running at once, shared by all its concurrent
+                executions (None for unbounded)
+            deadline_s: Default time budget of one execution in seconds
+                (None for unbounded)
+            result_cache: Cache for cacheable components (defaults to
+                the process-wide cache shared by all workflows)
+            tracer: Tracer sampling executions (defaults to the
+                process-wide tracer)
+            coalesce: Whether CompoundSystem shares one in-flight
+                execution between concurrent requests with the same
+                normalized input
+            rate_limiter: Per-resource rate limits (defaults to the
+                process-wide limiter)
+            concurrency_limit: Limit on components in flight shared with
+                other workflows (defaults to the process-wide
+                default_concurrency_limit)
         """
         self.name = name
         self.description = description
         self.components: Dict[str, Component] = {}
         self.execution_order: List[str] = []
+        self._plan: Optional[ExecutionPlan] = None
+        self.max_concurrency = max_concurrency
+        self.deadline_s = deadline_s
+        self.result_cache = (
+            result_cache if result_cache is not None else default_result_cache
+        )
+        self.tracer = tracer if tracer is not None else default_tracer
+        self.coalesce = coalesce
+        self.rate_limiter = (
+            rate_limiter if rate_limiter is not None else default_rate_limiter
+        )
+        self.concurrency_limit = (
+            concurrency_limit
+            if concurrency_limit is not None
+            else default_concurrency_limit
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
 
     def add_component(self, component: Component) -> "Workflow":
         """Add a component to the workflow.
@@ -177,9 +791,34 @@ class Workflow:
             Self for chaining
         """
         self.components[component.name] = component
+        component._graph_listeners.append(self.invalidate_plan)
+        self.invalidate_plan()
         logger.debug(f"Added component: {component.name}")
         return self
 
+    def invalidate_plan(self) -> None:
+        """Drop the compiled plan; the next execution recompiles it."""
+        self._plan = None
+
+    def compile(self) -> ExecutionPlan:
+        """Return the execution plan, compiling it if the graph changed.
+
+        Returns:
+            Cached ExecutionPlan
+
+        Raises:
+            ValueError: If a dependency is missing or circular
+        """
+        plan = self._plan
+        if plan is None:
+            order = self.resolve_dependencies()
+            plan = self._plan = ExecutionPlan.build(order, self.components)
+            logger.debug(
+                f"Compiled workflow '{self.name}': {len(plan.order)} "
+                f"components in {len(plan.levels)} levels"
+            )
+        return plan
+
     def resolve_dependencies(self) -> List[str]:
         """Resolve component execution order based on dependencies.
 
@@ -223,14 +862,422 @@ class Workflow:
         self.execution_order = resolved
         return resolved
 
+    def _get_slots(self) -> Optional[_ConcurrencySlots]:
+        """Concurrency semaphores (workflow, then global) for this loop."""
+        semaphores = []
+        if self.max_concurrency:
+            loop = asyncio.get_running_loop()
+            if self._semaphore is None or self._semaphore_loop is not loop:
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._semaphore_loop = loop
+            semaphores.append(self._semaphore)
+        shared = self.concurrency_limit.semaphore()
+        if shared is not None:
+            semaphores.append(shared)
+        return _ConcurrencySlots(semaphores) if semaphores else None
+
+    def _skip_result(
+        self, component: Component, context: WorkflowContext
+    ) -> Optional[ComponentResult]:
+        """Return a SKIPPED result if the component must not run."""
+        if not component.enabled:
+            logger.debug(f"Skipping disabled component: {component.name}")
+            return ComponentResult(
+                component_name=component.name,
+                status=ComponentStatus.SKIPPED,
+            )
+
+        if context.is_expired():
+            return ComponentResult(
+                component_name=component.name,
+                status=ComponentStatus.SKIPPED,
+                error="Workflow deadline exceeded",
+            )
+
+        remaining = context.remaining_time()
+        if (
+            component.optional
+            and component.timeout_s is not None
+            and remaining is not None
+            and remaining < component.timeout_s
+        ):
+            logger.info(
+                f"Skipping optional component {component.name}: "
+                f"{remaining:.3f}s left, needs up to {component.timeout_s}s"
+            )
+            return ComponentResult(
+                component_name=component.name,
+                status=ComponentStatus.SKIPPED,
+                error="Insufficient time budget",
+            )
+
+        deps_failed = [
+            dep
+            for dep in component.dependencies
+            if not context.get_result(dep).is_success()
+        ]
+        if deps_failed and all(
+            context.get_result(dep).is_condition_skipped()
+            for dep in deps_failed
+        ):
+            # The whole branch below a skipped component is skipped too
+            return ComponentResult(
+                component_name=component.name,
+                status=ComponentStatus.SKIPPED,
+                metadata={
+                    "skip_condition": (
+                        f"Upstream branch skipped: {', '.join(deps_failed)}"
+                    )
+                },
+            )
+        if deps_failed:
+            logger.warning(
+                f"Skipping {component.name} due to failed dependencies: "
+                f"{deps_failed}"
+            )
+            return ComponentResult(
+                component_name=component.name,
+                status=ComponentStatus.SKIPPED,
+                error="Dependency failed",
+            )
+
+        reason = component.failed_condition(context)
+        if reason is not None:
+            logger.info(f"Skipping {component.name}: {reason}")
+            return ComponentResult(
+                component_name=component.name,
+                status=ComponentStatus.SKIPPED,
+                metadata={"skip_condition": reason},
+            )
+
+        return None
+
+    @staticmethod
+    def _trace_skip(result: ComponentResult) -> None:
+        """Record a skipped component as an empty span with its reason."""
+        with trace_span(
+            result.component_name,
+            category="component",
+            new_lane=True,
+            status=result.status.value,
+            skip_reason=(
+                result.metadata.get("skip_condition")
+                or result.error
+                or "disabled"
+            ),
+        ):
+            pass
+
+    @staticmethod
+    def _timed_out_result(
+        component: Component, message: str, timeout: Optional[float]
+    ) -> ComponentResult:
+        logger.warning(f"Component {component.name} timed out: {message}")
+        return ComponentResult(
+            component_name=component.name,
+            status=ComponentStatus.TIMED_OUT,
+            error=message,
+            metadata={"timeout_s": timeout},
+        )
+
+    async def _run_component(
+        self,
+        component: Component,
+        context: WorkflowContext,
+        slots: Optional[_ConcurrencySlots],
+        scheduled_at: float,
+    ) -> ComponentResult:
+        """Execute one component inside its trace span.
+
+        Args:
+            component: Component to run
+            context: Workflow context
+            slots: Concurrency semaphores to hold while running, if any
+            scheduled_at: time.perf_counter() when the task was created
+        """
+        with trace_span(
+            component.name,
+            category="component",
+            new_lane=True,
+            component_type=component.component_type.value,
+        ) as span:
+            if span is not None:
+                span.set(
+                    schedule_delay_ms=(
+                        (time.perf_counter() - scheduled_at) * 1000
+                    )
+                )
+            result = await self._execute_component(
+                component, context, slots
+            )
+            # Wall time seen by the scheduler, queueing included
+            context.metadata.setdefault("timings_ms", {})[component.name] = (
+                (time.perf_counter() - scheduled_at) * 1000
+            )
+            if span is not None:
+                span.set(status=result.status.value)
+                if "cache" in result.metadata:
+                    span.set(cache=result.metadata["cache"])
+        return result
+
+    async def _execute_component(
+        self,
+        component: Component,
+        context: WorkflowContext,
+        slots: Optional[_ConcurrencySlots],
+    ) -> ComponentResult:
+        """Execute one component with caching, retries and circuit breaking.
+
+        Cacheable components are served from the result cache when
+        their inputs were already seen. While the component's circuit
+        breaker is open it fails fast. Idempotent components with a
+        retry policy are re-run after a jittered backoff, as long as
+        the workflow deadline leaves time for it.
+        """
+        cache_key = None
+        if component.cacheable:
+            try:
+                cache_key = component.cache_key(context)
+            except TypeError as e:
+                logger.warning(
+                    f"Not caching {component.name}: {str(e)}"
+                )
+            if cache_key is not None:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    logger.debug(
+                        f"Cache hit for component: {component.name}"
+                    )
+                    return cached
+
+        breaker = component.circuit_breaker
+        policy = component.retry_policy if component.idempotent else None
+        max_attempts = policy.max_attempts if policy else 1
+
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow_request():
+                logger.warning(
+                    f"Circuit '{breaker.name}' open, failing fast: "
+                    f"{component.name}"
+                )
+                result = ComponentResult(
+                    component_name=component.name,
+                    status=ComponentStatus.FAILED,
+                    error=f"Circuit '{breaker.name}' open",
+                    metadata={"circuit": "open"},
+                )
+                break
+
+            attempt += 1
+            result, executed = await self._attempt_component(
+                component, context, slots
+            )
+            if breaker is not None:
+                # Local congestion (deadline spent waiting for the rate
+                # limiter or a slot) says nothing about the service
+                if not executed:
+                    breaker.release_probe()
+                elif result.is_success():
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+
+            retryable = result.is_error() or (
+                result.is_timed_out() and policy and policy.retry_on_timeout
+            )
+            if result.is_success() or not retryable or attempt >= max_attempts:
+                break
+
+            delay = policy.delay(attempt)
+            remaining = context.remaining_time()
+            if remaining is not None and delay >= remaining:
+                break
+            logger.info(
+                f"Retrying {component.name} in {delay:.3f}s "
+                f"(attempt {attempt + 1}/{max_attempts}): {result.error}"
+            )
+            with trace_span("backoff", category="scheduling", delay_s=delay):
+                await asyncio.sleep(delay)
+
+        if attempt > 1:
+            result.metadata["attempts"] = attempt
+
+        if result.is_success():
+            logger.debug(
+                f"Component {component.name} completed in "
+                f"{result.execution_time_ms:.2f}ms"
+            )
+            if cache_key is not None:
+                result.metadata.update(cache="miss", cache_key=cache_key)
+                self.result_cache.put(
+                    cache_key, result, component.cache_ttl_s
+                )
+        else:
+            logger.warning(
+                f"Component {component.name} failed: {result.error}"
+            )
+        return result
+
+    async def _attempt_component(
+        self,
+        component: Component,
+        context: WorkflowContext,
+        slots: Optional[_ConcurrencySlots],
+    ) -> Tuple[ComponentResult, bool]:
+        """Run one attempt, converting crashes into FAILED results.
+
+        The attempt is bounded by the component's ``timeout_s`` and by
+        the time left before the workflow deadline, whichever is
+        shorter. Rate-limited resources are acquired first, by
+        priority, so a waiting call does not hold a concurrency slot.
+
+        Returns:
+            The result, and whether ``component.execute`` was called
+            (False when the deadline ran out before admission)
+        """
+        limiter = self.rate_limiter.limiter_for(
+            component.resource, component.component_type
+        )
+        if limiter is not None:
+            try:
+                with trace_span(
+                    "rate_limit", category="scheduling", resource=limiter.name
+                ):
+                    await asyncio.wait_for(
+                        limiter.acquire(context.priority),
+                        context.remaining_time(),
+                    )
+            except asyncio.TimeoutError:
+                return self._timed_out_result(
+                    component,
+                    f"Workflow deadline exceeded waiting for '{limiter.name}'",
+                    0.0,
+                ), False
+
+        if slots is not None:
+            try:
+                with trace_span("queue", category="scheduling"):
+                    await asyncio.wait_for(
+                        slots.acquire(), context.remaining_time()
+                    )
+            except asyncio.TimeoutError:
+                return self._timed_out_result(
+                    component, "Workflow deadline exceeded while queued", 0.0
+                ), False
+
+        try:
+            timeout = component.timeout_s
+            remaining = context.remaining_time()
+            if remaining is not None:
+                timeout = (
+                    remaining if timeout is None else min(timeout, remaining)
+                )
+
+            logger.debug(f"Executing component: {component.name}")
+            try:
+                result = await asyncio.wait_for(
+                    component.execute(context), timeout
+                )
+            except asyncio.TimeoutError:
+                result = self._timed_out_result(
+                    component, f"Timed out after {timeout:.3f}s", timeout
+                )
+            except Exception as e:
+                logger.error(
+                    f"Component {component.name} crashed: {str(e)}"
+                )
+                result = ComponentResult(
+                    component_name=component.name,
+                    status=ComponentStatus.FAILED,
+                    error=str(e),
+                )
+            return result, True
+        finally:
+            if slots is not None:
+                slots.release()
+
+    def is_successful(self, context: WorkflowContext) -> bool:
+        """Check that every non-optional component succeeded.
+
+        Components skipped by a run condition (see Component.run_if)
+        count as successful: skipping them was a decision, not an error.
+
+        Args:
+            context: Context returned by execute()
+
+        Returns:
+            True if all required components succeeded
+        """
+        return all(
+            result.is_success() or result.is_condition_skipped()
+            for name, result in context.intermediate_results.items()
+            if name not in self.components
+            or not self.components[name].optional
+        )
+
+    def create_context(
+        self,
+        user_input: Dict[str, Any],
+        workflow_id: str = "",
+        deadline_s: Optional[float] = None,
+        priority: int = Priority.INTERACTIVE,
+    ) -> WorkflowContext:
+        """Create the context of a new execution.
+
+        Args:
+            user_input: Input data for the workflow
+            workflow_id: Unique identifier for this execution
+                (generated if empty)
+            deadline_s: Time budget in seconds (defaults to the
+                workflow's ``deadline_s``)
+            priority: Priority of rate-limited calls (lower first)
+
+        Returns:
+            Fresh WorkflowContext, deadline started
+        """
+        if not workflow_id:
+            import uuid
+
+            workflow_id = str(uuid.uuid4())
+
+        if deadline_s is None:
+            deadline_s = self.deadline_s
+        return WorkflowContext(
+            workflow_id=workflow_id,
+            user_input=user_input,
+            deadline=(
+                time.monotonic() + deadline_s
+                if deadline_s is not None
+                else None
+            ),
+            priority=priority,
+        )
+
     async def execute(
-        self, user_input: Dict[str, Any], workflow_id: str = ""
+        self,
+        user_input: Dict[str, Any],
+        workflow_id: str = "",
+        deadline_s: Optional[float] = None,
+        priority: int = Priority.INTERACTIVE,
     ) -> WorkflowContext:
         """Execute workflow with given input.
 
+        Every component is launched as an asyncio task as soon as all
+        of its dependencies have completed, so wall-clock time follows
+        the critical path of the graph rather than the sum of all
+        components.
+
+        When the deadline passes, in-flight components are cancelled
+        and recorded as TIMED_OUT; components that never started are
+        recorded as SKIPPED.
+
         Args:
             user_input: Input data for the workflow
             workflow_id: Unique identifier for this execution
+            deadline_s: Time budget in seconds (defaults to the
+                workflow's ``deadline_s``)
+            priority: Priority of rate-limited calls (lower first)
 
         Returns:
             WorkflowContext with all component results
@@ -238,87 +1285,225 @@ class Workflow:
         Raises:
             ValueError: If dependency resolution fails
         """
-        if not workflow_id:
-            import uuid
+        context = self.create_context(
+            user_input, workflow_id, deadline_s, priority
+        )
+        async for _ in self.stream(context):
+            pass
+        return context
 
-            workflow_id = str(uuid.uuid4())
+    async def rerun(
+        self,
+        previous_context: WorkflowContext,
+        new_input: Dict[str, Any],
+        workflow_id: str = "",
+        deadline_s: Optional[float] = None,
+        priority: int = Priority.INTERACTIVE,
+    ) -> WorkflowContext:
+        """Re-execute only what a change of input invalidates.
+
+        A component is re-executed if it reads a changed ``user_input``
+        key (see ``Component.input_fields``), if one of its dependencies
+        is re-executed, or if it did not succeed previously. Every other
+        result is reused from ``previous_context`` and marked with
+        ``metadata["reused"] = True``.
+
+        Args:
+            previous_context: Context of an earlier execution
+            new_input: New input data
+            workflow_id: Unique identifier for this execution
+            deadline_s: Time budget in seconds
+            priority: Priority of rate-limited calls (lower first)
 
-        context = WorkflowContext(
-            workflow_id=workflow_id, user_input=user_input
+        Returns:
+            WorkflowContext with reused and recomputed results
+
+        Raises:
+            ValueError: If dependency resolution fails
+        """
+        plan = self.compile()
+        old_input = previous_context.user_input
+        changed = {
+            key
+            for key in set(old_input) | set(new_input)
+            if old_input.get(key, _MISSING) != new_input.get(key, _MISSING)
+        }
+
+        context = self.create_context(
+            new_input, workflow_id, deadline_s, priority
+        )
+        dirty: Set[str] = set()
+        for name in plan.order:
+            previous = previous_context.get_result(name)
+            if (
+                previous is None
+                or not previous.is_success()
+                or self.components[name].reads_any(changed)
+                or any(dep in dirty for dep in plan.dependencies[name])
+            ):
+                dirty.add(name)
+            else:
+                metadata = {**previous.metadata, "reused": True}
+                context.add_result(replace(previous, metadata=metadata))
+
+        logger.info(
+            f"Rerunning workflow '{self.name}': {len(dirty)} of "
+            f"{len(plan.order)} components (changed inputs: {sorted(changed)})"
         )
+        async for _ in self.stream(context):
+            pass
+        return context
+
+    async def execute_stream(
+        self,
+        user_input: Dict[str, Any],
+        workflow_id: str = "",
+        deadline_s: Optional[float] = None,
+        priority: int = Priority.INTERACTIVE,
+    ) -> AsyncIterator[ComponentResult]:
+        """Execute workflow, yielding each result as soon as it is known.
+
+        Same scheduling as execute(); use create_context() and stream()
+        instead when the WorkflowContext is needed as well.
+
+        Args:
+            user_input: Input data for the workflow
+            workflow_id: Unique identifier for this execution
+            deadline_s: Time budget in seconds
+            priority: Priority of rate-limited calls (lower first)
+
+        Yields:
+            ComponentResult of every component (SKIPPED included),
+            in completion order
+        """
+        context = self.create_context(
+            user_input, workflow_id, deadline_s, priority
+        )
+        results = self.stream(context)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+    async def stream(
+        self, context: WorkflowContext
+    ) -> AsyncIterator[ComponentResult]:
+        """Run the components of the DAG, yielding results as they complete.
+
+        Results are also stored in ``context``; results already present
+        (see rerun()) are reused instead of executing their component.
+        Closing the generator early cancels the components still running.
+
+        Args:
+            context: Context from create_context()
+
+        Yields:
+            ComponentResult of every component, in completion order
 
-        # Resolve execution order
+        Raises:
+            ValueError: If dependency resolution fails
+        """
         try:
-            self.resolve_dependencies()
+            plan = self.compile()
         except ValueError as e:
             logger.error(f"Dependency resolution failed: {e}")
             raise
 
         logger.info(
             f"Executing workflow '{self.name}' "
-            f"with {len(self.execution_order)} components"
+            f"with {len(plan.order)} components"
         )
 
-        # Execute components in order
-        for component_name in self.execution_order:
-            component = self.components[component_name]
-
-            if not component.enabled:
-                logger.debug(f"Skipping disabled component: {component_name}")
-                result = ComponentResult(
-                    component_name=component_name,
-                    status=ComponentStatus.SKIPPED,
-                )
-                context.add_result(result)
-                continue
-
-            # Check dependencies success
-            deps_failed = [
-                dep
-                for dep in component.dependencies
-                if not context.get_result(dep).is_success()
-            ]
-            if deps_failed:
-                logger.warning(
-                    f"Skipping {component_name} due to failed dependencies: "
-                    f"{deps_failed}"
-                )
-                result = ComponentResult(
-                    component_name=component_name,
-                    status=ComponentStatus.SKIPPED,
-                    error="Dependency failed",
-                )
-                context.add_result(result)
-                continue
-
-            # Execute component
-            logger.debug(f"Executing component: {component_name}")
-            try:
-                result = await component.execute(context)
-                context.add_result(result)
+        root = self.tracer.start_trace(
+            f"workflow:{self.name}", workflow_id=context.workflow_id
+        )
+        if root is not None:
+            context.metadata["trace_id"] = root.trace.trace_id
+        # Tasks inherit the root span without touching the caller's context
+        task_context = span_context(root)
+
+        slots = self._get_slots()
+        dependents = plan.dependents
+        waiting = {
+            name: len(deps) for name, deps in plan.dependencies.items()
+        }
+        ready = deque(plan.roots)
+        running: Dict[asyncio.Task, str] = {}
+        finished: Deque[ComponentResult] = deque()
+        reused = dict(context.intermediate_results)
+
+        def complete(result: ComponentResult) -> None:
+            context.add_result(result)
+            finished.append(result)
+            for dependent in dependents[result.component_name]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
 
-                if result.is_success():
-                    logger.debug(
-                        f"Component {component_name} completed in "
-                        f"{result.execution_time_ms:.2f}ms"
-                    )
-                else:
-                    logger.warning(
-                        f"Component {component_name} failed: {result.error}"
+        try:
+            while ready or running or finished:
+                while ready:
+                    component = self.components[ready.popleft()]
+                    if component.name in reused:
+                        complete(reused[component.name])
+                        continue
+                    skipped = self._skip_result(component, context)
+                    if skipped:
+                        if root is not None:
+                            task_context.run(self._trace_skip, skipped)
+                        complete(skipped)
+                        continue
+                    task = task_context.run(
+                        asyncio.create_task,
+                        self._run_component(
+                            component, context, slots, time.perf_counter()
+                        ),
                     )
-
-            except Exception as e:
-                logger.error(
-                    f"Component {component_name} crashed: {str(e)}"
+                    running[task] = component.name
+
+                while finished:
+                    yield finished.popleft()
+
+                if not running:
+                    continue
+
+                # Components enforce the deadline themselves; the grace
+                # period only catches ones that ignore cancellation.
+                remaining = context.remaining_time()
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=(
+                        remaining + self.CANCEL_GRACE_S
+                        if remaining is not None
+                        else None
+                    ),
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
-                result = ComponentResult(
-                    component_name=component_name,
-                    status=ComponentStatus.FAILED,
-                    error=str(e),
-                )
-                context.add_result(result)
-
-        return context
+                for task in done:
+                    running.pop(task)
+                    complete(task.result())
+
+                if not done and context.is_expired():
+                    for task, name in list(running.items()):
+                        task.cancel()
+                        complete(
+                            self._timed_out_result(
+                                self.components[name],
+                                "Cancelled at workflow deadline",
+                                None,
+                            )
+                        )
+                    running.clear()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                # Let cancelled components run their cleanup
+                await asyncio.wait(running, timeout=self.CANCEL_GRACE_S)
+            if root is not None:
+                root.set(success=self.is_successful(context))
+            self.tracer.finish_trace(root)
 
     def __repr__(self) -> str:
         return (
@@ -334,16 +1519,33 @@ class CompoundSystem:
     end-to-end pipeline execution.
     """
 
-    def __init__(self, name: str = "CompoundSystem"):
+    def __init__(
+        self,
+        name: str = "CompoundSystem",
+        history_size: int = 1000,
+        metrics_window_s: float = 300.0,
+        run_log: Optional[RunLog] = None,
+    ):
         """Initialize compound system.
 
         Args:
             name: Name of the system
+            history_size: Number of recent executions kept in
+                execution_history (older ones are dropped)
+            metrics_window_s: Window of the rolling latency, success
+                rate and throughput statistics
+            run_log: Persistent log receiving one record per workflow
+                execution (written in the background)
         """
         self.name = name
         self.workflows: Dict[str, Workflow] = {}
         self.global_components: Dict[str, Component] = {}
-        self.execution_history: List[Dict[str, Any]] = []
+        self.execution_history: Deque[Dict[str, Any]] = deque(
+            maxlen=history_size
+        )
+        self.metrics = MetricsRegistry(window_s=metrics_window_s)
+        self.run_log = run_log
+        self._in_flight: Dict[str, asyncio.Task] = {}
 
     def register_component(self, component: Component) -> "CompoundSystem":
         """Register a global component.
@@ -387,13 +1589,27 @@ class CompoundSystem:
         workflow_name: str,
         user_input: Dict[str, Any],
         workflow_id: str = "",
+        deadline_s: Optional[float] = None,
+        priority: int = Priority.INTERACTIVE,
     ) -> WorkflowContext:
         """Execute a registered workflow.
 
+        For workflows created with ``coalesce=True``, a request whose
+        normalized input matches an execution already in flight waits
+        for that execution; the ``coalesced.<workflow>`` counter tracks
+        how often this happens. The joining request receives its own
+        shallow copy of the context (its own workflow_id, user_input
+        and metadata, with ``metadata["coalesced_into"]`` naming the
+        execution it joined); component results are shared.
+
         Args:
             workflow_name: Name of workflow to execute
             user_input: Input data
             workflow_id: Unique execution ID
+            deadline_s: Time budget in seconds (defaults to the
+                workflow's own deadline)
+            priority: Priority of rate-limited calls (a coalesced
+                request keeps the priority of the execution it joins)
 
         Returns:
             WorkflowContext with results
@@ -405,8 +1621,72 @@ class CompoundSystem:
         if not workflow:
             raise ValueError(f"Workflow '{workflow_name}' not found")
 
+        key = None
+        if workflow.coalesce:
+            # Single flight: identical concurrent requests share one run
+            try:
+                key = stable_hash(
+                    {
+                        "workflow": workflow_name,
+                        "input": normalize_input(user_input),
+                        "deadline_s": deadline_s,
+                    }
+                )
+            except TypeError as e:
+                logger.warning(f"Not coalescing {workflow_name}: {str(e)}")
+        if key is None:
+            return await self._run_workflow(
+                workflow, user_input, workflow_id, deadline_s, priority
+            )
+
+        task = self._in_flight.get(key)
+        joined = task is not None
+        if task is None:
+            task = asyncio.ensure_future(
+                self._run_workflow(
+                    workflow, user_input, workflow_id, deadline_s, priority
+                )
+            )
+            self._in_flight[key] = task
+            task.add_done_callback(
+                lambda _: self._in_flight.pop(key, None)
+            )
+        else:
+            logger.debug(f"Coalescing request into in-flight {workflow_name}")
+            self.metrics.increment(f"coalesced.{workflow_name}")
+
+        # Shielded so that one caller giving up does not cancel the others
+        context = await asyncio.shield(task)
+        if not joined:
+            return context
+        return replace(
+            context,
+            workflow_id=workflow_id or context.workflow_id,
+            user_input=user_input,
+            intermediate_results=dict(context.intermediate_results),
+            metadata={
+                **context.metadata,
+                "coalesced_into": context.workflow_id,
+            },
+        )
+
+    async def _run_workflow(
+        self,
+        workflow: Workflow,
+        user_input: Dict[str, Any],
+        workflow_id: str,
+        deadline_s: Optional[float],
+        priority: int,
+    ) -> WorkflowContext:
+        """Execute a workflow and record its history and metrics."""
+        workflow_name = workflow.name
         logger.info(f"Executing workflow: {workflow_name}")
-        context = await workflow.execute(user_input, workflow_id)
+        start = time.perf_counter()
+        context = await workflow.execute(
+            user_input, workflow_id, deadline_s, priority
+        )
+        latency_ms = (time.perf_counter() - start) * 1000
+        success = workflow.is_successful(context)
 
         # Record execution
         self.execution_history.append(
@@ -414,35 +1694,158 @@ class CompoundSystem:
                 "workflow_name": workflow_name,
                 "workflow_id": context.workflow_id,
                 "components": len(context.intermediate_results),
-                "success": all(
-                    r.is_success()
-                    for r in context.intermediate_results.values()
-                ),
+                "success": success,
+                "latency_ms": latency_ms,
             }
         )
+        self.metrics.record_workflow(workflow_name, latency_ms, success)
+        timings = context.metadata.get("timings_ms", {})
+        for name, result in context.intermediate_results.items():
+            if name in timings:
+                self.metrics.record_component(
+                    f"{workflow_name}.{name}",
+                    timings[name],
+                    result.is_success(),
+                )
+        if self.run_log is not None:
+            self.run_log.log(
+                build_run_record(workflow_name, context, latency_ms, success)
+            )
 
         return context
 
+    async def execute_many(
+        self,
+        workflow_name: str,
+        inputs: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        max_concurrency: int = 8,
+        deadline_s: Optional[float] = None,
+        priority: int = Priority.BATCH,
+    ) -> AsyncIterator[WorkflowContext]:
+        """Execute a workflow over many inputs, yielding as they complete.
+
+        Inputs are consumed lazily through a bounded queue: at most
+        ``max_concurrency`` workflows run at once and only a few more
+        inputs and results are buffered, so memory stays bounded even
+        for very large (or infinite) input streams. A slow consumer
+        pauses the workers, which in turn pauses input consumption.
+
+        Each context carries its input position in
+        ``metadata["batch_index"]``; results are yielded in completion
+        order, not input order.
+
+        Args:
+            workflow_name: Name of workflow to execute
+            inputs: Iterable or async iterable of user inputs
+            max_concurrency: Number of workflows run concurrently
+            deadline_s: Per-execution time budget in seconds
+            priority: Priority of rate-limited calls (batch by
+                default, so interactive requests go first)
+
+        Yields:
+            WorkflowContext of each execution
+
+        Raises:
+            ValueError: If workflow not found or max_concurrency < 1
+        """
+        if not self.get_workflow(workflow_name):
+            raise ValueError(f"Workflow '{workflow_name}' not found")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        done = object()
+        pending: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency)
+        completed: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency)
+
+        async def produce() -> None:
+            index = 0
+            if isinstance(inputs, AsyncIterable):
+                async for user_input in inputs:
+                    await pending.put((index, user_input))
+                    index += 1
+            else:
+                for user_input in inputs:
+                    await pending.put((index, user_input))
+                    index += 1
+            for _ in range(max_concurrency):
+                await pending.put(done)
+
+        async def work() -> None:
+            while True:
+                item = await pending.get()
+                if item is done:
+                    await completed.put(done)
+                    return
+                index, user_input = item
+                context = await self.execute_workflow(
+                    workflow_name,
+                    user_input,
+                    workflow_id=f"{workflow_name}-{index}",
+                    deadline_s=deadline_s,
+                    priority=priority,
+                )
+                context.metadata["batch_index"] = index
+                await completed.put(context)
+
+        async def guard(coro) -> None:
+            # Forward crashes to the consumer instead of hanging it
+            try:
+                await coro
+            except Exception as e:
+                await completed.put(e)
+
+        tasks = [asyncio.create_task(guard(produce()))] + [
+            asyncio.create_task(guard(work()))
+            for _ in range(max_concurrency)
+        ]
+        workers_left = max_concurrency
+        try:
+            while workers_left:
+                item = await completed.get()
+                if item is done:
+                    workers_left -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     def get_system_status(self) -> Dict[str, Any]:
         """Get current system status.
 
+        Reads only the streaming metrics, never the execution history,
+        so the cost does not depend on how many executions were run.
+
         Returns:
-            Dictionary with system statistics
+            Dictionary with system statistics, including rolling
+            latency percentiles, success rate and throughput per
+            workflow and per component ("workflow.component")
         """
+        metrics = self.metrics.snapshot()
+        rate_limits: Dict[str, Any] = {}
+        limiters = {
+            id(w.rate_limiter): w.rate_limiter for w in self.workflows.values()
+        }
+        for limiter in limiters.values():
+            rate_limits.update(limiter.get_status())
+        executions = sum(s["total"] for s in metrics["workflows"].values())
+        successes = sum(
+            s["total_successes"] for s in metrics["workflows"].values()
+        )
         return {
             "name": self.name,
             "workflows": len(self.workflows),
             "global_components": len(self.global_components),
-            "executions": len(self.execution_history),
-            "success_rate": (
-                sum(
-                    1
-                    for e in self.execution_history
-                    if e.get("success")
-                )
-                / len(self.execution_history)
-                if self.execution_history
-                else 0
+            "executions": executions,
+            "success_rate": successes / executions if executions else 0,
+            "metrics": metrics,
+            "circuit_breakers": circuit_breakers_status(),
+            "rate_limits": rate_limits,
+            "run_log": (
+                self.run_log.get_status() if self.run_log is not None else None
             ),
         }
 
@@ -0,0 +1,253 @@
+"""Streaming latency and success metrics for the compound system.
+
+Latencies go into fixed log-spaced histogram buckets, so recording a
+sample and reading p50/p95/p99 cost a constant amount of work and
+memory regardless of how many executions were observed. Rolling
+windows are a ring of such histograms, one per time slice; expired
+slices are reset in place, so a long-lived process never grows.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (relative error ~ growth / 2)."""
+
+    def __init__(
+        self,
+        min_ms: float = 0.1,
+        max_ms: float = 600_000.0,
+        growth: float = 1.1,
+    ):
+        """Initialize histogram.
+
+        Args:
+            min_ms: Upper bound of the first bucket
+            max_ms: Lower bound of the overflow bucket
+            growth: Ratio between consecutive bucket bounds
+        """
+        self.min_ms = min_ms
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.nb_buckets = (
+            int(math.ceil(math.log(max_ms / min_ms) / self._log_growth)) + 2
+        )
+        self.counts = [0] * self.nb_buckets
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def _bucket(self, value_ms: float) -> int:
+        if value_ms <= self.min_ms:
+            return 0
+        index = int(math.log(value_ms / self.min_ms) / self._log_growth) + 1
+        return min(index, self.nb_buckets - 1)
+
+    def _upper_bound(self, index: int) -> float:
+        return self.min_ms * self.growth ** index
+
+    def record(self, value_ms: float) -> None:
+        """Add one latency sample (milliseconds)."""
+        self.counts[self._bucket(value_ms)] += 1
+        self.total += 1
+        self.sum_ms += value_ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the samples of a histogram with identical buckets."""
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+
+    def reset(self) -> None:
+        for index in range(self.nb_buckets):
+            self.counts[index] = 0
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate q-th percentile (0-100), None if empty."""
+        if self.total == 0:
+            return None
+        rank = max(1, math.ceil(self.total * q / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._upper_bound(index)
+        return self._upper_bound(self.nb_buckets - 1)
+
+    @property
+    def mean_ms(self) -> Optional[float]:
+        return self.sum_ms / self.total if self.total else None
+
+
+class _Slice:
+    """Samples of one time slice of a rolling window."""
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.start = 0
+        self.histogram = histogram
+        self.successes = 0
+        self.failures = 0
+
+    def reset(self, start: int) -> None:
+        self.start = start
+        self.histogram.reset()
+        self.successes = 0
+        self.failures = 0
+
+
+class RollingStats:
+    """Latency percentiles, success rate and throughput over a window.
+
+    The window is a ring of ``slices`` histograms; each covers
+    ``window_s / slices`` seconds and is recycled when it expires.
+    Lifetime totals are kept alongside.
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(
+        self,
+        window_s: float = 300.0,
+        slices: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize rolling statistics.
+
+        Args:
+            window_s: Length of the rolling window in seconds
+            slices: Number of time slices in the ring
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.window_s = window_s
+        self.slice_s = window_s / slices
+        self.clock = clock
+        self._ring = [_Slice(LatencyHistogram()) for _ in range(slices)]
+        self.total = 0
+        self.total_successes = 0
+        self._lock = threading.Lock()
+
+    def _current(self) -> _Slice:
+        tick = int(self.clock() / self.slice_s)
+        current = self._ring[tick % len(self._ring)]
+        if current.start != tick:
+            current.reset(tick)
+        return current
+
+    def record(self, latency_ms: float, success: bool) -> None:
+        """Add one execution."""
+        with self._lock:
+            current = self._current()
+            current.histogram.record(latency_ms)
+            if success:
+                current.successes += 1
+                self.total_successes += 1
+            else:
+                current.failures += 1
+            self.total += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregate the live slices of the window.
+
+        Returns:
+            Dictionary with count, success_rate, throughput_per_s,
+            mean/p50/p95/p99 latency (ms) over the window and lifetime
+            totals
+        """
+        with self._lock:
+            tick = int(self.clock() / self.slice_s)
+            oldest = tick - len(self._ring) + 1
+            merged = LatencyHistogram()
+            successes = failures = 0
+            for current in self._ring:
+                if oldest <= current.start <= tick:
+                    merged.merge(current.histogram)
+                    successes += current.successes
+                    failures += current.failures
+            total, total_successes = self.total, self.total_successes
+
+        count = successes + failures
+        snapshot = {
+            "count": count,
+            "success_rate": successes / count if count else None,
+            "throughput_per_s": count / self.window_s,
+            "mean_ms": merged.mean_ms,
+            "total": total,
+            "total_successes": total_successes,
+            "total_success_rate": (
+                total_successes / total if total else None
+            ),
+        }
+        for q in self.PERCENTILES:
+            snapshot[f"p{q}_ms"] = merged.percentile(q)
+        return snapshot
+
+
+class MetricsRegistry:
+    """Rolling statistics per workflow and per component."""
+
+    def __init__(self, window_s: float = 300.0, slices: int = 10):
+        """Initialize registry.
+
+        Args:
+            window_s: Rolling window length in seconds
+            slices: Number of time slices per window
+        """
+        self.window_s = window_s
+        self.slices = slices
+        self.workflows: Dict[str, RollingStats] = {}
+        self.components: Dict[str, RollingStats] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, table: Dict[str, RollingStats], key: str) -> RollingStats:
+        stats = table.get(key)
+        if stats is None:
+            with self._lock:
+                stats = table.setdefault(
+                    key, RollingStats(self.window_s, self.slices)
+                )
+        return stats
+
+    def record_workflow(
+        self, name: str, latency_ms: float, success: bool
+    ) -> None:
+        """Record one workflow execution."""
+        self._stats(self.workflows, name).record(latency_ms, success)
+
+    def record_component(
+        self, name: str, latency_ms: float, success: bool
+    ) -> None:
+        """Record one component execution (keyed workflow.component)."""
+        self._stats(self.components, name).record(latency_ms, success)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        """Increment a named counter."""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def snapshot(
+        self, sections: Sequence[str] = ("workflows", "components")
+    ) -> Dict[str, Any]:
+        """Snapshot of all statistics.
+
+        Args:
+            sections: Which tables to include
+
+        Returns:
+            Dictionary {section: {name: RollingStats.snapshot()}} plus
+            the counters
+        """
+        result: Dict[str, Any] = {}
+        for section in sections:
+            table = getattr(self, section)
+            result[section] = {
+                name: stats.snapshot() for name, stats in list(table.items())
+            }
+        with self._lock:
+            result["counters"] = dict(self.counters)
+        return result
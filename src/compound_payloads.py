@@ -0,0 +1,185 @@
+"""Columnar payloads passed between compound engineering components.
+
+A ColumnarPayload holds one NumPy array per column. Arrays are exposed
+as read-only views, so a payload can be handed by reference from one
+component to the next (and kept in the result cache) without copying
+and without any risk of a consumer mutating what another one reads.
+Large comparable sets therefore flow through a workflow without being
+materialized as one dict per row.
+
+pandas DataFrames convert directly; Arrow tables are supported when
+pyarrow is installed.
+"""
+
+import hashlib
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _read_only(values: Any) -> np.ndarray:
+    """Return a read-only view of ``values`` (no copy for ndarrays)."""
+    array = np.asarray(values)
+    if array.ndim != 1:
+        raise ValueError("columns must be one-dimensional")
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class ColumnarPayload:
+    """Immutable table of equally sized, read-only NumPy columns."""
+
+    __slots__ = ("_columns", "_length", "_fingerprint")
+
+    def __init__(self, columns: Mapping[str, Any]):
+        """Initialize payload.
+
+        Args:
+            columns: Column name to 1-D array-like; ndarrays are wrapped
+                without copying
+
+        Raises:
+            ValueError: If columns have different lengths
+        """
+        frozen = {str(name): _read_only(v) for name, v in columns.items()}
+        lengths = {len(array) for array in frozen.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {lengths}")
+        self._columns = frozen
+        self._length = lengths.pop() if lengths else 0
+        self._fingerprint: Optional[str] = None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "ColumnarPayload":
+        """Wrap the columns of a DataFrame (zero-copy when possible)."""
+        return cls({name: frame[name].to_numpy() for name in frame.columns})
+
+    @classmethod
+    def from_arrow(cls, table: Any) -> "ColumnarPayload":
+        """Wrap the columns of a pyarrow Table.
+
+        Numeric columns without nulls are zero-copy; others are
+        converted once.
+        """
+        return cls(
+            {
+                name: table.column(name).to_numpy()
+                for name in table.column_names
+            }
+        )
+
+    @classmethod
+    def from_records(
+        cls, records: Sequence[Mapping[str, Any]]
+    ) -> "ColumnarPayload":
+        """Build a payload from row dictionaries."""
+        return cls.from_frame(pd.DataFrame.from_records(list(records)))
+
+    @classmethod
+    def coerce(cls, data: Any) -> "ColumnarPayload":
+        """Convert a payload, DataFrame, Arrow table or records.
+
+        Args:
+            data: Tabular data in any supported form
+
+        Returns:
+            ColumnarPayload (``data`` itself if it already is one)
+        """
+        if isinstance(data, cls):
+            return data
+        if isinstance(data, pd.DataFrame):
+            return cls.from_frame(data)
+        if hasattr(data, "column_names") and hasattr(data, "column"):
+            return cls.from_arrow(data)
+        return cls.from_records(data)
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def get(
+        self, name: str, default: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """Return a column, or ``default`` if absent."""
+        return self._columns.get(name, default)
+
+    def with_columns(self, **columns: Any) -> "ColumnarPayload":
+        """New payload sharing existing columns, plus added/replaced ones."""
+        return ColumnarPayload({**self._columns, **columns})
+
+    def take(self, indices: Any) -> "ColumnarPayload":
+        """New payload with the rows at ``indices`` (e.g. an argsort)."""
+        indices = np.asarray(indices)
+        return ColumnarPayload(
+            {name: array[indices] for name, array in self._columns.items()}
+        )
+
+    def head(self, n: int) -> "ColumnarPayload":
+        """First ``n`` rows (views, no copy)."""
+        return ColumnarPayload(
+            {name: array[:n] for name, array in self._columns.items()}
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Convert to a DataFrame (copies, so the frame is writable)."""
+        return pd.DataFrame(
+            {name: array.copy() for name, array in self._columns.items()}
+        )
+
+    def to_arrow(self) -> Any:
+        """Convert to a pyarrow Table (requires pyarrow)."""
+        import pyarrow as pa
+
+        return pa.table(dict(self._columns))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialize rows as dictionaries of Python scalars.
+
+        Meant for presentation of a few rows (see ``head``), not for
+        passing data between components.
+        """
+        names = list(self._columns)
+        columns = [self._columns[name].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def fingerprint(self) -> str:
+        """Content hash, computed once (used by cache keys)."""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for name, array in self._columns.items():
+                digest.update(f"{name}:{array.dtype.str}:".encode("utf-8"))
+                if array.dtype.hasobject:
+                    digest.update(repr(array.tolist()).encode("utf-8"))
+                else:
+                    digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ColumnarPayload):
+            return NotImplemented
+        return self.fingerprint() == other.fingerprint()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return (
+            f"ColumnarPayload(rows={self._length}, "
+            f"columns={self.column_names})"
+        )
+
+    def __reduce__(self) -> Any:
+        # Rebuild through __init__ so unpickled arrays (e.g. in a worker
+        # process) are read-only again.
+        return (ColumnarPayload, (dict(self._columns),))
@@ -0,0 +1,617 @@
+"""Durable job queue and worker processes for the compound system.
+
+Producers enqueue ``(workflow_name, user_input)`` jobs into a local
+SQLite database; worker processes claim them, execute them on their
+own warm CompoundSystem (components, executors and connection pools
+built once per process) and write results back. Producers poll the
+job status. The queue needs no external service, scales a box to
+several processes, and the same table can later be served to workers
+on other nodes.
+
+Claimed jobs hold a lease, renewed by their worker while they run: a
+job whose worker died is requeued once its lease expires, up to
+``max_attempts`` claims. Only the worker holding the lease can store
+the outcome of a job.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from src.compound_engineering import CompoundSystem, shutdown_executors
+from src.compound_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    workflow_name TEXT NOT NULL,
+    user_input TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_expires_at REAL,
+    worker_id TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim
+    ON jobs (status, priority, enqueued_at);
+"""
+
+
+class JobStatus(Enum):
+    """Lifecycle of a queued job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    @property
+    def is_final(self) -> bool:
+        return self in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+@dataclass
+class Job:
+    """One queued workflow execution."""
+
+    job_id: str
+    workflow_name: str
+    user_input: Dict[str, Any]
+    priority: int
+    status: JobStatus
+    attempts: int
+    enqueued_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    worker_id: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+_COLUMNS = (
+    "job_id, workflow_name, user_input, priority, status, attempts, "
+    "enqueued_at, started_at, finished_at, worker_id, result, error"
+)
+
+
+def _json_default(value: Any) -> Any:
+    # Columnar payloads and NumPy scalars found in component data
+    if hasattr(value, "to_records"):
+        return value.to_records()
+    if hasattr(value, "item"):
+        return value.item()
+    return repr(value)
+
+
+def _row_to_job(row: tuple) -> Job:
+    return Job(
+        job_id=row[0],
+        workflow_name=row[1],
+        user_input=json.loads(row[2]),
+        priority=row[3],
+        status=JobStatus(row[4]),
+        attempts=row[5],
+        enqueued_at=row[6],
+        started_at=row[7],
+        finished_at=row[8],
+        worker_id=row[9],
+        result=json.loads(row[10]) if row[10] is not None else None,
+        error=row[11],
+    )
+
+
+class JobQueue:
+    """SQLite-backed durable job queue, safe across threads and processes."""
+
+    def __init__(
+        self,
+        path: str,
+        lease_s: float = 300.0,
+        max_attempts: int = 3,
+    ):
+        """Open (or create) the queue.
+
+        Args:
+            path: SQLite database file
+            lease_s: Time a claimed job stays leased without renewal
+                before being requeued
+            max_attempts: Claims of a job before it is marked failed
+        """
+        self.path = path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit; claim() opens its own write transaction
+        self.conn = sqlite3.connect(
+            path,
+            timeout=30.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def enqueue(
+        self,
+        workflow_name: str,
+        user_input: Dict[str, Any],
+        priority: int = Priority.BATCH,
+        job_id: Optional[str] = None,
+    ) -> str:
+        """Add a job.
+
+        Args:
+            workflow_name: Workflow registered in the workers' system
+            user_input: JSON-serializable workflow input
+            priority: Lower values are claimed first
+            job_id: Job identifier (generated if None)
+
+        Returns:
+            Job identifier
+        """
+        job_id = job_id or str(uuid.uuid4())
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO jobs (job_id, workflow_name, user_input, "
+                "priority, status, enqueued_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    workflow_name,
+                    json.dumps(user_input),
+                    int(priority),
+                    JobStatus.QUEUED.value,
+                    time.time(),
+                ),
+            )
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """Atomically take the next job, by priority then age.
+
+        Expired leases are recovered first.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+
+        Returns:
+            Claimed job (RUNNING), None if the queue is empty
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._recover_expired(now)
+                row = self.conn.execute(
+                    "SELECT job_id FROM jobs WHERE status = ? "
+                    "ORDER BY priority, enqueued_at LIMIT 1",
+                    (JobStatus.QUEUED.value,),
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, "
+                    "started_at = ?, lease_expires_at = ?, worker_id = ? "
+                    "WHERE job_id = ?",
+                    (
+                        JobStatus.RUNNING.value,
+                        now,
+                        now + self.lease_s,
+                        worker_id,
+                        row[0],
+                    ),
+                )
+                job = self._get(row[0])
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return job
+
+    def _recover_expired(self, now: float) -> None:
+        # Jobs of dead workers: give up after max_attempts, else requeue
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, "
+            "error = 'Lease expired too many times' "
+            "WHERE status = ? AND lease_expires_at < ? AND attempts >= ?",
+            (
+                JobStatus.FAILED.value,
+                now,
+                JobStatus.RUNNING.value,
+                now,
+                self.max_attempts,
+            ),
+        )
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL "
+            "WHERE status = ? AND lease_expires_at < ?",
+            (JobStatus.QUEUED.value, JobStatus.RUNNING.value, now),
+        )
+
+    def renew(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease of a running job by ``lease_s``.
+
+        Args:
+            job_id: Job identifier
+            worker_id: Worker that claimed the job
+
+        Returns:
+            False if the worker no longer holds the job (lease expired
+            and job requeued or claimed again)
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? "
+                "WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (
+                    time.time() + self.lease_s,
+                    job_id,
+                    worker_id,
+                    JobStatus.RUNNING.value,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def complete(
+        self,
+        job_id: str,
+        worker_id: str,
+        result: Dict[str, Any],
+        success: bool = True,
+        error: Optional[str] = None,
+    ) -> bool:
+        """Store the outcome of a job.
+
+        Args:
+            job_id: Job identifier
+            worker_id: Worker that claimed the job
+            result: JSON-serializable result (e.g. WorkflowContext.to_dict())
+            success: Whether the workflow succeeded
+            error: Failure description
+
+        Returns:
+            False if the worker no longer holds the job: the outcome of
+            a stale attempt is dropped
+        """
+        status = JobStatus.SUCCEEDED if success else JobStatus.FAILED
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, "
+                "error = ?, lease_expires_at = NULL "
+                "WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (
+                    status.value,
+                    time.time(),
+                    json.dumps(result, default=_json_default),
+                    error,
+                    job_id,
+                    worker_id,
+                    JobStatus.RUNNING.value,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark a job failed without result (see complete)."""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ?, "
+                "lease_expires_at = NULL "
+                "WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (
+                    JobStatus.FAILED.value,
+                    time.time(),
+                    error,
+                    job_id,
+                    worker_id,
+                    JobStatus.RUNNING.value,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        row = self.conn.execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return _row_to_job(row) if row else None
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Current state of a job (status polling)."""
+        with self._lock:
+            return self._get(job_id)
+
+    def wait(
+        self,
+        job_id: str,
+        timeout_s: Optional[float] = None,
+        poll_interval_s: float = 0.1,
+    ) -> Job:
+        """Poll a job until it succeeds or fails.
+
+        Args:
+            job_id: Job identifier
+            timeout_s: Longest wait, None for no limit
+            poll_interval_s: Delay between polls
+
+        Returns:
+            Finished job
+
+        Raises:
+            KeyError: If the job does not exist
+            TimeoutError: If the job is still pending after timeout_s
+        """
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job.status.is_final:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} still {job.status.value}")
+            time.sleep(poll_interval_s)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        counts = {status.value: 0 for status in JobStatus}
+        counts.update(dict(rows))
+        return counts
+
+
+class QueueWorker:
+    """Claims jobs from a queue and runs them on a CompoundSystem."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        system: CompoundSystem,
+        worker_id: Optional[str] = None,
+        concurrency: int = 4,
+        poll_interval_s: float = 0.2,
+    ):
+        """Initialize worker.
+
+        Args:
+            queue: Job queue
+            system: System with the workflows jobs refer to
+            worker_id: Identifier stored on claimed jobs
+            concurrency: Jobs executed at once
+            poll_interval_s: Delay between claims when the queue is empty
+        """
+        self.queue = queue
+        self.system = system
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency
+        self.poll_interval_s = poll_interval_s
+        self.processed = 0
+
+    async def run(
+        self,
+        stop: Optional[Callable[[], bool]] = None,
+        max_jobs: Optional[int] = None,
+        exit_when_idle: bool = False,
+    ) -> int:
+        """Process jobs until stopped.
+
+        Args:
+            stop: Polled between claims; True stops the worker once
+                running jobs are done
+            max_jobs: Stop after claiming this many jobs
+            exit_when_idle: Stop as soon as the queue is empty
+
+        Returns:
+            Number of jobs processed
+        """
+        running: List[asyncio.Task] = []
+        claimed = 0
+        while True:
+            running = [task for task in running if not task.done()]
+            stopping = (stop is not None and stop()) or (
+                max_jobs is not None and claimed >= max_jobs
+            )
+            job = None
+            if not stopping and len(running) < self.concurrency:
+                job = await asyncio.to_thread(
+                    self.queue.claim, self.worker_id
+                )
+            if job is not None:
+                claimed += 1
+                running.append(asyncio.create_task(self._process(job)))
+                continue
+            if (stopping or exit_when_idle) and not running:
+                return self.processed
+            if running:
+                await asyncio.wait(
+                    running,
+                    timeout=self.poll_interval_s,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            elif not exit_when_idle:
+                await asyncio.sleep(self.poll_interval_s)
+
+    async def _keep_lease(self, job: Job) -> None:
+        # Renew well before expiry so long workflows are not requeued
+        while True:
+            await asyncio.sleep(self.queue.lease_s / 3)
+            renewed = await asyncio.to_thread(
+                self.queue.renew, job.job_id, self.worker_id
+            )
+            if not renewed:
+                logger.warning(
+                    f"Worker {self.worker_id} lost the lease of job "
+                    f"{job.job_id}"
+                )
+                return
+
+    async def _process(self, job: Job) -> None:
+        logger.debug(f"Worker {self.worker_id} running job {job.job_id}")
+        heartbeat = asyncio.create_task(self._keep_lease(job))
+        try:
+            try:
+                context = await self.system.execute_workflow(
+                    job.workflow_name,
+                    job.user_input,
+                    workflow_id=job.job_id,
+                    priority=job.priority,
+                )
+            finally:
+                heartbeat.cancel()
+            workflow = self.system.get_workflow(job.workflow_name)
+            success = workflow.is_successful(context)
+            errors = [
+                f"{name}: {result.error}"
+                for name, result in context.intermediate_results.items()
+                if result.error and not result.is_success()
+            ]
+            await asyncio.to_thread(
+                self.queue.complete,
+                job.job_id,
+                self.worker_id,
+                context.to_dict(),
+                success,
+                "; ".join(errors) or None,
+            )
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {str(e)}")
+            await asyncio.to_thread(
+                self.queue.fail, job.job_id, self.worker_id, str(e)
+            )
+        self.processed += 1
+
+
+def build_default_system() -> CompoundSystem:
+    """CompoundSystem with the pre-built workflows (worker default)."""
+    from src.compound_workflows import (
+        WorkflowFactory,
+        create_advanced_estimation_workflow,
+    )
+
+    system = CompoundSystem("queue_worker")
+    system.register_workflow(
+        WorkflowFactory.create_property_estimation_workflow()
+    )
+    system.register_workflow(
+        WorkflowFactory.create_comparable_finder_workflow()
+    )
+    system.register_workflow(create_advanced_estimation_workflow())
+    return system
+
+
+def _worker_main(
+    queue_path: str,
+    system_factory: Callable[[], CompoundSystem],
+    stop_event: Any,
+    concurrency: int,
+    poll_interval_s: float,
+) -> None:
+    """Entry point of a worker process."""
+    queue = JobQueue(queue_path)
+    system = system_factory()
+    worker = QueueWorker(
+        queue,
+        system,
+        concurrency=concurrency,
+        poll_interval_s=poll_interval_s,
+    )
+    try:
+        asyncio.run(worker.run(stop=stop_event.is_set))
+    finally:
+        shutdown_executors()
+        queue.close()
+
+
+class WorkerPool:
+    """Pool of worker processes serving one job queue."""
+
+    def __init__(
+        self,
+        queue_path: str,
+        processes: int = 2,
+        system_factory: Callable[[], CompoundSystem] = build_default_system,
+        concurrency: int = 4,
+        poll_interval_s: float = 0.2,
+    ):
+        """Initialize pool.
+
+        Args:
+            queue_path: SQLite database of the job queue
+            processes: Number of worker processes
+            system_factory: Picklable (module-level) function building
+                each process's CompoundSystem
+            concurrency: Jobs executed at once per process
+            poll_interval_s: Delay between claims when the queue is empty
+        """
+        self.queue_path = queue_path
+        self.processes = processes
+        self.system_factory = system_factory
+        self.concurrency = concurrency
+        self.poll_interval_s = poll_interval_s
+        # Spawned, not forked: workers must not inherit event loops,
+        # executor threads or open connections from the parent.
+        self._mp = multiprocessing.get_context("spawn")
+        self._stop = self._mp.Event()
+        self._workers: List[multiprocessing.process.BaseProcess] = []
+
+    def start(self) -> "WorkerPool":
+        """Start the worker processes."""
+        JobQueue(self.queue_path).close()  # create the schema once
+        for index in range(self.processes):
+            process = self._mp.Process(
+                target=_worker_main,
+                args=(
+                    self.queue_path,
+                    self.system_factory,
+                    self._stop,
+                    self.concurrency,
+                    self.poll_interval_s,
+                ),
+                name=f"compound-worker-{index}",
+                # Not daemonic: workers run their own process pools
+                daemon=False,
+            )
+            process.start()
+            self._workers.append(process)
+        logger.info(f"Started {self.processes} queue workers")
+        return self
+
+    def stop(self, timeout_s: float = 30.0) -> None:
+        """Let workers finish their running jobs, then stop them."""
+        self._stop.set()
+        for process in self._workers:
+            process.join(timeout_s)
+            if process.is_alive():
+                process.terminate()
+        self._workers.clear()
+
+    def __enter__(self) -> "WorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,189 @@
+"""Resilience policies for components calling external services.
+
+- RetryPolicy: exponential backoff with full jitter, applied only to
+  components declared idempotent.
+- CircuitBreaker: fails fast while a service keeps failing, then lets
+  a few probe calls through once the reset timeout has elapsed.
+
+Breakers are usually shared per external service through
+``get_circuit_breaker`` so that every workflow calling, e.g., the
+geocoding API sees the same state.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    The n-th retry (n starting at 1) waits a uniform random delay in
+    ``[0, min(max_delay_s, base_delay_s * multiplier ** (n - 1))]``,
+    which spreads retries of concurrent requests over time.
+    """
+
+    max_attempts: int = 3
+    base_delay_s: float = 0.1
+    max_delay_s: float = 2.0
+    multiplier: float = 2.0
+    retry_on_timeout: bool = False
+
+    def delay(
+        self, retry: int, rng: Callable[[float, float], float] = random.uniform
+    ) -> float:
+        """Backoff before the given retry (1 for the first retry).
+
+        Args:
+            retry: Retry number
+            rng: Uniform random generator (injectable for tests)
+
+        Returns:
+            Delay in seconds
+        """
+        backoff = self.base_delay_s * self.multiplier ** (retry - 1)
+        return rng(0.0, min(self.max_delay_s, backoff))
+
+
+class CircuitState(Enum):
+    """State of a circuit breaker."""
+
+    CLOSED = "closed"  # calls flow normally
+    OPEN = "open"  # calls fail fast
+    HALF_OPEN = "half_open"  # a few probe calls are allowed
+
+
+class CircuitBreaker:
+    """Per-service circuit breaker.
+
+    Opens after ``failure_threshold`` consecutive failures, rejects
+    calls for ``reset_timeout_s``, then allows ``half_open_max_calls``
+    probes: one success closes it again, one failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize breaker.
+
+        Args:
+            name: Protected service name
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout_s: Time spent open before probing
+            half_open_max_calls: Concurrent probe calls when half-open
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.consecutive_failures = 0
+        self.rejected_calls = 0
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> CircuitState:
+        if (
+            self._state == CircuitState.OPEN
+            and self.clock() - self._opened_at >= self.reset_timeout_s
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Check whether a call may proceed (counts half-open probes)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CircuitState.CLOSED:
+                return True
+            if (
+                state == CircuitState.HALF_OPEN
+                and self._probes < self.half_open_max_calls
+            ):
+                self._probes += 1
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe whose call never reached the service."""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        """Record a successful call (closes a half-open circuit)."""
+        with self._lock:
+            self.consecutive_failures = 0
+            self._state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        """Record a failed call (may open the circuit)."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if (
+                self._current_state() == CircuitState.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                self._state = CircuitState.OPEN
+                self._opened_at = self.clock()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get breaker state and counters."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._current_state().value,
+                "consecutive_failures": self.consecutive_failures,
+                "rejected_calls": self.rejected_calls,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **kwargs: Any) -> CircuitBreaker:
+    """Return the process-wide breaker of a service, creating it once.
+
+    Args:
+        name: Service name (e.g. "geocoding", "claude")
+        **kwargs: CircuitBreaker options, used on creation only
+
+    Returns:
+        Shared CircuitBreaker
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
+
+
+def circuit_breakers_status() -> Dict[str, Dict[str, Any]]:
+    """Status of every shared breaker."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.get_status() for b in breakers}
+
+
+# Default policy for idempotent calls to external services
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,281 @@
+"""Persistent, append-only execution log for the compound system.
+
+Every workflow run executed through a CompoundSystem with a RunLog
+becomes one JSON line: workflow id, status, total and per-component
+timings, component statuses, cache hits and a hash of the normalized
+input. Records are handed to a background writer thread through a
+bounded queue, so logging never blocks ``execute_workflow`` (when the
+queue is full, records are dropped and counted instead). The writer
+batches lines per write and rotates the file by size, like
+logging.handlers.RotatingFileHandler (``runs.jsonl``, ``runs.jsonl.1``,
+... oldest last).
+
+``slow_runs`` reads the log back for after-the-fact latency analysis.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from src.compound_cache import normalize_input, stable_hash
+
+if TYPE_CHECKING:
+    from src.compound_engineering import WorkflowContext
+
+logger = logging.getLogger(__name__)
+
+
+def build_run_record(
+    workflow_name: str,
+    context: "WorkflowContext",
+    latency_ms: float,
+    success: bool,
+) -> Dict[str, Any]:
+    """Summarize one workflow execution as a JSON-serializable record.
+
+    Args:
+        workflow_name: Executed workflow
+        context: Finished workflow context
+        latency_ms: End-to-end latency
+        success: Whether the workflow succeeded
+
+    Returns:
+        Run record
+    """
+    try:
+        input_hash: Optional[str] = stable_hash(
+            normalize_input(context.user_input)
+        )
+    except TypeError:
+        input_hash = None  # input not hashable by content
+    timings = context.metadata.get("timings_ms", {})
+    components = {}
+    cache_hits = 0
+    for name, result in context.intermediate_results.items():
+        cache = result.metadata.get("cache")
+        cache_hits += cache == "hit"
+        components[name] = {
+            "status": result.status.value,
+            "ms": timings.get(name, result.execution_time_ms),
+            "cache": cache,
+            "attempts": result.metadata.get("attempts", 1),
+        }
+        if result.error:
+            components[name]["error"] = result.error
+    return {
+        "ts": time.time(),
+        "workflow": workflow_name,
+        "workflow_id": context.workflow_id,
+        "success": success,
+        "total_ms": latency_ms,
+        "input_hash": input_hash,
+        "cache_hits": cache_hits,
+        "components": components,
+    }
+
+
+class RunLog:
+    """JSONL run log written by a background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        batch_size: int = 100,
+        flush_interval_s: float = 1.0,
+        max_queue: int = 10_000,
+    ):
+        """Initialize run log and start its writer thread.
+
+        Args:
+            path: JSONL file (parent directories are created)
+            max_bytes: Size that triggers a rotation (0 disables it)
+            backup_count: Rotated files kept
+            batch_size: Records written per batch at most
+            flush_interval_s: Longest time a record waits in the queue
+            max_queue: Records buffered before new ones are dropped
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._writer = threading.Thread(
+            target=self._run, name="compound-runlog", daemon=True
+        )
+        self._writer.start()
+
+    def log(self, record: Dict[str, Any]) -> bool:
+        """Queue a record without blocking.
+
+        Args:
+            record: JSON-serializable run record
+
+        Returns:
+            False if the record was dropped (queue full or log closed)
+        """
+        if self._closed:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout_s: Optional[float] = None) -> bool:
+        """Wait until every queued record is on disk.
+
+        Args:
+            timeout_s: Longest wait, None for no limit
+
+        Returns:
+            True if the queue was drained
+        """
+        if self._closed:
+            return not self._writer.is_alive()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout_s)
+        except queue.Full:
+            return False
+        return done.wait(timeout_s)
+
+    def close(self, timeout_s: Optional[float] = 5.0) -> None:
+        """Flush pending records and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout_s)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: List[Dict[str, Any]] = []
+            waiters: List[threading.Event] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                continue
+            # Drain what is already queued into one write
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        lines = "".join(
+            json.dumps(record, default=repr, separators=(",", ":")) + "\n"
+            for record in batch
+        )
+        try:
+            if self._should_rotate(len(lines.encode("utf-8"))):
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self.written += len(batch)
+        except OSError as e:
+            self.dropped += len(batch)
+            logger.error(f"Run log write failed: {str(e)}")
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if self.max_bytes <= 0 or not os.path.exists(self.path):
+            return False
+        return os.path.getsize(self.path) + incoming > self.max_bytes
+
+    def _rotate(self) -> None:
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def files(self) -> List[str]:
+        """Existing log files, oldest first."""
+        rotated = [
+            f"{self.path}.{index}"
+            for index in range(self.backup_count, 0, -1)
+        ]
+        return [p for p in rotated + [self.path] if os.path.exists(p)]
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Read back every logged record, oldest first."""
+        for path in self.files():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def slow_runs(
+        self,
+        min_ms: float = 0.0,
+        workflow: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Slowest logged runs, with the component that dominated each.
+
+        Args:
+            min_ms: Ignore runs faster than this
+            workflow: Only this workflow
+            since: Only runs logged after this Unix timestamp
+            limit: Number of runs returned
+
+        Returns:
+            Records sorted by decreasing total_ms, each with an added
+            ``slowest_component`` entry
+        """
+        runs = [
+            record
+            for record in self.iter_records()
+            if record["total_ms"] >= min_ms
+            and (workflow is None or record["workflow"] == workflow)
+            and (since is None or record["ts"] >= since)
+        ]
+        runs.sort(key=lambda record: record["total_ms"], reverse=True)
+        for record in runs[:limit]:
+            components = record.get("components", {})
+            record["slowest_component"] = max(
+                components,
+                key=lambda name: components[name]["ms"] or 0,
+                default=None,
+            )
+        return runs[:limit]
+
+    def get_status(self) -> Dict[str, Any]:
+        """Writer counters."""
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,241 @@
+"""Rate limiting and priority scheduling of external resources.
+
+Each rate-limited resource (an external API such as an AI provider or
+the geocoding service, or a whole ComponentType) has a token bucket and
+a priority queue of waiting calls. Calls are admitted strictly by
+priority, then arrival order, as tokens become available, so
+interactive estimates overtake queued batch work instead of both
+hitting the provider quota and failing with 429 errors.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from enum import Enum, IntEnum
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from src.compound_metrics import LatencyHistogram
+
+
+class Priority(IntEnum):
+    """Scheduling priority (lower runs first)."""
+
+    INTERACTIVE = 0  # a user is waiting on the result
+    BATCH = 10  # bulk jobs (execute_many, revaluations)
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate_per_s`` refill, ``burst`` capacity."""
+
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate_per_s <= 0 or burst < 1:
+            raise ValueError("rate_per_s must be > 0 and burst >= 1")
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self._updated = clock()
+
+    def try_acquire(self) -> float:
+        """Take one token if available.
+
+        Returns:
+            0.0 if a token was taken, otherwise the wait in seconds
+            until one is available
+        """
+        now = self.clock()
+        self.tokens = min(
+            self.burst, self.tokens + (now - self._updated) * self.rate_per_s
+        )
+        self._updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate_per_s
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "event", "cancelled")
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.event = asyncio.Event()
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ResourceLimiter:
+    """Token bucket plus priority queue for one resource."""
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_s: float,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize limiter.
+
+        Args:
+            name: Resource name
+            rate_per_s: Sustained calls per second
+            burst: Calls allowed at once after idling
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate_per_s, burst, clock)
+        self.clock = clock
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.max_queue_depth = 0
+        self.wait_ms = LatencyHistogram()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._queue if not waiter.cancelled)
+
+    def _head(self) -> Optional[_Waiter]:
+        while self._queue and self._queue[0].cancelled:
+            heapq.heappop(self._queue)
+        return self._queue[0] if self._queue else None
+
+    async def acquire(self, priority: int = Priority.INTERACTIVE) -> float:
+        """Wait for a token, behind every higher-priority caller.
+
+        Args:
+            priority: Lower values are admitted first
+
+        Returns:
+            Time waited in seconds
+        """
+        start = self.clock()
+        waiter = _Waiter(priority, next(self._seq))
+        previous_head = self._head()
+        heapq.heappush(self._queue, waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        if previous_head is not None and self._queue[0] is waiter:
+            # Overtaken: the sleeping head yields to the new waiter
+            previous_head.event.set()
+        try:
+            while True:
+                if self._head() is waiter:
+                    delay = self.bucket.try_acquire()
+                    if delay == 0:
+                        heapq.heappop(self._queue)
+                        break
+                    # Sleep until the next token, but wake up early if a
+                    # higher-priority caller takes the head of the queue.
+                    waiter.event.clear()
+                    try:
+                        await asyncio.wait_for(waiter.event.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    waiter.event.clear()
+                    await waiter.event.wait()
+        except BaseException:
+            waiter.cancelled = True
+            self._wake_head()
+            raise
+
+        self._wake_head()
+        waited = self.clock() - start
+        self.admitted += 1
+        self.wait_ms.record(waited * 1000)
+        return waited
+
+    def _wake_head(self) -> None:
+        head = self._head()
+        if head is not None:
+            head.event.set()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Queue depth, admissions and wait-time percentiles."""
+        return {
+            "rate_per_s": self.bucket.rate_per_s,
+            "burst": self.bucket.burst,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "wait_p50_ms": self.wait_ms.percentile(50),
+            "wait_p95_ms": self.wait_ms.percentile(95),
+            "wait_p99_ms": self.wait_ms.percentile(99),
+        }
+
+
+class RateLimiter:
+    """Registry of resource limiters keyed by name or ComponentType."""
+
+    def __init__(self) -> None:
+        self.limiters: Dict[str, ResourceLimiter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(resource: Union[str, Enum]) -> str:
+        return resource.value if isinstance(resource, Enum) else resource
+
+    def configure(
+        self,
+        resource: Union[str, Enum],
+        rate_per_s: float,
+        burst: float = 1.0,
+    ) -> ResourceLimiter:
+        """Set (or replace) the limit of a resource.
+
+        Args:
+            resource: External resource name or ComponentType
+            rate_per_s: Sustained calls per second
+            burst: Calls allowed at once after idling
+
+        Returns:
+            The resource limiter
+        """
+        key = self._key(resource)
+        limiter = ResourceLimiter(key, rate_per_s, burst)
+        with self._lock:
+            self.limiters[key] = limiter
+        return limiter
+
+    def remove(self, resource: Union[str, Enum]) -> None:
+        """Remove the limit of a resource."""
+        with self._lock:
+            self.limiters.pop(self._key(resource), None)
+
+    def limiter_for(
+        self, resource: Optional[str], component_type: Enum
+    ) -> Optional[ResourceLimiter]:
+        """Limiter of a component: its resource name first, then its type.
+
+        Args:
+            resource: Component's external resource name, if any
+            component_type: Component's ComponentType
+
+        Returns:
+            Matching limiter, None if unlimited
+        """
+        if not self.limiters:
+            return None
+        if resource is not None and resource in self.limiters:
+            return self.limiters[resource]
+        return self.limiters.get(self._key(component_type))
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Status of every configured resource."""
+        with self._lock:
+            limiters = list(self.limiters.items())
+        return {key: limiter.get_status() for key, limiter in limiters}
+
+
+# Process-wide limits shared by all workflows (provider quotas are global)
+default_rate_limiter = RateLimiter()
@@ -0,0 +1,218 @@
+"""Comparable sources shared by the compound components.
+
+A comparables source answers ``get_comparables(latitude, longitude,
+type_bien, surface_min, surface_max, rayon_km, annees, limit)`` with a
+DataFrame of DV3F mutations sorted by distance. Two backends are
+available:
+
+- SupabaseComparablesSource: one PostGIS query per call
+  (SupabaseDataRetriever.get_comparables_bulk: radius filtered in SQL,
+  no reverse geocoding) through the retriever's SQLAlchemy engine (one
+  connection pool per process). Database errors propagate, so the
+  caller's retry policy and circuit breaker apply.
+- SnapshotComparablesSource: an in-memory snapshot of the zone's
+  mutations (SupabaseDataRetriever.get_mutations_zone, or a CSV/Parquet
+  export of it), filtered with NumPy; no database round trip.
+
+Components obtain the process-wide source with ``get_comparables_source``
+so that every workflow shares one connection pool or dataset handle.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.estimation_algorithm import SimilarityScorer
+
+logger = logging.getLogger(__name__)
+
+# Path of a mutations snapshot (CSV or Parquet); if unset, the shared
+# source queries Supabase.
+SNAPSHOT_ENV_VAR = "COMPOUND_MUTATIONS_SNAPSHOT"
+
+
+class SnapshotComparablesSource:
+    """Comparables selected from an in-memory snapshot of mutations.
+
+    The snapshot columns are converted to NumPy arrays once; each query
+    is a few vectorized masks plus a partial sort by distance, and the
+    object is read-only, hence safe to share between threads.
+    """
+
+    # Same type filters as SupabaseDataRetriever.get_comparables
+    TYPE_PATTERNS = {
+        "Appartement": ("APPARTEMENT", "STUDIO"),
+        "Maison": ("MAISON", "VILLA"),
+        "Terrain": ("TERRAIN", "PARCELLE"),
+    }
+
+    def __init__(self, mutations: pd.DataFrame):
+        """Index a snapshot.
+
+        Args:
+            mutations: Columns idmutation, datemut (YYYY-MM-DD),
+                valeurfonc, sbati, libtypbien, latitude, longitude
+        """
+        mutations = mutations.dropna(
+            subset=["latitude", "longitude"]
+        ).reset_index(drop=True)
+        self.mutations = mutations
+        self._lats = mutations["latitude"].to_numpy(dtype=float)
+        self._lons = mutations["longitude"].to_numpy(dtype=float)
+        self._sbati = mutations["sbati"].to_numpy(dtype=float)
+        self._prix = mutations["valeurfonc"].to_numpy(dtype=float)
+        self._dates = pd.to_datetime(
+            mutations["datemut"], errors="coerce"
+        ).to_numpy()
+        libelles = mutations["libtypbien"].fillna("").str.upper()
+        self._type_masks = {
+            type_bien: libelles.str.contains("|".join(patterns)).to_numpy()
+            for type_bien, patterns in self.TYPE_PATTERNS.items()
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> "SnapshotComparablesSource":
+        """Load a CSV or Parquet export of get_mutations_zone()."""
+        if path.endswith(".parquet"):
+            mutations = pd.read_parquet(path)
+        else:
+            mutations = pd.read_csv(path, dtype={"idmutation": str})
+        logger.info(f"Loaded mutations snapshot: {len(mutations)} rows")
+        return cls(mutations)
+
+    def __len__(self) -> int:
+        return len(self.mutations)
+
+    def get_comparables(
+        self,
+        latitude: float,
+        longitude: float,
+        type_bien: str = "Appartement",
+        surface_min: float = 50,
+        surface_max: float = 150,
+        rayon_km: float = 10.0,
+        annees: int = 3,
+        limit: int = 30,
+    ) -> pd.DataFrame:
+        """Nearest matching mutations, same contract as Supabase.
+
+        Returns:
+            DataFrame sorted by distance with the snapshot columns plus
+            distance_km and prix_m2
+        """
+        distances = SimilarityScorer.haversine_distance_array(
+            latitude, longitude, self._lats, self._lons
+        )
+        date_min = np.datetime64(datetime.now() - timedelta(days=365 * annees))
+        mask = (
+            (distances <= rayon_km)
+            & (self._sbati >= surface_min)
+            & (self._sbati <= surface_max)
+            & (self._prix > 0)
+            & (self._dates >= date_min)
+        )
+        type_mask = self._type_masks.get(type_bien)
+        if type_mask is not None:
+            mask &= type_mask
+
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > limit:
+            nearest = np.argpartition(distances[candidates], limit - 1)[:limit]
+            candidates = candidates[nearest]
+        candidates = candidates[np.argsort(distances[candidates])]
+
+        comparables = self.mutations.iloc[candidates].reset_index(drop=True)
+        comparables["distance_km"] = distances[candidates]
+        comparables["prix_m2"] = (
+            comparables["valeurfonc"] / comparables["sbati"]
+        )
+        return comparables
+
+
+class SupabaseComparablesSource:
+    """Comparables queried live from Supabase, one query per call.
+
+    Unlike SupabaseDataRetriever.get_comparables (used by the Streamlit
+    app), it does not reverse-geocode each row and does not swallow
+    database errors.
+    """
+
+    def __init__(self, retriever: Optional[Any] = None):
+        """Wrap a retriever.
+
+        Args:
+            retriever: SupabaseDataRetriever (created if None)
+        """
+        if retriever is None:
+            from src.supabase_data_retriever import SupabaseDataRetriever
+
+            retriever = SupabaseDataRetriever()
+        self.retriever = retriever
+
+    def get_comparables(
+        self,
+        latitude: float,
+        longitude: float,
+        type_bien: str = "Appartement",
+        surface_min: float = 50,
+        surface_max: float = 150,
+        rayon_km: float = 10.0,
+        annees: int = 3,
+        limit: int = 30,
+    ) -> pd.DataFrame:
+        """Nearest matching mutations, same contract as the snapshot.
+
+        Returns:
+            DataFrame sorted by distance with the get_mutations_zone
+            columns plus distance_km and prix_m2
+
+        Raises:
+            sqlalchemy.exc.SQLAlchemyError: If the query fails
+        """
+        return self.retriever.get_comparables_bulk(
+            latitude,
+            longitude,
+            type_bien=type_bien,
+            surface_min=surface_min,
+            surface_max=surface_max,
+            rayon_km=rayon_km,
+            annees=annees,
+            limit=limit,
+        )
+
+
+_source: Optional[Any] = None
+_source_lock = threading.Lock()
+
+
+def set_comparables_source(source: Optional[Any]) -> None:
+    """Replace the process-wide comparables source (None to reset)."""
+    global _source
+    with _source_lock:
+        _source = source
+
+
+def get_comparables_source() -> Any:
+    """Return the process-wide comparables source, creating it once.
+
+    Uses the snapshot named by the COMPOUND_MUTATIONS_SNAPSHOT env var
+    when set, otherwise a SupabaseComparablesSource (whose retriever
+    engine is the shared connection pool).
+
+    Returns:
+        Object with a get_comparables() method
+    """
+    global _source
+    with _source_lock:
+        if _source is None:
+            path = os.getenv(SNAPSHOT_ENV_VAR)
+            if path:
+                _source = SnapshotComparablesSource.from_file(path)
+            else:
+                _source = SupabaseComparablesSource()
+        return _source
@@ -0,0 +1,303 @@
+"""Span-based tracing for compound engineering workflows.
+
+Each sampled workflow execution records a span tree
+(workflow → component → sub-steps such as SQL, geocoding or scoring)
+with monotonic start/end timestamps and attributes. The current span is
+carried in a context variable, so asyncio tasks created by the workflow
+inherit it and components can open sub-step spans with ``trace_span``
+without any plumbing. Unsampled executions only pay one random draw.
+
+Traces export to the Chrome trace-event format, viewable in
+chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = (
+    contextvars.ContextVar("compound_current_span", default=None)
+)
+_ids = itertools.count(1)
+
+
+@dataclass
+class Span:
+    """One timed operation in a trace."""
+
+    name: str
+    trace: "Trace"
+    span_id: int
+    parent_id: Optional[int]
+    lane: int
+    category: str = "component"
+    start_us: float = field(default_factory=lambda: _now_us())
+    end_us: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_us is None:
+            return None
+        return (self.end_us - self.start_us) / 1000
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes to the span."""
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        if self.end_us is None:
+            self.end_us = _now_us()
+
+
+@dataclass
+class Trace:
+    """Span tree of one workflow execution."""
+
+    trace_id: int
+    name: str
+    spans: List[Span] = field(default_factory=list)
+    _lanes: Iterator[int] = field(
+        default_factory=lambda: itertools.count(1), repr=False
+    )
+
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+
+    def children(self, span: Span) -> List[Span]:
+        """Direct children of a span."""
+        return [s for s in self.spans if s.parent_id == span.span_id]
+
+    def find(self, name: str) -> Optional[Span]:
+        """First span with the given name."""
+        return next((s for s in self.spans if s.name == name), None)
+
+    def to_chrome_events(self) -> List[Dict[str, Any]]:
+        """Convert spans to Chrome "complete" trace events.
+
+        The workflow span sits on lane 0 and each component gets its own
+        lane (tid), so concurrent components render side by side; sub-steps
+        share their component's lane and nest under it.
+        """
+        events = []
+        for span in self.spans:
+            end_us = span.end_us if span.end_us is not None else _now_us()
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": span.start_us,
+                    "dur": end_us - span.start_us,
+                    "pid": self.trace_id,
+                    "tid": span.lane,
+                    "args": dict(span.attributes),
+                }
+            )
+        events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": self.trace_id,
+                "args": {"name": f"{self.name} #{self.trace_id}"},
+            }
+        )
+        return events
+
+
+def _now_us() -> float:
+    return time.perf_counter_ns() / 1000
+
+
+def _default_sample_rate() -> float:
+    try:
+        return float(os.getenv("COMPOUND_TRACE_SAMPLE_RATE", "0.1"))
+    except ValueError:
+        return 0.1
+
+
+class Tracer:
+    """Samples workflow executions and keeps their most recent traces."""
+
+    def __init__(
+        self, sample_rate: Optional[float] = None, max_traces: int = 100
+    ):
+        """Initialize tracer.
+
+        Args:
+            sample_rate: Fraction of executions traced, 0 to 1 (defaults
+                to the COMPOUND_TRACE_SAMPLE_RATE env var, else 0.1)
+            max_traces: Number of finished traces kept in memory
+        """
+        self.sample_rate = (
+            _default_sample_rate() if sample_rate is None else sample_rate
+        )
+        self.traces: "deque[Trace]" = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def start_trace(self, name: str, **attributes: Any) -> Optional[Span]:
+        """Create the root span of a new trace if the execution is sampled.
+
+        The span is not made current; use ``span_context`` to run code
+        (e.g. create tasks) under it, and ``finish_trace`` to close it.
+
+        Args:
+            name: Root span name
+            **attributes: Root span attributes
+
+        Returns:
+            Root span, or None when not sampled
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+
+        trace = Trace(trace_id=next(_ids), name=name)
+        root = Span(
+            name=name,
+            trace=trace,
+            span_id=next(_ids),
+            parent_id=None,
+            lane=0,
+            category="workflow",
+            attributes=attributes,
+        )
+        trace.spans.append(root)
+        return root
+
+    def finish_trace(self, root: Optional[Span]) -> None:
+        """Close a root span and keep its trace."""
+        if root is None:
+            return
+        root.end()
+        with self._lock:
+            self.traces.append(root.trace)
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Open a sampled root span as the current span.
+
+        Args:
+            name: Root span name
+            **attributes: Root span attributes
+
+        Yields:
+            Root span, or None when not sampled
+        """
+        root = self.start_trace(name, **attributes)
+        if root is None:
+            yield None
+            return
+
+        token = _current_span.set(root)
+        try:
+            yield root
+        finally:
+            _current_span.reset(token)
+            self.finish_trace(root)
+
+    def get_trace(self, trace_id: int) -> Optional[Trace]:
+        """Return a finished trace by id."""
+        with self._lock:
+            return next(
+                (t for t in self.traces if t.trace_id == trace_id), None
+            )
+
+    def export_chrome_trace(
+        self, path: str, traces: Optional[Iterable[Trace]] = None
+    ) -> int:
+        """Write traces to a Chrome trace-event JSON file.
+
+        Args:
+            path: Output file
+            traces: Traces to export (defaults to all kept traces)
+
+        Returns:
+            Number of exported traces
+        """
+        if traces is None:
+            with self._lock:
+                traces = list(self.traces)
+        traces = list(traces)
+        events = [event for t in traces for event in t.to_chrome_events()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": events, "displayTimeUnit": "ms"},
+                f,
+                default=repr,
+            )
+        return len(traces)
+
+
+@contextmanager
+def trace_span(
+    name: str,
+    category: str = "step",
+    new_lane: bool = False,
+    **attributes: Any,
+) -> Iterator[Optional[Span]]:
+    """Open a child span of the current span (no-op when not tracing).
+
+    Args:
+        name: Span name (e.g. "sql", "geocode")
+        category: Chrome trace category
+        new_lane: Draw the span on its own lane (for concurrent work)
+        **attributes: Span attributes
+
+    Yields:
+        The span, or None when the execution is not traced
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    trace = parent.trace
+    span = Span(
+        name=name,
+        trace=trace,
+        span_id=next(_ids),
+        parent_id=parent.span_id,
+        lane=next(trace._lanes) if new_lane else parent.lane,
+        category=category,
+        attributes=attributes,
+    )
+    trace.spans.append(span)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set(error=repr(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def span_context(span: Optional[Span]) -> contextvars.Context:
+    """Copy of the current context with ``span`` as the current span.
+
+    Tasks created with ``span_context(span).run(asyncio.create_task, coro)``
+    inherit the span without changing the caller's context.
+    """
+    context = contextvars.copy_context()
+    context.run(_current_span.set, span)
+    return context
+
+
+def current_span() -> Optional[Span]:
+    """Return the active span, if the execution is traced."""
+    return _current_span.get()
+
+
+# Process-wide tracer used by workflows that do not supply their own
+default_tracer = Tracer()
@@ -5,8 +5,18 @@ specialized components for end-to-end real estate analysis.
 """
 
 import logging
-
-from src.compound_engineering import Component, ComponentType, Workflow
+import time
+from typing import Any
+
+from src.compound_ai import AIPrompt, commune_from_address, get_ai_client
+from src.compound_engineering import (
+    Component,
+    ComponentResult,
+    ComponentStatus,
+    ComponentType,
+    Workflow,
+    WorkflowContext,
+)
 from src.compound_components import (
     EstimationComponent,
     FormatterComponent,
@@ -14,9 +24,43 @@ from src.compound_components import (
     ScoringComponent,
     DataRetrieverComponent,
 )
+from src.compound_resilience import DEFAULT_RETRY_POLICY, get_circuit_breaker
 
 logger = logging.getLogger(__name__)
 
+# Time budget of each AI call; AI components are optional and are skipped
+# when less than this is left before the workflow deadline.
+AI_COMPONENT_TIMEOUT_S = 10.0
+
+# AI enrichment adds little to a reliable core estimate: it is skipped
+# when the estimate reaches both thresholds.
+ENRICHMENT_MIN_CONFIDENCE = 80.0  # fiabilite score_global (0-100)
+ENRICHMENT_MIN_COMPARABLES = 10
+
+
+def needs_enrichment(context: WorkflowContext) -> bool:
+    """Tell whether the AI analyzers are worth running.
+
+    Reads the reliability of the estimation (its ``fiabilite``, see
+    ConfidenceCalculator): the global score (0-100) and the number of
+    comparables scoring at least the minimum comparable score, which
+    is what makes an estimate reliable (priced but weak matches do not
+    count).
+
+    Args:
+        context: Workflow context with the estimation result
+
+    Returns:
+        False when score_global >= ENRICHMENT_MIN_CONFIDENCE and
+        nb_comparables >= ENRICHMENT_MIN_COMPARABLES
+    """
+    estimation = context.get_data("estimation") or {}
+    fiabilite = estimation.get("fiabilite") or {}
+    return not (
+        fiabilite.get("score_global", 0) >= ENRICHMENT_MIN_CONFIDENCE
+        and fiabilite.get("nb_comparables", 0) >= ENRICHMENT_MIN_COMPARABLES
+    )
+
 
 class WorkflowFactory:
     """Factory for creating pre-built workflows."""
@@ -77,10 +121,85 @@ class WorkflowFactory:
         return workflow
 
 
+class AIAnalyzerComponent(Component):
+    """Component answered by an AI provider through its AIClient.
+
+    The prompt is built from the commune (``commune`` input, else parsed
+    from the address), the property type and, for tasks that use it,
+    the estimated price bucket; answers are served from the response
+    cache whenever an equivalent prompt was answered recently.
+    """
+
+    # Task sent to the provider; see StubAIProvider.answer for shapes
+    task = "market_analysis"
+    # Whether the estimated price is part of the prompt
+    uses_price = True
+
+    def __init__(self, name: str, provider: str, **kwargs: Any):
+        super().__init__(
+            name=name,
+            timeout_s=AI_COMPONENT_TIMEOUT_S,
+            optional=True,
+            retry_policy=DEFAULT_RETRY_POLICY,
+            idempotent=True,
+            circuit_breaker=get_circuit_breaker(provider),
+            resource=provider,
+            input_fields=("address", "commune", "type_bien"),
+            **kwargs,
+        )
+        self.provider = provider
+
+    def build_prompt(self, context: WorkflowContext) -> AIPrompt:
+        """Normalized prompt of this execution."""
+        user_input = context.user_input
+        commune = user_input.get("commune") or commune_from_address(
+            user_input.get("address", "")
+        )
+        price = None
+        if self.uses_price:
+            estimation = context.get_data("estimation") or {}
+            price = estimation.get("estimated_price")
+        return AIPrompt.build(
+            self.task,
+            commune,
+            user_input.get("type_bien", "Appartement"),
+            price,
+        )
+
+    async def execute(self, context: WorkflowContext) -> ComponentResult:
+        start_time = time.time()
+
+        try:
+            prompt = self.build_prompt(context)
+            response = await get_ai_client(self.provider).ask(prompt)
+            execution_time = (time.time() - start_time) * 1000
+
+            return ComponentResult(
+                component_name=self.name,
+                status=ComponentStatus.SUCCESS,
+                data=response.data,
+                execution_time_ms=execution_time,
+                metadata={
+                    "prompt": prompt.text,
+                    "ai_cache": "hit" if response.cached else "miss",
+                },
+            )
+
+        except Exception as e:
+            logger.error(f"{self.name} failed: {str(e)}")
+            return ComponentResult(
+                component_name=self.name,
+                status=ComponentStatus.FAILED,
+                error=str(e),
+            )
+
+
 class AIComponentAdapter:
     """Adapter to integrate AI MCPs into the compound system.
 
     Wraps external AI services (Claude, Grok, Perplexity) as components.
+    Until the MCP integrations land, their clients use the offline
+    StubAIProvider (see src.compound_ai.set_ai_client).
     """
 
     @staticmethod
@@ -91,63 +210,23 @@ class AIComponentAdapter:
             Component that uses Claude for intelligent analysis
         """
 
-        class ClaudeAnalyzerComponent(Component):
+        class ClaudeAnalyzerComponent(AIAnalyzerComponent):
             """Analyzes data using Claude AI."""
 
+            # Runs alongside scoring, before the estimation exists: the
+            # prompt must not depend on the estimated price
+            task = "market_analysis"
+            uses_price = False
+
             def __init__(self):
                 super().__init__(
                     name="claude_analyzer",
+                    provider="claude",
                     component_type=ComponentType.ANALYZER,
                     description="Analyze data with Claude AI",
                 )
                 self.add_dependency("data_retriever")
 
-            async def execute(self, context):
-                import time
-
-                from src.compound_engineering import (
-                    ComponentResult,
-                    ComponentStatus,
-                )
-
-                start_time = time.time()
-
-                try:
-                    # TODO: Integrate with Claude MCP
-                    # This would call the Claude tool through MCP
-                    logger.debug(
-                        "Analyzing with Claude (MCP integration pending)"
-                    )
-
-                    analysis = {
-                        "insights": [
-                            "Market analysis insight 1",
-                            "Market analysis insight 2",
-                        ],
-                        "recommendations": [
-                            "Recommendation 1",
-                            "Recommendation 2",
-                        ],
-                        "confidence": 0.92,
-                    }
-
-                    execution_time = (time.time() - start_time) * 1000
-
-                    return ComponentResult(
-                        component_name=self.name,
-                        status=ComponentStatus.SUCCESS,
-                        data=analysis,
-                        execution_time_ms=execution_time,
-                    )
-
-                except Exception as e:
-                    logger.error(f"Claude analysis failed: {str(e)}")
-                    return ComponentResult(
-                        component_name=self.name,
-                        status=ComponentStatus.FAILED,
-                        error=str(e),
-                    )
-
         return ClaudeAnalyzerComponent()
 
     @staticmethod
@@ -158,60 +237,20 @@ class AIComponentAdapter:
             Component that uses Grok for complex reasoning
         """
 
-        class GrokReasonerComponent(Component):
+        class GrokReasonerComponent(AIAnalyzerComponent):
             """Performs deep reasoning using Grok."""
 
+            task = "price_reasoning"
+
             def __init__(self):
                 super().__init__(
                     name="grok_reasoner",
+                    provider="grok",
                     component_type=ComponentType.REASONER,
                     description="Deep reasoning with Grok AI",
                 )
                 self.add_dependency("estimation")
 
-            async def execute(self, context):
-                import time
-
-                from src.compound_engineering import (
-                    ComponentResult,
-                    ComponentStatus,
-                )
-
-                start_time = time.time()
-
-                try:
-                    # TODO: Integrate with Grok MCP
-                    estimation = context.get_data("estimation")
-
-                    reasoning_result = {
-                        "market_analysis": "Detailed market reasoning",
-                        "price_justification": (
-                            "Why the estimated price makes sense"
-                        ),
-                        "risk_factors": [
-                            "Market volatility",
-                            "Location risks",
-                        ],
-                        "opportunities": ["Renovation potential"],
-                    }
-
-                    execution_time = (time.time() - start_time) * 1000
-
-                    return ComponentResult(
-                        component_name=self.name,
-                        status=ComponentStatus.SUCCESS,
-                        data=reasoning_result,
-                        execution_time_ms=execution_time,
-                    )
-
-                except Exception as e:
-                    logger.error(f"Grok reasoning failed: {str(e)}")
-                    return ComponentResult(
-                        component_name=self.name,
-                        status=ComponentStatus.FAILED,
-                        error=str(e),
-                    )
-
         return GrokReasonerComponent()
 
     @staticmethod
@@ -222,74 +261,41 @@ class AIComponentAdapter:
             Component that uses Perplexity for data research
         """
 
-        class PerplexityResearcherComponent(Component):
+        class PerplexityResearcherComponent(AIAnalyzerComponent):
             """Research market data using Perplexity."""
 
+            # Market research depends on the commune, not on the price
+            task = "market_research"
+            uses_price = False
+
             def __init__(self):
                 super().__init__(
                     name="perplexity_researcher",
+                    provider="perplexity",
                     component_type=ComponentType.RETRIEVER,
                     description="Research market data with Perplexity",
                 )
                 self.add_dependency("geocoding")
 
-            async def execute(self, context):
-                import time
-
-                from src.compound_engineering import (
-                    ComponentResult,
-                    ComponentStatus,
-                )
-
-                start_time = time.time()
-
-                try:
-                    # TODO: Integrate with Perplexity MCP
-                    geo_data = context.get_data("geocoding")
-
-                    research = {
-                        "market_trends": [
-                            "Trend 1",
-                            "Trend 2",
-                        ],
-                        "economic_factors": [
-                            "Factor 1",
-                            "Factor 2",
-                        ],
-                        "regional_info": {
-                            "population": "15000",
-                            "growth": "+2.5%",
-                            "unemployment": "4.2%",
-                        },
-                    }
-
-                    execution_time = (time.time() - start_time) * 1000
-
-                    return ComponentResult(
-                        component_name=self.name,
-                        status=ComponentStatus.SUCCESS,
-                        data=research,
-                        execution_time_ms=execution_time,
-                    )
-
-                except Exception as e:
-                    logger.error(
-                        f"Perplexity research failed: {str(e)}"
-                    )
-                    return ComponentResult(
-                        component_name=self.name,
-                        status=ComponentStatus.FAILED,
-                        error=str(e),
-                    )
-
         return PerplexityResearcherComponent()
 
 
-def create_advanced_estimation_workflow() -> Workflow:
+def create_advanced_estimation_workflow(
+    skip_reliable_enrichment: bool = True,
+) -> Workflow:
     """Create advanced workflow with AI analysis.
 
     Combines basic components with Claude, Grok, and Perplexity
-    for comprehensive analysis.
+    for comprehensive analysis. The AI components are optional: they
+    time out or are skipped without failing the core estimate.
+
+    Args:
+        skip_reliable_enrichment: Skip the AI components when the core
+            estimate is already reliable (see needs_enrichment). The
+            rule reads the estimation, so all three analyzers then wait
+            for it: Claude and Perplexity no longer start alongside
+            scoring, which gives up the branch parallelism. Pass False
+            to favour latency over AI calls saved.
 
     Returns:
         Advanced workflow with AI components
@@ -297,11 +303,19 @@ def create_advanced_estimation_workflow() -> Workflow:
     workflow = WorkflowFactory.create_property_estimation_workflow()
 
     # Add AI components
-    workflow.add_component(AIComponentAdapter.create_claude_analyzer_component())
-    workflow.add_component(AIComponentAdapter.create_grok_reasoner_component())
-    workflow.add_component(
-        AIComponentAdapter.create_perplexity_researcher_component()
-    )
+    analyzers = [
+        AIComponentAdapter.create_claude_analyzer_component(),
+        AIComponentAdapter.create_grok_reasoner_component(),
+        AIComponentAdapter.create_perplexity_researcher_component(),
+    ]
+    for analyzer in analyzers:
+        if skip_reliable_enrichment:
+            analyzer.run_if(
+                needs_enrichment,
+                reason="Reliable estimate, enrichment not needed",
+                after=("estimation",),
+            )
+        workflow.add_component(analyzer)
 
     logger.info("Created advanced_estimation workflow with AI components")
     return workflow
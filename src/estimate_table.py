@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EstimateTable - Table pré-calculée des estimations pour chaque adresse de la zone
+Batch nocturne + lecture instantanée dans l'application
+
+Le batch exécute le pipeline complet (sélection des comparables + EstimationAlgorithm)
+pour chaque point adresse (BAN) des communes de insee_mapping.csv, pour des tranches
+standard de type et de surface, et stocke le résultat dans une table SQLite indexée
+par (adresse, type, tranche). Les paramètres de construction (rayon, ancienneté,
+tolérance de surface) sont enregistrés dans `meta` : l'application n'utilise la table
+que si ses critères de recherche sont identiques, et interpole alors entre tranches
+de surface. Les comparables retenus pour chaque estimation (identifiant, score,
+distance) sont stockés avec leurs mutations : un hit fournit aussi les onglets
+Comparables / Carte / PDF, sans requête Supabase ni scoring.
+
+Rafraîchissement incrémental : sont recalculées les adresses situées à moins de
+`rayon_km` d'une mutation entrée dans la fenêtre (nouvelle) ou sortie de la fenêtre
+depuis le dernier passage, ainsi que les adresses calculées il y a plus de
+`stale_after_days` jours (le score d'ancienneté des comparables évolue avec le temps).
+Un recalcul remplace toutes les lignes de l'adresse : une tranche dont l'estimation
+n'aboutit plus disparaît de la table.
+
+Exemple (cron nocturne):
+    python -m src.estimate_table --ban data/raw/adresses-74.csv.gz
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.estimation_algorithm import EstimationAlgorithm, SimilarityScorer
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS addresses (
+    address_id TEXT PRIMARY KEY,
+    insee_code TEXT,
+    label TEXT,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_addresses_lat_lon ON addresses (latitude, longitude);
+
+CREATE TABLE IF NOT EXISTS estimates (
+    address_id TEXT NOT NULL,
+    type_bien TEXT NOT NULL,
+    surface_bucket REAL NOT NULL,
+    prix_estime REAL NOT NULL,
+    prix_min REAL,
+    prix_max REAL,
+    prix_au_m2 REAL NOT NULL,
+    nb_comparables INTEGER,
+    fiabilite TEXT,
+    computed_at TEXT,
+    PRIMARY KEY (address_id, type_bien, surface_bucket)
+);
+
+CREATE TABLE IF NOT EXISTS mutations (
+    idmutation TEXT PRIMARY KEY,
+    datemut TEXT,
+    valeurfonc REAL,
+    sbati REAL,
+    libtypbien TEXT,
+    latitude REAL,
+    longitude REAL
+);
+
+CREATE TABLE IF NOT EXISTS estimate_comparables (
+    address_id TEXT NOT NULL,
+    type_bien TEXT NOT NULL,
+    surface_bucket REAL NOT NULL,
+    rang INTEGER NOT NULL,
+    idmutation TEXT NOT NULL,
+    score REAL,
+    distance_km REAL,
+    PRIMARY KEY (address_id, type_bien, surface_bucket, rang)
+);
+
+CREATE TABLE IF NOT EXISTS address_runs (
+    address_id TEXT PRIMARY KEY,
+    computed_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class EstimateTable:
+    """Stockage SQLite des estimations pré-calculées"""
+
+    DEFAULT_PATH = "data/processed/estimates_74.sqlite"
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        """Ouvre (ou crée) la table"""
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ---------- Méta ----------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def build_params(self) -> Optional[Dict]:
+        """Paramètres du dernier pré-calcul (rayon_km, annees, surface_tolerance...), ou None"""
+        value = self.get_meta("build_params")
+        return json.loads(value) if value else None
+
+    def serves(self, rayon_km: float, annees: int, surface_tolerance: float) -> bool:
+        """Vrai si la table a été construite avec ces critères de recherche"""
+        params = self.build_params()
+        return params is not None and (
+            math.isclose(params["rayon_km"], rayon_km)
+            and params["annees"] == annees
+            and math.isclose(params["surface_tolerance"], surface_tolerance)
+        )
+
+    # ---------- Écriture ----------
+
+    def upsert_addresses(self, addresses: pd.DataFrame) -> None:
+        """
+        Insère / met à jour les points adresse
+        (address_id, insee_code, label, latitude, longitude)
+        """
+        colonnes = ["address_id", "insee_code", "label", "latitude", "longitude"]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO addresses VALUES (?, ?, ?, ?, ?)",
+                addresses[colonnes].itertuples(index=False, name=None)
+            )
+
+    def upsert_estimates(self, rows: Iterable[tuple]) -> None:
+        """Insère / remplace des lignes (address_id, type_bien, surface_bucket, ...)"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO estimates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def upsert_mutations(self, mutations: pd.DataFrame) -> None:
+        """Insère / met à jour les mutations pouvant servir de comparables"""
+        colonnes = ["datemut", "valeurfonc", "sbati", "libtypbien", "latitude", "longitude"]
+        lignes = zip(
+            mutations["idmutation"].astype(str), *(mutations[c].tolist() for c in colonnes)
+        )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO mutations VALUES (?, ?, ?, ?, ?, ?, ?)", lignes
+            )
+
+    def prune_mutations(self) -> None:
+        """Supprime les mutations qui ne sont plus le comparable d'aucune estimation"""
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM mutations WHERE idmutation NOT IN "
+                "(SELECT idmutation FROM estimate_comparables)"
+            )
+
+    def replace_estimates(
+        self,
+        address_id: str,
+        rows: Iterable[tuple],
+        computed_at: str,
+        comparables: Iterable[tuple] = ()
+    ) -> None:
+        """
+        Remplace toutes les lignes d'une adresse (les tranches absentes de `rows` sont supprimées)
+
+        Args:
+            comparables: Lignes (address_id, type_bien, surface_bucket, rang, idmutation,
+                score, distance_km) des comparables de chaque estimation
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM estimates WHERE address_id = ?", (address_id,))
+            self.conn.execute(
+                "DELETE FROM estimate_comparables WHERE address_id = ?", (address_id,)
+            )
+            self.conn.executemany(
+                "INSERT INTO estimates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.executemany(
+                "INSERT INTO estimate_comparables VALUES (?, ?, ?, ?, ?, ?, ?)",
+                comparables
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO address_runs (address_id, computed_at) VALUES (?, ?)",
+                (address_id, computed_at)
+            )
+
+    def address_runs(self) -> Dict[str, str]:
+        """Date du dernier calcul de chaque adresse (y compris celles sans estimation)"""
+        return dict(self.conn.execute("SELECT address_id, computed_at FROM address_runs"))
+
+    def known_address_ids(self) -> set:
+        return set(self.address_runs())
+
+    # ---------- Lecture ----------
+
+    def nearest_address(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance_m: float = 30.0
+    ) -> Optional[str]:
+        """Point adresse le plus proche (recherche par boîte sur l'index lat/lon)"""
+        dlat = max_distance_m / 111_320.0
+        dlon = max_distance_m / (111_320.0 * math.cos(math.radians(latitude)))
+        rows = self.conn.execute(
+            """
+            SELECT address_id, latitude, longitude FROM addresses
+            WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?
+            """,
+            (latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon)
+        ).fetchall()
+        if not rows:
+            return None
+
+        distances = [
+            SimilarityScorer.haversine_distance(latitude, longitude, lat, lon) * 1000
+            for _, lat, lon in rows
+        ]
+        best = int(np.argmin(distances))
+        return rows[best][0] if distances[best] <= max_distance_m else None
+
+    def lookup(self, address_id: str, type_bien: str, surface: float) -> Optional[Dict]:
+        """
+        Estimation pour une adresse, interpolée linéairement (en prix au m²) entre les
+        deux tranches de surface encadrantes ; bornée aux tranches extrêmes.
+
+        Returns:
+            Dict au format de EstimationAlgorithm.estimate() (+ "source": "precalcul"), ou None
+        """
+        rows = self.conn.execute(
+            """
+            SELECT surface_bucket, prix_au_m2, prix_min, prix_max, nb_comparables, fiabilite,
+                   computed_at
+            FROM estimates WHERE address_id = ? AND type_bien = ?
+            ORDER BY surface_bucket
+            """,
+            (address_id, type_bien)
+        ).fetchall()
+        if not rows or surface <= 0:
+            return None
+
+        buckets = np.array([r[0] for r in rows])
+        prix_m2 = np.interp(surface, buckets, [r[1] for r in rows])
+        prix_min_m2 = np.interp(surface, buckets, [r[2] / r[0] for r in rows])
+        prix_max_m2 = np.interp(surface, buckets, [r[3] / r[0] for r in rows])
+
+        # Fiabilité : la plus prudente des deux tranches encadrantes
+        idx = 0
+        if len(rows) > 1:
+            idx = int(np.clip(np.searchsorted(buckets, surface), 1, len(rows) - 1))
+        voisins = rows[max(0, idx - 1):idx + 1]
+        ref = min(voisins, key=lambda r: json.loads(r[5]).get("score_global", 0))
+        fiabilite = json.loads(ref[5])
+
+        address = self.conn.execute(
+            "SELECT latitude, longitude FROM addresses WHERE address_id = ?", (address_id,)
+        ).fetchone()
+
+        # Comparables de la tranche la plus proche (scores calculés pour sa surface)
+        proche = float(buckets[int(np.argmin(np.abs(buckets - surface)))])
+        comparables = self.comparables(address_id, type_bien, proche)
+
+        return {
+            "success": True,
+            "source": "precalcul",
+            "bien": {
+                "latitude": address[0] if address else None,
+                "longitude": address[1] if address else None,
+                "surface_m2": surface,
+                "type": type_bien
+            },
+            "estimation": {
+                "prix_estime_eur": round(prix_m2 * surface),
+                "prix_min_eur": round(prix_min_m2 * surface),
+                "prix_max_eur": round(prix_max_m2 * surface),
+                "prix_au_m2_eur": round(prix_m2, 2)
+            },
+            "fiabilite": fiabilite,
+            "nb_comparables_utilises": ref[4],
+            "comparables_summary": {},
+            "comparables_with_scores": comparables,
+            "timestamp": ref[6]
+        }
+
+    def comparables(self, address_id: str, type_bien: str, surface_bucket: float) -> List[Dict]:
+        """
+        Comparables stockés d'une estimation, par score décroissant.
+
+        Returns:
+            Liste de dicts (colonnes de get_mutations_zone + distance_km, prix_m2, score)
+        """
+        cursor = self.conn.execute(
+            """
+            SELECT m.idmutation, m.datemut, m.valeurfonc, m.sbati, m.libtypbien,
+                   m.latitude, m.longitude, c.distance_km, c.score
+            FROM estimate_comparables c JOIN mutations m ON m.idmutation = c.idmutation
+            WHERE c.address_id = ? AND c.type_bien = ? AND c.surface_bucket = ?
+            ORDER BY c.rang
+            """,
+            (address_id, type_bien, surface_bucket)
+        )
+        colonnes = [description[0] for description in cursor.description]
+        comparables = [dict(zip(colonnes, row)) for row in cursor]
+        for comparable in comparables:
+            comparable["prix_m2"] = comparable["valeurfonc"] / comparable["sbati"]
+        return comparables
+
+    def lookup_point(
+        self,
+        latitude: float,
+        longitude: float,
+        type_bien: str,
+        surface: float
+    ) -> Optional[Dict]:
+        """lookup() sur le point adresse le plus proche des coordonnées géocodées"""
+        address_id = self.nearest_address(latitude, longitude)
+        if address_id is None:
+            return None
+        return self.lookup(address_id, type_bien, surface)
+
+
+class EstimatePrecomputer:
+    """Batch de pré-calcul : comparables + EstimationAlgorithm pour chaque adresse × tranche"""
+
+    TYPES = ("Appartement", "Maison")
+    SURFACE_BUCKETS = (25, 40, 55, 70, 85, 100, 120, 150, 200)
+
+    # Mêmes filtres de type que SupabaseDataRetriever.get_comparables
+    TYPE_PATTERNS = {
+        "Appartement": ("APPARTEMENT", "STUDIO"),
+        "Maison": ("MAISON", "VILLA"),
+    }
+
+    def __init__(
+        self,
+        table: EstimateTable,
+        algorithm: Optional[EstimationAlgorithm] = None,
+        rayon_km: float = 10.0,
+        annees: int = 3,
+        limit: int = 50,
+        surface_tolerance: float = 0.20,
+        surface_buckets: Sequence[float] = SURFACE_BUCKETS,
+        stale_after_days: int = 30,
+        comparables_stored: int = 20
+    ):
+        """
+        Args:
+            comparables_stored: Nombre de comparables (meilleurs scores) conservés par
+                estimation pour les onglets Comparables / Carte / PDF
+        """
+        self.table = table
+        self.algorithm = algorithm or EstimationAlgorithm()
+        self.rayon_km = rayon_km
+        self.annees = annees
+        self.limit = limit
+        self.surface_tolerance = surface_tolerance
+        self.surface_buckets = tuple(surface_buckets)
+        self.stale_after_days = stale_after_days
+        self.comparables_stored = comparables_stored
+
+    @property
+    def build_params(self) -> Dict:
+        """Paramètres enregistrés dans meta (cf. EstimateTable.serves)"""
+        return {
+            "rayon_km": self.rayon_km,
+            "annees": self.annees,
+            "surface_tolerance": self.surface_tolerance,
+            "limit": self.limit,
+            "comparables_stored": self.comparables_stored,
+        }
+
+    @staticmethod
+    def load_addresses(ban_csv: str, insee_csv: str = "insee_mapping.csv") -> pd.DataFrame:
+        """
+        Charge les points adresse BAN (adresse.data.gouv.fr, fichier départemental)
+        limités aux communes couvertes.
+
+        Returns:
+            DataFrame avec colonnes: address_id, insee_code, label, latitude, longitude
+        """
+        communes = pd.read_csv(insee_csv, dtype=str)["insee_code"].unique()
+        ban = pd.read_csv(
+            ban_csv, sep=";", dtype={"code_insee": str, "id": str},
+            usecols=["id", "code_insee", "numero", "nom_voie", "nom_commune", "lat", "lon"]
+        )
+        ban = ban[ban["code_insee"].isin(communes)].dropna(subset=["lat", "lon"])
+        return pd.DataFrame({
+            "address_id": ban["id"],
+            "insee_code": ban["code_insee"],
+            "label": ban["numero"].astype(str) + " " + ban["nom_voie"] + ", " + ban["nom_commune"],
+            "latitude": ban["lat"].astype(float),
+            "longitude": ban["lon"].astype(float),
+        }).reset_index(drop=True)
+
+    def run(self, addresses: pd.DataFrame, mutations: pd.DataFrame, full: bool = False) -> int:
+        """
+        Calcule et stocke les estimations.
+
+        Args:
+            addresses: Points adresse (cf. load_addresses)
+            mutations: Mutations de la zone (cf. SupabaseDataRetriever.get_mutations_zone,
+                idmutation compris), y compris celles antérieures à la fenêtre (pour
+                détecter les sorties)
+            full: Recalcule toutes les adresses (sinon incrémental ; forcé si les
+                paramètres de construction ont changé)
+
+        Returns:
+            Nombre d'adresses recalculées
+        """
+        date_min = (datetime.now() - timedelta(days=365 * self.annees)).strftime("%Y-%m-%d")
+        sorties = self._mutations_sorties(mutations, date_min)
+        mutations = mutations[mutations["datemut"] >= date_min].reset_index(drop=True)
+
+        if self.table.build_params() != self.build_params:
+            full = True
+        if full:
+            a_calculer = addresses
+        else:
+            a_calculer = self._addresses_to_refresh(addresses, mutations, sorties)
+        logger.info(f"Pré-calcul: {len(a_calculer)}/{len(addresses)} adresses à (re)calculer")
+
+        self.table.upsert_addresses(addresses)
+        self.table.upsert_mutations(mutations)
+        records = mutations.to_dict("records")
+        ids = mutations["idmutation"].astype(str).to_numpy()
+        lats = mutations["latitude"].to_numpy(dtype=float)
+        lons = mutations["longitude"].to_numpy(dtype=float)
+        sbati = mutations["sbati"].to_numpy(dtype=float)
+        libtypbien = mutations["libtypbien"].fillna("").str.upper()
+        type_masks = {
+            type_bien: libtypbien.str.contains("|".join(patterns)).to_numpy()
+            for type_bien, patterns in self.TYPE_PATTERNS.items()
+        }
+
+        computed_at = datetime.now().isoformat()
+        for n, address in enumerate(a_calculer.itertuples(index=False), start=1):
+            if mutations.empty:
+                self.table.replace_estimates(address.address_id, [], computed_at)
+                continue
+            distances = SimilarityScorer.haversine_distance_array(
+                address.latitude, address.longitude, lats, lons
+            )
+            proches = distances <= self.rayon_km
+            rows, comparables = [], []
+            for type_bien in self.TYPES:
+                for bucket in self.surface_buckets:
+                    mask = (
+                        proches & type_masks[type_bien]
+                        & (sbati >= bucket * (1 - self.surface_tolerance))
+                        & (sbati <= bucket * (1 + self.surface_tolerance))
+                    )
+                    candidats = np.flatnonzero(mask)
+                    candidats = candidats[np.argsort(distances[candidats])[:self.limit]]
+                    if len(candidats) == 0:
+                        continue
+
+                    result = self.algorithm.estimate(
+                        address.latitude, address.longitude, bucket, type_bien,
+                        [records[i] for i in candidats]
+                    )
+                    if not result.get("success"):
+                        continue
+
+                    estimation = result["estimation"]
+                    rows.append((
+                        address.address_id, type_bien, float(bucket),
+                        estimation["prix_estime_eur"], estimation["prix_min_eur"],
+                        estimation["prix_max_eur"], estimation["prix_au_m2_eur"],
+                        result["nb_comparables_utilises"],
+                        json.dumps(result["fiabilite"], default=float), computed_at
+                    ))
+
+                    # Meilleurs scores (tri stable : à score égal, le plus proche)
+                    scores = np.array([c["score"] for c in result["comparables_with_scores"]])
+                    meilleurs = np.argsort(-scores, kind="stable")[:self.comparables_stored]
+                    comparables.extend(
+                        (address.address_id, type_bien, float(bucket), rang,
+                         ids[candidats[i]], float(scores[i]), float(distances[candidats[i]]))
+                        for rang, i in enumerate(meilleurs)
+                    )
+            self.table.replace_estimates(address.address_id, rows, computed_at, comparables)
+
+            if n % 1000 == 0:
+                logger.info(f"  {n}/{len(a_calculer)} adresses")
+
+        if not mutations.empty:
+            self.table.set_meta("dvf_max_datemut", str(mutations["datemut"].max()))
+        self.table.prune_mutations()
+        self.table.set_meta("window_start", date_min)
+        self.table.set_meta("build_params", json.dumps(self.build_params))
+        self.table.set_meta("computed_at", computed_at)
+        return len(a_calculer)
+
+    def _mutations_sorties(self, mutations: pd.DataFrame, date_min: str) -> pd.DataFrame:
+        """
+        Mutations sorties de la fenêtre depuis le dernier passage
+        (début précédent ≤ datemut < date_min)
+        """
+        debut_precedent = self.table.get_meta("window_start")
+        if debut_precedent is None:
+            return mutations.iloc[0:0]
+        return mutations[
+            (mutations["datemut"] >= debut_precedent) & (mutations["datemut"] < date_min)
+        ]
+
+    def _addresses_to_refresh(
+        self, addresses: pd.DataFrame, mutations: pd.DataFrame, sorties: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Nouvelles adresses, adresses calculées depuis plus de stale_after_days jours, et
+        adresses à moins de rayon_km d'une mutation entrée dans (ou sortie de) la fenêtre
+        depuis le dernier passage
+        """
+        # Jamais calculée ("") ou calculée avant perime_avant
+        runs = addresses["address_id"].map(self.table.address_runs()).fillna("")
+        perime_avant = (datetime.now() - timedelta(days=self.stale_after_days)).isoformat()
+        a_rafraichir = (runs < perime_avant).to_numpy().copy()
+
+        derniere_date = self.table.get_meta("dvf_max_datemut")
+        if derniere_date is None:
+            nouvelles = mutations
+        else:
+            nouvelles = mutations[mutations["datemut"] > derniere_date]
+        logger.info(
+            f"{len(nouvelles)} nouvelles mutations depuis {derniere_date}, "
+            f"{len(sorties)} sorties de la fenêtre"
+        )
+
+        lats = addresses["latitude"].to_numpy(dtype=float)
+        lons = addresses["longitude"].to_numpy(dtype=float)
+        for mutation in pd.concat([nouvelles, sorties]).itertuples(index=False):
+            a_rafraichir |= SimilarityScorer.haversine_distance_array(
+                mutation.latitude, mutation.longitude, lats, lons
+            ) <= self.rayon_km
+
+        return addresses[a_rafraichir]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pré-calcul nocturne des estimations par adresse")
+    parser.add_argument(
+        "--ban", required=True, help="Fichier BAN départemental (adresses-74.csv.gz)"
+    )
+    parser.add_argument("--insee", default="insee_mapping.csv")
+    parser.add_argument("--out", default=EstimateTable.DEFAULT_PATH)
+    parser.add_argument("--full", action="store_true", help="Recalcul complet (sinon incrémental)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from src.supabase_data_retriever import SupabaseDataRetriever
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    table = EstimateTable(args.out)
+    addresses = EstimatePrecomputer.load_addresses(args.ban, args.insee)
+    mutations = SupabaseDataRetriever().get_mutations_zone()
+
+    nb = EstimatePrecomputer(table).run(addresses, mutations, full=args.full)
+    print(f"[OK] {nb} adresses recalculées dans {args.out}")
+    table.close()
+
+
+if __name__ == "__main__":
+    main()
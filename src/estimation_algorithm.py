@@ -213,6 +213,245 @@ class SimilarityScorer:
             logger.error(f"Erreur calcul score comparable: {e}")
             return 0
 
+    @staticmethod
+    def compute_raw_features(
+        target_latitude: float,
+        target_longitude: float,
+        target_surface: float,
+        target_type: str,
+        comparables: List[Dict]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calcule en une passe les grandeurs brutes (indépendantes des poids et
+        des tolérances) pour une liste de comparables.
+
+        Returns:
+            Dict d'arrays (N,): distance_km, surface_ratio, type_score,
+            anciennete_score, valeurfonc
+        """
+        def to_float(val):
+            try:
+                return float(val) if val is not None else 0.0
+            except (TypeError, ValueError):
+                return 0.0
+
+        n = len(comparables)
+
+        def column(key, default=None):
+            valeurs = (to_float(c.get(key, default)) for c in comparables)
+            return np.fromiter(valeurs, dtype=float, count=n)
+
+        lats = column("latitude")
+        lons = column("longitude")
+        surfaces = column("sbati", 0)
+        prix = column("valeurfonc", 0)
+
+        distance_km = SimilarityScorer.haversine_distance_array(
+            to_float(target_latitude), to_float(target_longitude), lats, lons
+        )
+
+        target_surface = to_float(target_surface)
+        if target_surface > 0:
+            surface_ratio = np.where(surfaces > 0, surfaces / target_surface, np.nan)
+        else:
+            surface_ratio = np.full(n, np.nan)
+
+        type_score = np.fromiter(
+            (
+                SimilarityScorer.score_type(
+                    target_type,
+                    SimilarityScorer._normalize_property_type(c.get("libtypbien", "Inconnu"))
+                )
+                for c in comparables
+            ),
+            dtype=float,
+            count=n
+        )
+        anciennete_score = np.fromiter(
+            (SimilarityScorer.score_anciennete(c.get("datemut")) for c in comparables),
+            dtype=float,
+            count=n
+        )
+
+        return {
+            "distance_km": distance_km,
+            "surface_ratio": surface_ratio,
+            "type_score": type_score,
+            "anciennete_score": anciennete_score,
+            "valeurfonc": prix,
+        }
+
+    @staticmethod
+    def compute_column_features(
+        target_latitude: float,
+        target_longitude: float,
+        target_surface: float,
+        target_type: str,
+        columns: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Équivalent de compute_raw_features pour des comparables déjà en colonnes
+        (arrays NumPy : latitude, longitude, sbati, valeurfonc, libtypbien, datemut),
+        sans passer par un dict par ligne.
+
+        Returns:
+            Dict d'arrays (N,): distance_km, surface_ratio, type_score,
+            anciennete_score, valeurfonc
+        """
+        lats = np.asarray(columns["latitude"], dtype=float)
+        n = len(lats)
+        surfaces = np.nan_to_num(np.asarray(columns.get("sbati", np.zeros(n)), dtype=float))
+        prix = np.nan_to_num(np.asarray(columns.get("valeurfonc", np.zeros(n)), dtype=float))
+
+        distance_km = SimilarityScorer.haversine_distance_array(
+            float(target_latitude), float(target_longitude), lats,
+            np.asarray(columns["longitude"], dtype=float)
+        )
+
+        target_surface = float(target_surface or 0)
+        if target_surface > 0:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                surface_ratio = np.where(surfaces > 0, surfaces / target_surface, np.nan)
+        else:
+            surface_ratio = np.full(n, np.nan)
+
+        # Un score de type par libellé distinct, puis indexation
+        libelles = columns.get("libtypbien")
+        if libelles is None:
+            libelles = np.full(n, "Inconnu", dtype=object)
+        uniques, index_type = np.unique(
+            np.array([l if isinstance(l, str) else "" for l in libelles], dtype=object),
+            return_inverse=True
+        )
+        type_score = np.array([
+            SimilarityScorer.score_type(target_type, SimilarityScorer._normalize_property_type(u))
+            for u in uniques
+        ], dtype=float)[index_type] if n else np.zeros(0)
+
+        dates = columns.get("datemut")
+        if dates is not None:
+            anciennete_score = SimilarityScorer.score_anciennete_array(dates)
+        else:
+            anciennete_score = np.full(n, 50.0)
+
+        return {
+            "distance_km": distance_km,
+            "surface_ratio": surface_ratio,
+            "type_score": type_score,
+            "anciennete_score": anciennete_score,
+            "valeurfonc": prix,
+        }
+
+    @staticmethod
+    def score_anciennete_array(dates: np.ndarray) -> np.ndarray:
+        """
+        Version vectorisée de score_anciennete.
+        Accepte des dates AAAA-MM-JJ, JJ/MM/AAAA (format renvoyé par get_comparables)
+        ou datetime ; une date illisible vaut 50 comme dans la version scalaire.
+        """
+        dates = pd.Series(np.asarray(dates, dtype=object))
+        parsed = pd.to_datetime(dates, format="%Y-%m-%d", errors="coerce")
+        parsed = parsed.fillna(pd.to_datetime(dates, format="%d/%m/%Y", errors="coerce"))
+        mois = (pd.Timestamp(datetime.now()) - parsed).dt.days.to_numpy(dtype=float) / 30.44
+
+        with np.errstate(invalid="ignore"):
+            score = np.select(
+                [mois <= 12, mois <= 24, mois <= 36],
+                [100.0, 80 - (mois - 12) * (30 / 12), 50 - (mois - 24) * (50 / 12)],
+                0.0
+            )
+        return np.where(np.isnan(mois), 50.0, score)
+
+    @staticmethod
+    def calculate_scores_array(
+        target_latitude: float,
+        target_longitude: float,
+        target_surface: float,
+        target_type: str,
+        columns: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """
+        Version vectorisée de calculate_comparable_score : scores globaux (0-100)
+        de N comparables en colonnes, avec les poids et tolérances courants.
+        """
+        features = SimilarityScorer.compute_column_features(
+            target_latitude, target_longitude, target_surface, target_type, columns
+        )
+        scores = SimilarityScorer.sub_scores_matrix(features) @ SimilarityScorer.weights_vector()
+        return np.clip(scores, 0, 100)
+
+    @staticmethod
+    def score_distance_array(
+        distance_km: np.ndarray,
+        distance_max_km: Optional[float] = None
+    ) -> np.ndarray:
+        """Version vectorisée de score_distance"""
+        if distance_max_km is None:
+            distance_max_km = SimilarityScorer.DISTANCE_MAX_KM
+        distance_km = np.asarray(distance_km, dtype=float)
+        valid = (distance_km >= 0) & (distance_km < distance_max_km)
+        return np.where(valid, np.clip(100 * np.exp(-0.3 * distance_km), 0, 100), 0.0)
+
+    @staticmethod
+    def score_surface_array(
+        surface_ratio: np.ndarray,
+        tolerance: Optional[float] = None
+    ) -> np.ndarray:
+        """Version vectorisée de score_surface (à partir du ratio comparable / cible)"""
+        if tolerance is None:
+            tolerance = SimilarityScorer.SURFACE_TOLERANCE_PCT
+        surface_ratio = np.asarray(surface_ratio, dtype=float)
+        deviation = np.abs(surface_ratio - 1)
+        with np.errstate(invalid="ignore"):
+            inside = deviation <= tolerance
+        return np.where(inside, np.maximum(0, 100 * (1 - deviation / tolerance)), 0.0)
+
+    @staticmethod
+    def sub_scores_matrix(
+        features: Dict[str, np.ndarray],
+        surface_tolerance: Optional[float] = None,
+        distance_max_km: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Assemble la matrice (N, 4) des sous-scores dans l'ordre
+        distance, surface, type, ancienneté.
+        Le score global s'obtient par produit matriciel avec le vecteur de poids.
+        """
+        return np.column_stack([
+            SimilarityScorer.score_distance_array(features["distance_km"], distance_max_km),
+            SimilarityScorer.score_surface_array(features["surface_ratio"], surface_tolerance),
+            features["type_score"],
+            features["anciennete_score"],
+        ])
+
+    @staticmethod
+    def weights_vector() -> np.ndarray:
+        """Poids courants dans l'ordre de sub_scores_matrix"""
+        return np.array([
+            SimilarityScorer.DISTANCE_WEIGHT,
+            SimilarityScorer.SURFACE_WEIGHT,
+            SimilarityScorer.TYPE_WEIGHT,
+            SimilarityScorer.ANCIENNETE_WEIGHT,
+        ])
+
+    @staticmethod
+    def haversine_distance_array(
+        lat1: float,
+        lon1: float,
+        lat2: np.ndarray,
+        lon2: np.ndarray
+    ) -> np.ndarray:
+        """Version vectorisée de haversine_distance (un point vers N points)"""
+        R = 6371  # Rayon Terre en km
+
+        lat1_rad = np.radians(lat1)
+        lat2_rad = np.radians(lat2)
+        delta_lat = np.radians(np.asarray(lat2) - lat1)
+        delta_lon = np.radians(np.asarray(lon2) - lon1)
+
+        a = np.sin(delta_lat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2
+        return R * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
     @staticmethod
     def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calcule la distance en km entre deux points (lat, lon) via Haversine"""
@@ -233,6 +472,141 @@ class SimilarityScorer:
             return 999
 
 
+class ComparablesStats:
+    """
+    Accumulateur une passe (Welford) des statistiques des comparables valides.
+
+    Alimenté au fil du scoring par EstimationAlgorithm.estimate(), il fournit à
+    EstimationEngine, ConfidenceCalculator et au résumé des comparables toutes les
+    grandeurs nécessaires sans reparcourir la liste. Deux accumulateurs partiels
+    (scoring par blocs ou parallèle) se combinent avec merge().
+    """
+
+    def __init__(self, min_score: Optional[float] = None):
+        """
+        Args:
+            min_score: Score minimum d'un comparable valide
+                (default = EstimationEngine.MIN_COMPARABLE_SCORE)
+        """
+        self.min_score = EstimationEngine.MIN_COMPARABLE_SCORE if min_score is None else min_score
+
+        # Scores des comparables valides
+        self.nb_valides = 0
+        self.score_mean = 0.0
+        self.score_m2 = 0.0
+        self.score_min = math.inf
+        self.score_max = -math.inf
+
+        # Prix (> 0) des comparables valides
+        self.nb_prix = 0
+        self.prix_mean = 0.0
+        self.prix_m2 = 0.0
+        self.prix_min = math.inf
+        self.prix_max = -math.inf
+        self.somme_scores = 0.0          # Σ score (comparables avec prix)
+        self.somme_scores_prix = 0.0     # Σ score × prix
+        self.prix_valides: List[float] = []  # conservés pour les quartiles
+
+        # Ancienneté (mois) des comparables valides
+        self.nb_dates = 0
+        self.mois_mean = 0.0
+
+    @classmethod
+    def from_scored(
+        cls,
+        comparables_with_scores: List[Tuple[Dict, float]],
+        min_score: Optional[float] = None
+    ) -> "ComparablesStats":
+        """Construit l'accumulateur à partir d'une liste (comparable, score) déjà calculée"""
+        stats = cls(min_score)
+        for comparable, score in comparables_with_scores:
+            stats.add(comparable, score)
+        return stats
+
+    @staticmethod
+    def _mois_ecoules(date_mut) -> Optional[float]:
+        try:
+            if isinstance(date_mut, str):
+                date_mut = datetime.strptime(date_mut, "%Y-%m-%d")
+            return (datetime.now() - date_mut).days / 30.44
+        except Exception:
+            return None
+
+    def add(self, comparable: Dict, score: float) -> None:
+        """Ajoute un comparable scoré (ignoré si score < min_score)"""
+        if score < self.min_score:
+            return
+
+        self.nb_valides += 1
+        delta = score - self.score_mean
+        self.score_mean += delta / self.nb_valides
+        self.score_m2 += delta * (score - self.score_mean)
+        self.score_min = min(self.score_min, score)
+        self.score_max = max(self.score_max, score)
+
+        prix = comparable.get("valeurfonc")
+        if prix and prix > 0:
+            prix = float(prix)
+            self.nb_prix += 1
+            delta = prix - self.prix_mean
+            self.prix_mean += delta / self.nb_prix
+            self.prix_m2 += delta * (prix - self.prix_mean)
+            self.prix_min = min(self.prix_min, prix)
+            self.prix_max = max(self.prix_max, prix)
+            self.somme_scores += score
+            self.somme_scores_prix += score * prix
+            self.prix_valides.append(prix)
+
+        mois = self._mois_ecoules(comparable.get("datemut"))
+        if mois is not None:
+            self.nb_dates += 1
+            self.mois_mean += (mois - self.mois_mean) / self.nb_dates
+
+    def merge(self, other: "ComparablesStats") -> "ComparablesStats":
+        """Fusionne un accumulateur partiel (formule de Chan et al.) ; retourne self"""
+        def combine(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+            n = n_a + n_b
+            if n == 0:
+                return 0.0, 0.0
+            delta = mean_b - mean_a
+            return mean_a + delta * n_b / n, m2_a + m2_b + delta ** 2 * n_a * n_b / n
+
+        self.score_mean, self.score_m2 = combine(
+            self.nb_valides, self.score_mean, self.score_m2,
+            other.nb_valides, other.score_mean, other.score_m2
+        )
+        self.prix_mean, self.prix_m2 = combine(
+            self.nb_prix, self.prix_mean, self.prix_m2,
+            other.nb_prix, other.prix_mean, other.prix_m2
+        )
+        if self.nb_dates + other.nb_dates:
+            self.mois_mean = (
+                self.mois_mean * self.nb_dates + other.mois_mean * other.nb_dates
+            ) / (self.nb_dates + other.nb_dates)
+
+        self.nb_valides += other.nb_valides
+        self.nb_prix += other.nb_prix
+        self.nb_dates += other.nb_dates
+        self.score_min = min(self.score_min, other.score_min)
+        self.score_max = max(self.score_max, other.score_max)
+        self.prix_min = min(self.prix_min, other.prix_min)
+        self.prix_max = max(self.prix_max, other.prix_max)
+        self.somme_scores += other.somme_scores
+        self.somme_scores_prix += other.somme_scores_prix
+        self.prix_valides.extend(other.prix_valides)
+        return self
+
+    @property
+    def prix_std(self) -> float:
+        """Écart-type (population, comme np.std) des prix valides"""
+        return math.sqrt(self.prix_m2 / self.nb_prix) if self.nb_prix else 0.0
+
+    @property
+    def prix_pondere(self) -> Optional[float]:
+        """Moyenne des prix pondérée par les scores"""
+        return self.somme_scores_prix / self.somme_scores if self.somme_scores > 0 else None
+
+
 class EstimationEngine:
     """Moteur d'estimation basé sur comparables avec pondération par scores"""
 
@@ -240,24 +614,25 @@ class EstimationEngine:
 
     @staticmethod
     def calculate_estimation(
-        comparables_with_scores: List[Tuple[Dict, float]]
+        comparables_with_scores: List[Tuple[Dict, float]],
+        stats: Optional[ComparablesStats] = None
     ) -> Dict:
         """
         Calcule l'estimation du prix basée sur les comparables.
 
         Args:
             comparables_with_scores: List de tuples (comparable_dict, score)
+            stats: Accumulateur déjà alimenté (évite de reparcourir la liste)
 
         Returns:
             Dict avec keys: prix_estime, prix_min, prix_max, nb_comparables_utilises
         """
-        # Filtrer les comparables par score minimum
-        valides = [
-            (c, s) for c, s in comparables_with_scores
-            if s >= EstimationEngine.MIN_COMPARABLE_SCORE
-        ]
+        if stats is None:
+            stats = ComparablesStats.from_scored(
+                comparables_with_scores, EstimationEngine.MIN_COMPARABLE_SCORE
+            )
 
-        if not valides:
+        if not stats.nb_valides:
             return {
                 "prix_estime": None,
                 "prix_min": None,
@@ -266,17 +641,7 @@ class EstimationEngine:
                 "erreur": f"Pas de comparables valides (score >= {EstimationEngine.MIN_COMPARABLE_SCORE})"
             }
 
-        # Extraction prix et scores
-        prix_list = []
-        scores_list = []
-
-        for comparable, score in valides:
-            prix = comparable.get("valeurfonc")
-            if prix and prix > 0:
-                prix_list.append(prix)
-                scores_list.append(score)
-
-        if not prix_list:
+        if not stats.nb_prix:
             return {
                 "prix_estime": None,
                 "prix_min": None,
@@ -285,19 +650,15 @@ class EstimationEngine:
                 "erreur": "Aucun prix valide dans les comparables"
             }
 
-        # Calcul moyenne pondérée
-        prix_array = np.array(prix_list)
-        scores_array = np.array(scores_list)
-
-        # Normaliser scores pour pondération
-        weights = scores_array / scores_array.sum()
-        prix_estime = np.sum(prix_array * weights)
+        # Moyenne pondérée par les scores (Σ score × prix / Σ score)
+        prix_estime = stats.prix_pondere
+        prix_q1, prix_q3 = np.percentile(stats.prix_valides, [25, 75])
 
         return {
             "prix_estime": round(prix_estime),
-            "prix_min": round(np.percentile(prix_array, 25)),
-            "prix_max": round(np.percentile(prix_array, 75)),
-            "nb_comparables_utilises": len(prix_list),
+            "prix_min": round(prix_q1),
+            "prix_max": round(prix_q3),
+            "nb_comparables_utilises": stats.nb_prix,
             "erreur": None
         }
 
@@ -317,7 +678,8 @@ class ConfidenceCalculator:
 
     @staticmethod
     def calculate_confidence(
-        comparables_with_scores: List[Tuple[Dict, float]]
+        comparables_with_scores: List[Tuple[Dict, float]],
+        stats: Optional[ComparablesStats] = None
     ) -> Dict:
         """
         Calcule 4 scores de fiabilité :
@@ -326,16 +688,19 @@ class ConfidenceCalculator:
         3. Dispersion (25%) : Variance prix
         4. Ancienneté (15%) : Fraîcheur données
 
+        Args:
+            comparables_with_scores: List de tuples (comparable_dict, score)
+            stats: Accumulateur déjà alimenté (évite de reparcourir la liste)
+
         Returns:
             Dict avec keys: score_global, volume, similarite, dispersion, anciennete
         """
-        # Filtrer comparables valides
-        valides = [
-            (c, s) for c, s in comparables_with_scores
-            if s >= EstimationEngine.MIN_COMPARABLE_SCORE
-        ]
+        if stats is None:
+            stats = ComparablesStats.from_scored(
+                comparables_with_scores, EstimationEngine.MIN_COMPARABLE_SCORE
+            )
 
-        if not valides:
+        if not stats.nb_valides:
             return {
                 "score_global": 0,
                 "volume": 0,
@@ -347,7 +712,7 @@ class ConfidenceCalculator:
 
         # 1. Score Volume (30%)
         # Excellent : 10+, Bon : 5-9, Moyen : 3-4, Faible : 1-2
-        nb_comparables = len(valides)
+        nb_comparables = stats.nb_valides
         if nb_comparables >= 10:
             score_volume = 30
         elif nb_comparables >= 5:
@@ -358,8 +723,7 @@ class ConfidenceCalculator:
             score_volume = 5
 
         # 2. Score Similarité (30%)
-        scores = [s for _, s in valides]
-        score_moyen = np.mean(scores)
+        score_moyen = stats.score_mean
         # Pondération : score ≥70 = bon, ≥80 = très bon
         if score_moyen >= 80:
             score_similarite = 30
@@ -372,9 +736,8 @@ class ConfidenceCalculator:
 
         # 3. Score Dispersion (25%)
         # Faible dispersion = bon score
-        prix_list = [c.get("valeurfonc", 0) for c, _ in valides if c.get("valeurfonc", 0) > 0]
-        if len(prix_list) > 1:
-            coefficient_variation = np.std(prix_list) / np.mean(prix_list)
+        if stats.nb_prix > 1:
+            coefficient_variation = stats.prix_std / stats.prix_mean
             # CV < 0.15 = excellent, < 0.25 = bon
             if coefficient_variation < 0.15:
                 score_dispersion = 25
@@ -388,19 +751,8 @@ class ConfidenceCalculator:
             score_dispersion = 10
 
         # 4. Score Ancienneté (15%)
-        dates_list = []
-        for c, _ in valides:
-            try:
-                date_mut = c.get("datemut")
-                if isinstance(date_mut, str):
-                    date_mut = datetime.strptime(date_mut, "%Y-%m-%d")
-                mois_ecoulis = (datetime.now() - date_mut).days / 30.44
-                dates_list.append(mois_ecoulis)
-            except:
-                pass
-
-        if dates_list:
-            mois_moyen = np.mean(dates_list)
+        if stats.nb_dates:
+            mois_moyen = stats.mois_mean
             if mois_moyen <= 12:
                 score_anciennete = 15
             elif mois_moyen <= 24:
@@ -535,7 +887,8 @@ class EstimationAlgorithm:
             target_longitude: Longitude du bien cible
             target_surface: Surface m² du bien cible
             target_type: Type du bien cible (Appartement, Maison, etc.)
-            comparables: Liste de comparables (dict avec keys: latitude, longitude, sbati, libtypbien, datemut, valeurfonc)
+            comparables: Liste de comparables
+                (dict avec keys: latitude, longitude, sbati, libtypbien, datemut, valeurfonc)
 
         Returns:
             Dict complet avec estimation, fiabilité, prix au m², etc.
@@ -547,17 +900,19 @@ class EstimationAlgorithm:
             }
 
         try:
-            # Étape 1 : Scorer les comparables
+            # Étape 1 : Scorer les comparables (statistiques accumulées au fil de l'eau)
             comparables_scored = []
+            stats = ComparablesStats(self.engine.MIN_COMPARABLE_SCORE)
             for comparable in comparables:
                 score = self.scorer.calculate_comparable_score(
                     target_latitude, target_longitude, target_surface, target_type,
                     comparable
                 )
                 comparables_scored.append((comparable, score))
+                stats.add(comparable, score)
 
             # Étape 2 : Calculer l'estimation
-            estimation = self.engine.calculate_estimation(comparables_scored)
+            estimation = self.engine.calculate_estimation(comparables_scored, stats)
 
             if estimation["erreur"]:
                 return {
@@ -566,7 +921,7 @@ class EstimationAlgorithm:
                 }
 
             # Étape 3 : Calculer la fiabilité
-            confidence = self.confidence.calculate_confidence(comparables_scored)
+            confidence = self.confidence.calculate_confidence(comparables_scored, stats)
 
             # Étape 4 : Ajouter prix au m²
             if estimation["prix_estime"] and estimation["prix_estime"] > 0:
@@ -594,7 +949,7 @@ class EstimationAlgorithm:
                 },
                 "fiabilite": confidence,
                 "nb_comparables_utilises": estimation["nb_comparables_utilises"],
-                "comparables_summary": self._comparables_summary(comparables_scored),
+                "comparables_summary": self._comparables_summary(comparables_scored, stats),
                 "comparables_with_scores": [
                     {**c, "score": s} for c, s in comparables_scored
                 ],
@@ -607,20 +962,125 @@ class EstimationAlgorithm:
                 "erreur": str(e)
             }
 
-    def _comparables_summary(self, comparables_scored: List[Tuple[Dict, float]]) -> Dict:
+    def sweep(
+        self,
+        target: Dict,
+        comparables: List[Dict],
+        surfaces: Optional[List[float]] = None,
+        types: Optional[List[str]] = None,
+        radii: Optional[List[float]] = None
+    ) -> pd.DataFrame:
+        """
+        Estimation "what-if" sur toute la grille surfaces × types × rayons en une passe.
+
+        Les comparables (sur-ensemble couvrant le plus grand rayon) sont lus une seule
+        fois ; les scores sont calculés par broadcasting NumPy sur un tableau
+        (surfaces, types, rayons, comparables) avec les mêmes règles que estimate().
+
+        Args:
+            target: Dict avec keys: latitude, longitude, surface, type
+            comparables: Liste de comparables (mêmes keys que pour estimate)
+            surfaces: Surfaces cibles à tester (default = target["surface"])
+            types: Types cibles à tester (default = target["type"])
+            radii: Rayons de sélection en km (default = pas de filtre)
+
+        Returns:
+            DataFrame, une ligne par combinaison: surface_m2, type, rayon_km, prix_estime_eur,
+            prix_min_eur, prix_max_eur, prix_au_m2_eur, nb_comparables_utilises, score_moyen
+        """
+        if surfaces is None:
+            surfaces = [target["surface"]]
+        surfaces = np.asarray(surfaces, dtype=float)
+        types = list(types if types is not None else [target["type"]])
+        radii = np.asarray(radii if radii is not None else [np.inf], dtype=float)
+
+        grille = pd.MultiIndex.from_product(
+            [surfaces, types, radii], names=["surface_m2", "type", "rayon_km"]
+        ).to_frame(index=False)
+
+        if not comparables:
+            for col in ["prix_estime_eur", "prix_min_eur", "prix_max_eur", "prix_au_m2_eur",
+                        "score_moyen"]:
+                grille[col] = np.nan
+            grille["nb_comparables_utilises"] = 0
+            return grille
+
+        # Grandeurs indépendantes de la cible : une passe sur les comparables
+        features = self.scorer.compute_raw_features(
+            target["latitude"], target["longitude"], 1.0, "", comparables
+        )
+        sbati = features["surface_ratio"]  # ratio pour une surface cible de 1 m² = sbati
+        prix = features["valeurfonc"]
+        types_comparables = [
+            self.scorer._normalize_property_type(c.get("libtypbien", "Inconnu"))
+            for c in comparables
+        ]
+
+        # Sous-scores par axe (S surfaces, T types, R rayons, N comparables)
+        w_distance, w_surface, w_type, w_anciennete = self.scorer.weights_vector()
+        score_distance = self.scorer.score_distance_array(features["distance_km"])  # (N,)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = sbati[None, :] / surfaces[:, None]
+            score_surface = self.scorer.score_surface_array(ratios)                 # (S, N)
+        uniques = sorted(set(types_comparables))
+        index_type = np.array([uniques.index(t) for t in types_comparables])
+        score_type = np.array([
+            [self.scorer.score_type(t, u) for u in uniques] for t in types
+        ])[:, index_type]                                                           # (T, N)
+
+        scores = np.clip(
+            w_distance * score_distance
+            + w_surface * score_surface[:, None, :]
+            + w_type * score_type[None, :, :]
+            + w_anciennete * features["anciennete_score"],
+            0, 100
+        )[:, :, None, :]                                                            # (S, T, 1, N)
+        dans_rayon = features["distance_km"][None, :] <= radii[:, None]             # (R, N)
+
+        # Comparables valides (score, rayon) ; ceux avec un prix servent à l'estimation
+        retenus = (scores >= self.engine.MIN_COMPARABLE_SCORE) & dans_rayon[None, None, :, :]
+        valides = retenus & (prix > 0)                                              # (S, T, R, N)
+        poids = np.where(valides, scores, 0.0)
+        somme_poids = poids.sum(axis=-1)
+        nb = valides.sum(axis=-1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            prix_estime = (poids * prix).sum(axis=-1) / somme_poids
+            # Comme comparables_summary : moyenne sur tous les valides, avec ou sans prix
+            score_moyen = np.where(retenus, scores, 0.0).sum(axis=-1) / retenus.sum(axis=-1)
+        prix_valides = np.where(valides, prix, np.nan)
+        vides = nb == 0
+        prix_valides[vides] = 0.0  # évite les warnings nanpercentile, masqué ensuite
+        q25, q75 = np.nanpercentile(prix_valides, [25, 75], axis=-1)
+
+        def colonne(values):
+            return np.where(vides, np.nan, values).reshape(-1)
+
+        grille["prix_estime_eur"] = np.rint(colonne(prix_estime))
+        grille["prix_min_eur"] = np.rint(colonne(q25))
+        grille["prix_max_eur"] = np.rint(colonne(q75))
+        grille["prix_au_m2_eur"] = np.round(grille["prix_estime_eur"] / grille["surface_m2"], 2)
+        grille["nb_comparables_utilises"] = nb.reshape(-1)
+        grille["score_moyen"] = np.round(colonne(score_moyen), 1)
+        return grille
+
+    def _comparables_summary(
+        self,
+        comparables_scored: List[Tuple[Dict, float]],
+        stats: Optional[ComparablesStats] = None
+    ) -> Dict:
         """Résumé statistique des comparables"""
         try:
-            valides = [(c, s) for c, s in comparables_scored if s >= 40]
-            if not valides:
+            if stats is None:
+                stats = ComparablesStats.from_scored(comparables_scored, 40)
+            if not stats.nb_valides:
                 return {}
 
-            scores = [s for _, s in valides]
-
             return {
-                "score_moyen": round(np.mean(scores), 1),
-                "score_min": round(np.min(scores), 1),
-                "score_max": round(np.max(scores), 1),
-                "nb_comparables_utilises": len(valides)
+                "score_moyen": round(stats.score_mean, 1),
+                "score_min": round(stats.score_min, 1),
+                "score_max": round(stats.score_max, 1),
+                "nb_comparables_utilises": stats.nb_valides
             }
         except:
             return {}
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PriceGrid - Grille pré-calculée de prix au m² lissés (Chablais/Annemasse)
+Estimation provisoire instantanée dès le retour du géocodage
+
+Chaque cellule (200 m par défaut) contient, par type de bien, la moyenne des
+prix au m² des mutations DVF+ voisines pondérée par l'inverse de la distance.
+La grille est stockée dans un fichier .npz compact et interrogée en O(1) ;
+le résultat complet d'EstimationAlgorithm vient ensuite l'affiner.
+"""
+
+import argparse
+import logging
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.estimation_algorithm import SimilarityScorer
+
+logger = logging.getLogger(__name__)
+
+METRES_PAR_DEGRE_LAT = 111_320.0
+
+
+class PriceGrid:
+    """Grille (type, lat, lon) de prix au m² lissés par IDW"""
+
+    DEFAULT_PATH = "data/processed/price_grid_74.npz"
+    TYPES = ("Appartement", "Maison")
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        lat0: float,
+        lon0: float,
+        dlat: float,
+        dlon: float,
+        types: Sequence[str] = TYPES,
+        cell_m: float = 200.0
+    ):
+        """
+        Args:
+            values: Array float32 (nb_types, ny, nx), NaN = pas de donnée
+            lat0, lon0: Coin sud-ouest de la grille (WGS84)
+            dlat, dlon: Taille d'une cellule en degrés
+            types: Types de bien, dans l'ordre du premier axe de values
+            cell_m: Taille nominale d'une cellule en mètres
+        """
+        self.values = values
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.dlat = dlat
+        self.dlon = dlon
+        self.types = tuple(types)
+        self.cell_m = cell_m
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape[1:]
+
+    @classmethod
+    def build(
+        cls,
+        mutations: pd.DataFrame,
+        cell_m: float = 200.0,
+        radius_m: float = 1000.0,
+        power: float = 2.0,
+        bbox: Optional[Tuple[float, float, float, float]] = None
+    ) -> "PriceGrid":
+        """
+        Construit la grille à partir des mutations
+        (latitude, longitude, valeurfonc, sbati, libtypbien).
+
+        Les mutations sont d'abord agrégées par cellule, puis chaque cellule reçoit
+        la moyenne IDW (poids 1/d^power) des cellules situées à moins de radius_m.
+
+        Args:
+            mutations: Mutations DVF+ géolocalisées
+            cell_m: Taille des cellules en mètres
+            radius_m: Rayon de lissage en mètres
+            power: Exposant de l'inverse distance
+            bbox: (lat_min, lon_min, lat_max, lon_max), default = emprise des mutations
+        """
+        if mutations.empty:
+            raise ValueError("Aucune mutation exploitable pour construire la grille")
+        df = mutations[(mutations["valeurfonc"] > 0) & (mutations["sbati"] > 0)].copy()
+        df = df.dropna(subset=["latitude", "longitude"])
+        if df.empty:
+            raise ValueError("Aucune mutation exploitable pour construire la grille")
+
+        df["prix_m2"] = df["valeurfonc"] / df["sbati"]
+        df["type"] = df["libtypbien"].map(SimilarityScorer._normalize_property_type)
+
+        if bbox is None:
+            bbox = (
+                df["latitude"].min(), df["longitude"].min(),
+                df["latitude"].max(), df["longitude"].max()
+            )
+        lat_min, lon_min, lat_max, lon_max = bbox
+
+        dlat = cell_m / METRES_PAR_DEGRE_LAT
+        dlon = cell_m / (METRES_PAR_DEGRE_LAT * math.cos(math.radians((lat_min + lat_max) / 2)))
+        ny = int((lat_max - lat_min) / dlat) + 1
+        nx = int((lon_max - lon_min) / dlon) + 1
+
+        # Noyau IDW en unités de cellules (la cellule elle-même compte à d = 0.5)
+        rayon = max(1, int(math.ceil(radius_m / cell_m)))
+        offsets = [
+            (dy, dx, 1.0 / max(math.hypot(dy, dx), 0.5) ** power)
+            for dy in range(-rayon, rayon + 1)
+            for dx in range(-rayon, rayon + 1)
+            if math.hypot(dy, dx) <= rayon
+        ]
+
+        values = np.full((len(cls.TYPES), ny, nx), np.nan, dtype=np.float32)
+        for t, type_bien in enumerate(cls.TYPES):
+            sub = df[df["type"] == type_bien]
+            if sub.empty:
+                continue
+
+            # Écrêtage des prix au m² aberrants (ventes en bloc, erreurs de saisie)
+            bas, haut = np.percentile(sub["prix_m2"], [2, 98])
+            prix_m2 = sub["prix_m2"].clip(bas, haut).to_numpy()
+            iy = np.floor((sub["latitude"].to_numpy() - lat_min) / dlat).astype(int)
+            ix = np.floor((sub["longitude"].to_numpy() - lon_min) / dlon).astype(int)
+            inside = (iy >= 0) & (iy < ny) & (ix >= 0) & (ix < nx)
+
+            sommes = np.zeros((ny, nx))
+            nombres = np.zeros((ny, nx))
+            np.add.at(sommes, (iy[inside], ix[inside]), prix_m2[inside])
+            np.add.at(nombres, (iy[inside], ix[inside]), 1)
+
+            sommes = np.pad(sommes, rayon)
+            nombres = np.pad(nombres, rayon)
+            numerateur = np.zeros((ny, nx))
+            denominateur = np.zeros((ny, nx))
+            for dy, dx, poids in offsets:
+                fenetre = (slice(rayon + dy, rayon + dy + ny), slice(rayon + dx, rayon + dx + nx))
+                numerateur += poids * sommes[fenetre]
+                denominateur += poids * nombres[fenetre]
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values[t] = np.where(denominateur > 0, numerateur / denominateur, np.nan)
+
+        logger.info(
+            f"PriceGrid construite: {ny}x{nx} cellules de {cell_m:.0f} m, {len(df)} mutations"
+        )
+        return cls(values, lat_min, lon_min, dlat, dlon, cls.TYPES, cell_m)
+
+    def save(self, path: str = DEFAULT_PATH) -> None:
+        """Sauvegarde la grille au format .npz compressé"""
+        np.savez_compressed(
+            path,
+            values=self.values,
+            geometry=np.array([self.lat0, self.lon0, self.dlat, self.dlon, self.cell_m]),
+            types=np.array(self.types),
+        )
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "PriceGrid":
+        """Charge une grille sauvegardée par save()"""
+        with np.load(path) as data:
+            lat0, lon0, dlat, dlon, cell_m = data["geometry"]
+            types = [str(t) for t in data["types"]]
+            return cls(data["values"], lat0, lon0, dlat, dlon, types, cell_m)
+
+    def prix_m2(self, latitude: float, longitude: float, type_bien: str) -> Optional[float]:
+        """Prix au m² lissé de la cellule du point (None si hors grille ou sans donnée)"""
+        if type_bien == "Studio":
+            type_bien = "Appartement"
+        if type_bien not in self.types:
+            return None
+
+        # floor (et non int) : un point juste au sud / à l'ouest de l'origine est hors grille
+        iy = math.floor((latitude - self.lat0) / self.dlat)
+        ix = math.floor((longitude - self.lon0) / self.dlon)
+        ny, nx = self.shape
+        if not (0 <= iy < ny and 0 <= ix < nx):
+            return None
+
+        value = self.values[self.types.index(type_bien), iy, ix]
+        return None if np.isnan(value) else float(value)
+
+    def provisional_estimate(
+        self,
+        latitude: float,
+        longitude: float,
+        surface: float,
+        type_bien: str
+    ) -> Optional[Dict]:
+        """
+        Estimation provisoire instantanée (prix au m² de la cellule × surface).
+
+        Returns:
+            Dict avec prix_estime_eur, prix_au_m2_eur, provisoire=True ; None si pas de donnée
+        """
+        prix_m2 = self.prix_m2(latitude, longitude, type_bien)
+        if prix_m2 is None or surface <= 0:
+            return None
+        return {
+            "prix_estime_eur": round(prix_m2 * surface),
+            "prix_au_m2_eur": round(prix_m2, 2),
+            "provisoire": True,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Construit la grille de prix au m² depuis Supabase"
+    )
+    parser.add_argument("--out", default=PriceGrid.DEFAULT_PATH)
+    parser.add_argument("--cell-m", type=float, default=200.0)
+    parser.add_argument("--radius-m", type=float, default=1000.0)
+    parser.add_argument("--annees", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from src.supabase_data_retriever import SupabaseDataRetriever
+
+    mutations = SupabaseDataRetriever().get_mutations_zone(annees=args.annees)
+    grid = PriceGrid.build(mutations, cell_m=args.cell_m, radius_m=args.radius_m)
+    grid.save(args.out)
+    print(f"[OK] Grille {grid.shape} sauvegardée dans {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ScoringTuner - Recherche en grille des poids et tolérances de SimilarityScorer
+Backtest leave-one-out sur mutations DVF+ réelles
+
+Les sous-scores (distance, surface, type, ancienneté) ne dépendent pas des poids :
+ils sont calculés une seule fois par couple (cible, comparable) puis chaque
+vecteur de poids ne coûte qu'un produit matriciel. Les configurations sont
+réparties sur plusieurs processus.
+"""
+
+import argparse
+import itertools
+import logging
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.estimation_algorithm import EstimationEngine, SimilarityScorer
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_COLUMNS = ["distance_weight", "surface_weight", "type_weight", "anciennete_weight"]
+
+# Distances max balayées par défaut (le cache doit couvrir la plus grande)
+DISTANCES_MAX_KM = (5.0, 10.0, 15.0, 20.0)
+
+
+@dataclass
+class SubScoreCache:
+    """
+    Grandeurs brutes de tous les couples (cible, comparable) du backtest,
+    concaténées cas par cas (offsets = début de chaque cas).
+    """
+
+    distance_km: np.ndarray
+    surface_ratio: np.ndarray
+    type_score: np.ndarray
+    anciennete_score: np.ndarray
+    valeurfonc: np.ndarray
+    offsets: np.ndarray
+    prix_reels: np.ndarray
+    rayon_max_km: float = SimilarityScorer.DISTANCE_MAX_KM  # rayon de collecte des voisins
+
+    @property
+    def nb_cas(self) -> int:
+        return len(self.offsets)
+
+    def features(self) -> Dict[str, np.ndarray]:
+        """Vue dict compatible avec SimilarityScorer.sub_scores_matrix"""
+        return {
+            "distance_km": self.distance_km,
+            "surface_ratio": self.surface_ratio,
+            "type_score": self.type_score,
+            "anciennete_score": self.anciennete_score,
+        }
+
+    def save(self, path: str) -> None:
+        """Sauvegarde le cache (npz compressé) pour relancer le tuning sans recalcul"""
+        np.savez_compressed(path, **self.__dict__)
+
+    @classmethod
+    def load(cls, path: str) -> "SubScoreCache":
+        with np.load(path) as data:
+            return cls(**{key: data[key] for key in data.files})
+
+
+# Cache partagé par les processus workers (initialisé une fois par processus)
+_WORKER_CACHE: Optional[SubScoreCache] = None
+
+
+def _init_worker(cache: SubScoreCache) -> None:
+    global _WORKER_CACHE
+    _WORKER_CACHE = cache
+
+
+def _evaluate_chunk(
+    surface_tolerance: float,
+    distance_max_km: float,
+    weights: np.ndarray
+) -> np.ndarray:
+    """
+    Évalue un bloc de vecteurs de poids (K, 4) pour un couple de tolérances.
+
+    Returns:
+        Array (K, 4) : mape, median_ape, couverture, nb comparables moyen
+    """
+    cache = _WORKER_CACHE
+    sub_scores = SimilarityScorer.sub_scores_matrix(
+        cache.features(), surface_tolerance, distance_max_km
+    )
+    scores = np.clip(sub_scores @ weights.T, 0, 100)  # (M, K)
+
+    valid = (scores >= EstimationEngine.MIN_COMPARABLE_SCORE) & (cache.valeurfonc[:, None] > 0)
+    poids = np.where(valid, scores, 0.0)
+
+    somme_poids = np.add.reduceat(poids, cache.offsets, axis=0)  # (C, K)
+    somme_prix = np.add.reduceat(poids * cache.valeurfonc[:, None], cache.offsets, axis=0)
+    nb_utilises = np.add.reduceat(valid.astype(np.int32), cache.offsets, axis=0)
+
+    couverts = somme_poids > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        estimations = somme_prix / somme_poids
+        ape = np.abs(estimations - cache.prix_reels[:, None]) / cache.prix_reels[:, None]
+    ape = np.where(couverts, ape, np.nan)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # colonnes sans aucun cas couvert
+        mape = np.nanmean(ape, axis=0)
+        median_ape = np.nanmedian(ape, axis=0)
+
+    return np.column_stack([
+        mape,
+        median_ape,
+        couverts.mean(axis=0),
+        nb_utilises.mean(axis=0),
+    ])
+
+
+class ScoringTuner:
+    """
+    Grid search des paramètres de SimilarityScorer sur un backtest leave-one-out :
+    chaque mutation est estimée à partir de ses voisines, puis comparée à son prix réel.
+    """
+
+    def __init__(self, n_jobs: int = 1, chunk_size: int = 64):
+        """
+        Args:
+            n_jobs: Nombre de processus (1 = exécution dans le processus courant)
+            chunk_size: Nombre de vecteurs de poids évalués par tâche
+        """
+        self.n_jobs = max(1, n_jobs)
+        self.chunk_size = max(1, chunk_size)
+
+    @staticmethod
+    def build_cache(
+        mutations: pd.DataFrame,
+        max_candidats: int = 50,
+        rayon_max_km: Optional[float] = None,
+        max_cas: Optional[int] = None,
+        seed: int = 0
+    ) -> SubScoreCache:
+        """
+        Construit le cache des sous-scores à partir d'un DataFrame de mutations
+        (colonnes: latitude, longitude, sbati, valeurfonc, libtypbien, datemut).
+
+        Args:
+            mutations: Mutations DVF+ servant à la fois de cibles et de comparables
+            max_candidats: Nombre max de voisins conservés par cible (les plus proches)
+            rayon_max_km: Rayon de recherche des voisins (default = DISTANCE_MAX_KM)
+            max_cas: Échantillonne au plus max_cas cibles
+            seed: Graine de l'échantillonnage
+        """
+        if rayon_max_km is None:
+            rayon_max_km = SimilarityScorer.DISTANCE_MAX_KM
+
+        mutations = mutations[
+            (mutations["valeurfonc"] > 0) & (mutations["sbati"] > 0)
+        ].reset_index(drop=True)
+        records = mutations.to_dict("records")
+        lats = mutations["latitude"].astype(float).to_numpy()
+        lons = mutations["longitude"].astype(float).to_numpy()
+
+        indices = np.arange(len(records))
+        if max_cas is not None and max_cas < len(indices):
+            indices = np.random.default_rng(seed).choice(indices, size=max_cas, replace=False)
+
+        blocs = {
+            key: [] for key in
+            ["distance_km", "surface_ratio", "type_score", "anciennete_score", "valeurfonc"]
+        }
+        offsets, prix_reels = [], []
+        position = 0
+
+        for i in indices:
+            cible = records[i]
+            distances = SimilarityScorer.haversine_distance_array(lats[i], lons[i], lats, lons)
+            distances[i] = np.inf  # leave-one-out
+            voisins = np.flatnonzero(distances <= rayon_max_km)
+            if len(voisins) == 0:
+                continue
+            voisins = voisins[np.argsort(distances[voisins])[:max_candidats]]
+
+            features = SimilarityScorer.compute_raw_features(
+                cible["latitude"], cible["longitude"], cible["sbati"],
+                SimilarityScorer._normalize_property_type(cible.get("libtypbien", "")),
+                [records[j] for j in voisins]
+            )
+            for key in blocs:
+                blocs[key].append(features[key])
+            offsets.append(position)
+            prix_reels.append(float(cible["valeurfonc"]))
+            position += len(voisins)
+
+        if not offsets:
+            raise ValueError("Aucun cas de backtest (pas de voisins dans le rayon)")
+
+        logger.info(f"Cache sous-scores: {len(offsets)} cas, {position} couples")
+        return SubScoreCache(
+            **{key: np.concatenate(value) for key, value in blocs.items()},
+            offsets=np.array(offsets, dtype=np.int64),
+            prix_reels=np.array(prix_reels),
+            rayon_max_km=float(rayon_max_km),
+        )
+
+    @staticmethod
+    def weight_grid(step: float = 0.1) -> np.ndarray:
+        """Tous les vecteurs de poids (4,) de somme 1 sur une grille de pas `step`"""
+        n = int(round(1 / step))
+        grid = [
+            (a, b, c, n - a - b - c)
+            for a, b, c in itertools.product(range(n + 1), repeat=3)
+            if a + b + c <= n
+        ]
+        return np.array(grid, dtype=float) / n
+
+    def run(
+        self,
+        cache: SubScoreCache,
+        weights: Optional[np.ndarray] = None,
+        surface_tolerances: Sequence[float] = (0.10, 0.15, 0.20, 0.25, 0.30),
+        distances_max_km: Sequence[float] = DISTANCES_MAX_KM,
+    ) -> pd.DataFrame:
+        """
+        Évalue toutes les combinaisons poids × tolérances.
+
+        Returns:
+            DataFrame (une ligne par configuration) avec les poids, les tolérances,
+            mape, median_ape, couverture et nb_comparables_moyen
+
+        Raises:
+            ValueError: Si une distance max dépasse le rayon de collecte du cache
+                (ses voisins au-delà manqueraient, la configuration serait faussée)
+        """
+        distance_max = max(distances_max_km)
+        if distance_max > cache.rayon_max_km:
+            raise ValueError(
+                f"distance_max_km {distance_max} > rayon du cache ({cache.rayon_max_km} km) : "
+                f"reconstruire le cache avec rayon_max_km={distance_max}"
+            )
+        if weights is None:
+            weights = self.weight_grid()
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+
+        taches = [
+            (tolerance, distance_max, weights[start:start + self.chunk_size])
+            for tolerance, distance_max in itertools.product(surface_tolerances, distances_max_km)
+            for start in range(0, len(weights), self.chunk_size)
+        ]
+        nb_configurations = len(weights) * len(surface_tolerances) * len(distances_max_km)
+        logger.info(
+            f"Tuning: {nb_configurations} configurations, "
+            f"{len(taches)} tâches sur {self.n_jobs} processus"
+        )
+
+        if self.n_jobs == 1:
+            _init_worker(cache)
+            metriques = [_evaluate_chunk(*tache) for tache in taches]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.n_jobs, initializer=_init_worker, initargs=(cache,)
+            ) as executor:
+                metriques = list(executor.map(_evaluate_chunk, *zip(*taches)))
+
+        lignes = []
+        for (tolerance, distance_max, bloc), bloc_metriques in zip(taches, metriques):
+            for poids, (mape, median_ape, couverture, nb_moyen) in zip(bloc, bloc_metriques):
+                lignes.append({
+                    **dict(zip(WEIGHT_COLUMNS, poids)),
+                    "surface_tolerance_pct": tolerance,
+                    "distance_max_km": distance_max,
+                    "mape": mape,
+                    "median_ape": median_ape,
+                    "couverture": couverture,
+                    "nb_comparables_moyen": nb_moyen,
+                })
+
+        return pd.DataFrame(lignes)
+
+    @staticmethod
+    def pareto_front(results: pd.DataFrame) -> pd.DataFrame:
+        """
+        Front de Pareto précision / volume : configurations pour lesquelles aucune
+        autre n'a à la fois une erreur (mape) plus faible et plus de comparables
+        utilisés (donc une fiabilité « volume » plus élevée).
+        """
+        candidats = results.dropna(subset=["mape"]).sort_values(
+            ["mape", "nb_comparables_moyen"], ascending=[True, False]
+        )
+        front = []
+        meilleur_volume = -np.inf
+        for index, nb_moyen in candidats["nb_comparables_moyen"].items():
+            if nb_moyen > meilleur_volume:
+                front.append(index)
+                meilleur_volume = nb_moyen
+        return candidats.loc[front].reset_index(drop=True)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Grid search des paramètres de SimilarityScorer")
+    parser.add_argument(
+        "mutations_csv",
+        help="CSV de mutations (latitude, longitude, sbati, valeurfonc, libtypbien, datemut)"
+    )
+    parser.add_argument(
+        "--out", default="scoring_tuning.csv", help="CSV de sortie (toutes les configurations)"
+    )
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--max-cas", type=int, default=2000)
+    parser.add_argument("--step", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    mutations = pd.read_csv(args.mutations_csv)
+    cache = ScoringTuner.build_cache(
+        mutations, rayon_max_km=max(DISTANCES_MAX_KM), max_cas=args.max_cas
+    )
+
+    tuner = ScoringTuner(n_jobs=args.jobs)
+    results = tuner.run(cache, weights=ScoringTuner.weight_grid(args.step))
+    results.to_csv(args.out, index=False)
+
+    front = ScoringTuner.pareto_front(results)
+    print(f"\n[OK] {len(results)} configurations évaluées, front de Pareto ({len(front)}):")
+    print(front.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,18 @@ load_dotenv()
 # Initialize Lambert93 to WGS84 transformer globally
 _TRANSFORMER_2154_4326 = Transformer.from_crs('EPSG:2154', 'EPSG:4326')
 
+# Colonnes renvoyées par get_mutations_zone (même en cas d'erreur)
+MUTATIONS_ZONE_COLUMNS = [
+    'idmutation', 'datemut', 'valeurfonc', 'sbati', 'libtypbien', 'latitude', 'longitude'
+]
+
+# Filtres libtypbien par type de bien (get_comparables, get_comparables_bulk)
+TYPE_PATTERNS = {
+    "Appartement": ("%APPARTEMENT%", "%STUDIO%"),
+    "Maison": ("%MAISON%", "%VILLA%"),
+    "Terrain": ("%TERRAIN%", "%PARCELLE%")
+}
+
 
 class SupabaseDataRetriever:
     """
@@ -84,15 +96,8 @@ class SupabaseDataRetriever:
                     LIMIT :limit
                 """)
 
-                # Build type filter patterns
-                type_patterns = {
-                    "Appartement": ("%APPARTEMENT%", "%STUDIO%"),
-                    "Maison": ("%MAISON%", "%VILLA%"),
-                    "Terrain": ("%TERRAIN%", "%PARCELLE%")
-                }
-
-                if type_bien in type_patterns:
-                    type_pattern, type_pattern2 = type_patterns[type_bien]
+                if type_bien in TYPE_PATTERNS:
+                    type_pattern, type_pattern2 = TYPE_PATTERNS[type_bien]
                 else:
                     type_pattern, type_pattern2 = ("%", "%")
 
@@ -220,6 +225,138 @@ class SupabaseDataRetriever:
 
         return R * c
 
+    def get_mutations_zone(self, annees: int = 5, coddep: str = "74") -> pd.DataFrame:
+        """
+        Récupère en bloc toutes les mutations géolocalisées de la zone
+        (pré-calculs hors ligne).
+        La projection Lambert 93 → WGS84 est faite par PostGIS, sans reverse geocoding.
+
+        Args:
+            annees: Nombre d'années historique à considérer
+            coddep: Code département
+
+        Returns:
+            DataFrame avec colonnes: idmutation, datemut, valeurfonc, sbati, libtypbien,
+            latitude, longitude
+        """
+
+        try:
+            with self.engine.connect() as conn:
+                query = text("""
+                    SELECT
+                        idmutation,
+                        datemut,
+                        valeurfonc,
+                        sbati,
+                        libtypbien,
+                        ST_Y(ST_Transform(geomlocmut, 4326)) as latitude,
+                        ST_X(ST_Transform(geomlocmut, 4326)) as longitude
+                    FROM dvf_plus_2025_2.dvf_plus_mutation
+                    WHERE coddep = :coddep
+                      AND sbati > 0
+                      AND valeurfonc > 0
+                      AND datemut IS NOT NULL
+                      AND geomlocmut IS NOT NULL
+                      AND datemut >= CURRENT_DATE - (:annees * 365)::integer * INTERVAL '1 day'
+                """)
+
+                result = conn.execute(query, {'coddep': coddep, 'annees': annees})
+                df = pd.DataFrame(result.fetchall(), columns=result.keys())
+
+                for col in ['valeurfonc', 'sbati', 'latitude', 'longitude']:
+                    df[col] = df[col].astype(float)
+                if len(df) > 0:
+                    df['datemut'] = pd.to_datetime(df['datemut']).dt.strftime('%Y-%m-%d')
+
+                return df
+
+        except Exception as e:
+            print(f"[ERROR] Erreur get_mutations_zone: {e}")
+            return pd.DataFrame(columns=MUTATIONS_ZONE_COLUMNS)
+
+    def get_comparables_bulk(
+        self,
+        latitude: float,
+        longitude: float,
+        type_bien: str = "Appartement",
+        surface_min: float = 50,
+        surface_max: float = 150,
+        rayon_km: float = 10.0,
+        annees: int = 3,
+        limit: int = 30
+    ) -> pd.DataFrame:
+        """
+        Comparables les plus proches en une requête, pour les workflows compound.
+        Le rayon est filtré par PostGIS (ST_DWithin en Lambert 93, index spatial) et la
+        projection WGS84 est faite en SQL, sans reverse geocoding. Les erreurs de base
+        de données sont propagées pour que les retries et le circuit breaker s'appliquent.
+
+        Args:
+            latitude: Latitude WGS84
+            longitude: Longitude WGS84
+            type_bien: Type de bien ('Appartement', 'Maison' ou 'Terrain')
+            surface_min: Surface minimale en m²
+            surface_max: Surface maximale en m²
+            rayon_km: Rayon de recherche en kilomètres
+            annees: Nombre d'années historique à considérer
+            limit: Nombre maximal de résultats
+
+        Returns:
+            DataFrame trié par distance avec les colonnes de get_mutations_zone,
+            distance_km et prix_m2
+        """
+        type_pattern, type_pattern2 = TYPE_PATTERNS.get(type_bien, ("%", "%"))
+
+        with self.engine.connect() as conn:
+            query = text("""
+                WITH cible AS (
+                    SELECT ST_Transform(
+                        ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326), 2154
+                    ) AS geom
+                )
+                SELECT
+                    m.idmutation,
+                    m.datemut,
+                    m.valeurfonc,
+                    m.sbati,
+                    m.libtypbien,
+                    ST_Y(ST_Transform(m.geomlocmut, 4326)) as latitude,
+                    ST_X(ST_Transform(m.geomlocmut, 4326)) as longitude,
+                    ST_Distance(m.geomlocmut, cible.geom) / 1000.0 as distance_km
+                FROM dvf_plus_2025_2.dvf_plus_mutation m, cible
+                WHERE ST_DWithin(m.geomlocmut, cible.geom, :rayon_m)
+                  AND m.sbati >= :surface_min
+                  AND m.sbati <= :surface_max
+                  AND m.valeurfonc > 0
+                  AND m.datemut IS NOT NULL
+                  AND m.datemut >= CURRENT_DATE - (:annees * 365)::integer * INTERVAL '1 day'
+                  AND (m.libtypbien LIKE :type_pattern OR m.libtypbien LIKE :type_pattern2)
+                ORDER BY distance_km
+                LIMIT :limit
+            """)
+
+            result = conn.execute(query, {
+                'latitude': latitude,
+                'longitude': longitude,
+                'rayon_m': rayon_km * 1000,
+                'surface_min': surface_min,
+                'surface_max': surface_max,
+                'annees': annees,
+                'type_pattern': type_pattern,
+                'type_pattern2': type_pattern2,
+                'limit': limit
+            })
+            df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+        if df.empty:
+            return pd.DataFrame(columns=MUTATIONS_ZONE_COLUMNS + ['distance_km', 'prix_m2'])
+
+        for col in ['valeurfonc', 'sbati', 'latitude', 'longitude', 'distance_km']:
+            df[col] = df[col].astype(float)
+        df['datemut'] = pd.to_datetime(df['datemut']).dt.strftime('%Y-%m-%d')
+        df['prix_m2'] = df['valeurfonc'] / df['sbati']
+        return df
+
     def get_market_stats(self, code_postal: str) -> Dict:
         """
         Retourne statistiques de marché pour un code postal.
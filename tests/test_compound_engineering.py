@@ -8,17 +8,80 @@ Tests core functionality:
 """
 
 import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
 import pytest
 
+from src.compound_ai import (
+    AIBatcher,
+    AIClient,
+    AIPrompt,
+    AIResponseCache,
+    StubAIProvider,
+    reset_ai_clients,
+    set_ai_client,
+)
+from src.compound_cache import ResultCache, stable_hash
+from src.compound_metrics import LatencyHistogram, RollingStats
+from src.compound_payloads import ColumnarPayload
+from src.compound_queue import JobQueue, JobStatus, QueueWorker, WorkerPool
+from src.compound_runlog import RunLog
+from src.compound_resilience import CircuitBreaker, CircuitState, RetryPolicy
+from src.compound_scheduler import Priority, RateLimiter, TokenBucket
+from src.compound_sources import (
+    SNAPSHOT_ENV_VAR,
+    SnapshotComparablesSource,
+    SupabaseComparablesSource,
+    set_comparables_source,
+)
+from src.compound_tracing import Tracer, trace_span
 from src.compound_engineering import (
+    BlockingComponent,
     Component,
     ComponentResult,
     ComponentStatus,
     ComponentType,
     CompoundSystem,
+    ConcurrencyLimit,
+    ExecutionMode,
     Workflow,
     WorkflowContext,
 )
+from src.compound_workflows import create_advanced_estimation_workflow
+from src.estimation_algorithm import SimilarityScorer
+
+
+def make_mutations(n=60):
+    """Synthetic recent mutations around the placeholder geocode."""
+    rng = np.random.default_rng(0)
+    dates = pd.Timestamp.now().normalize() - pd.to_timedelta(
+        rng.integers(30, 700, n), unit="D"
+    )
+    surfaces = rng.uniform(60, 140, n).round(1)
+    return pd.DataFrame(
+        {
+            "idmutation": [f"m{i}" for i in range(n)],
+            "datemut": dates.strftime("%Y-%m-%d"),
+            "valeurfonc": (surfaces * rng.uniform(4000, 6000, n)).round(),
+            "sbati": surfaces,
+            "libtypbien": np.where(
+                np.arange(n) % 4 == 0, "UNE MAISON", "UN APPARTEMENT"
+            ),
+            "latitude": 46.2044 + rng.uniform(-0.03, 0.03, n),
+            "longitude": 6.1432 + rng.uniform(-0.03, 0.03, n),
+        }
+    )
+
+
+@pytest.fixture(autouse=True)
+def comparables_snapshot():
+    """Serve comparables from a snapshot instead of Supabase."""
+    set_comparables_source(SnapshotComparablesSource(make_mutations()))
+    yield
+    set_comparables_source(None)
 
 
 class TestComponent:
@@ -356,5 +419,1510 @@ class TestWorkflowContext:
         assert context.get_data("nonexistent") is None
 
 
+class SleepComponent(Component):
+    """Component sleeping for a fixed delay, recording concurrency."""
+
+    active = 0
+    peak = 0
+
+    def __init__(self, name, delay=0.05, deps=(), **kwargs):
+        super().__init__(name, ComponentType.ANALYZER, **kwargs)
+        self.delay = delay
+        for dep in deps:
+            self.add_dependency(dep)
+
+    async def execute(self, context):
+        SleepComponent.active += 1
+        SleepComponent.peak = max(SleepComponent.peak, SleepComponent.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            SleepComponent.active -= 1
+        return ComponentResult(
+            component_name=self.name,
+            status=ComponentStatus.SUCCESS,
+            data={"name": self.name},
+        )
+
+
+def build_diamond(max_concurrency=None, concurrency_limit=None):
+    """root -> (a, b, c) -> sink."""
+    workflow = Workflow(
+        "diamond",
+        max_concurrency=max_concurrency,
+        concurrency_limit=concurrency_limit,
+    )
+    workflow.add_component(SleepComponent("root", 0.01))
+    for name in ("a", "b", "c"):
+        workflow.add_component(SleepComponent(name, 0.1, deps=["root"]))
+    workflow.add_component(SleepComponent("sink", 0.01, deps=["a", "b", "c"]))
+    return workflow
+
+
+class TestConcurrentExecution:
+    """Test DAG scheduling of independent branches."""
+
+    def setup_method(self):
+        SleepComponent.active = 0
+        SleepComponent.peak = 0
+
+    @pytest.mark.asyncio
+    async def test_independent_branches_run_concurrently(self):
+        """Wall-clock time follows the critical path."""
+        start = time.perf_counter()
+        context = await build_diamond().execute({})
+        elapsed = time.perf_counter() - start
+
+        assert all(
+            r.is_success() for r in context.intermediate_results.values()
+        )
+        assert SleepComponent.peak == 3
+        assert elapsed < 0.25
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """max_concurrency bounds components in flight."""
+        context = await build_diamond(max_concurrency=2).execute({})
+
+        assert context.get_result("sink").is_success()
+        assert SleepComponent.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_limit(self):
+        """A shared ConcurrencyLimit bounds all workflows together."""
+        limit = ConcurrencyLimit(2)
+        contexts = await asyncio.gather(
+            build_diamond(concurrency_limit=limit).execute({}),
+            build_diamond(concurrency_limit=limit).execute({}),
+        )
+
+        assert all(c.get_result("sink").is_success() for c in contexts)
+        assert SleepComponent.peak == 2
+
+
+class TestTimeouts:
+    """Test per-component timeouts and workflow deadlines."""
+
+    @pytest.mark.asyncio
+    async def test_component_timeout(self):
+        """A slow component is cut off and its dependents skipped."""
+        workflow = Workflow("timeouts")
+        workflow.add_component(SleepComponent("slow", 1.0, timeout_s=0.05))
+        workflow.add_component(SleepComponent("after", 0.01, deps=["slow"]))
+
+        start = time.perf_counter()
+        context = await workflow.execute({})
+
+        assert time.perf_counter() - start < 0.5
+        assert context.get_result("slow").is_timed_out()
+        assert context.get_result("after").status == ComponentStatus.SKIPPED
+
+    @pytest.mark.asyncio
+    async def test_deadline_cancels_in_flight(self):
+        """The workflow deadline bounds components without a timeout."""
+        workflow = Workflow("deadline")
+        workflow.add_component(SleepComponent("fast", 0.01))
+        workflow.add_component(SleepComponent("slow", 1.0))
+
+        start = time.perf_counter()
+        context = await workflow.execute({}, deadline_s=0.1)
+
+        assert time.perf_counter() - start < 0.5
+        assert context.get_result("fast").is_success()
+        assert context.get_result("slow").is_timed_out()
+        assert not workflow.is_successful(context)
+
+    @pytest.mark.asyncio
+    async def test_optional_component_skipped_without_budget(self):
+        """Optional components do not start when they cannot finish."""
+        workflow = Workflow("optional", deadline_s=0.2)
+        workflow.add_component(SleepComponent("core", 0.01))
+        workflow.add_component(
+            SleepComponent(
+                "ai", 1.0, deps=["core"], timeout_s=5.0, optional=True
+            )
+        )
+
+        context = await workflow.execute({})
+
+        assert context.get_result("ai").status == ComponentStatus.SKIPPED
+        assert context.get_result("ai").error == "Insufficient time budget"
+        assert workflow.is_successful(context)
+
+    def test_context_remaining_time(self):
+        """Contexts without a deadline are unbounded."""
+        context = WorkflowContext(workflow_id="t", user_input={})
+        assert context.remaining_time() is None
+        assert not context.is_expired()
+
+        context.deadline = time.monotonic() - 1
+        assert context.remaining_time() == 0.0
+        assert context.is_expired()
+
+
+class CountingComponent(Component):
+    """Cacheable component counting its real executions."""
+
+    def __init__(self, name, deps=(), **kwargs):
+        super().__init__(
+            name,
+            ComponentType.DATA_PROCESSOR,
+            cacheable=True,
+            input_fields=("address",),
+            **kwargs,
+        )
+        self.calls = 0
+        for dep in deps:
+            self.add_dependency(dep)
+
+    async def execute(self, context):
+        self.calls += 1
+        return ComponentResult(
+            component_name=self.name,
+            status=ComponentStatus.SUCCESS,
+            data={"address": context.user_input.get("address")},
+        )
+
+
+class TestResultCache:
+    """Test memoization of cacheable component results."""
+
+    def build(self, cache, name="cached"):
+        workflow = Workflow(name, result_cache=cache)
+        geo = CountingComponent("geo")
+        retriever = CountingComponent("retriever", deps=["geo"])
+        workflow.add_component(geo).add_component(retriever)
+        return workflow, geo, retriever
+
+    @pytest.mark.asyncio
+    async def test_repeated_input_hits_cache(self):
+        """Second run with the same input skips both components."""
+        cache = ResultCache()
+        workflow, geo, retriever = self.build(cache)
+
+        first = await workflow.execute({"address": "Thonon"})
+        second = await workflow.execute({"address": "Thonon"})
+
+        assert geo.calls == 1 and retriever.calls == 1
+        assert first.get_result("geo").metadata["cache"] == "miss"
+        assert second.get_result("retriever").metadata["cache"] == "hit"
+        assert second.get_data("retriever") == {"address": "Thonon"}
+
+    @pytest.mark.asyncio
+    async def test_overlapping_workflows_share_cache(self):
+        """A different workflow reuses the shared prefix."""
+        cache = ResultCache()
+        workflow_a, _, _ = self.build(cache, "a")
+        workflow_b, geo_b, _ = self.build(cache, "b")
+
+        await workflow_a.execute({"address": "Evian"})
+        await workflow_b.execute({"address": "Evian"})
+        await workflow_b.execute({"address": "Annemasse"})
+
+        assert geo_b.calls == 1
+        assert cache.get_status()["hits"] == 2
+
+    def test_lru_eviction_and_ttl(self):
+        """Entries are evicted by size and expire after their TTL."""
+        cache = ResultCache(max_size=2, ttl_s=60)
+        result = ComponentResult("c", ComponentStatus.SUCCESS)
+
+        cache.put("a", result)
+        cache.put("b", result)
+        assert cache.get("a") is not None
+        cache.put("c", result)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+        cache.put("d", result, ttl_s=0)
+        assert cache.get("d") is None
+        assert cache.get_status()["expirations"] == 1
+
+    def test_keys_hash_full_content(self):
+        """Arrays and frames hash by content; unknown types raise."""
+        values = np.arange(5000.0)
+        changed = values.copy()
+        changed[2500] = -1.0
+
+        assert repr(values) == repr(changed)
+        assert stable_hash({"x": values}) != stable_hash({"x": changed})
+        assert stable_hash(pd.DataFrame({"x": values})) != stable_hash(
+            pd.DataFrame({"x": changed})
+        )
+        assert stable_hash(np.arange(3)) != stable_hash(np.arange(3.0))
+        with pytest.raises(TypeError):
+            stable_hash({"x": object()})
+
+    @pytest.mark.asyncio
+    async def test_same_name_different_component_does_not_collide(self):
+        """Cache keys include the component class and configuration."""
+
+        class ConfiguredComponent(CountingComponent):
+            def __init__(self, factor):
+                super().__init__("geo")
+                self.factor = factor
+
+            def cache_config(self):
+                return {"factor": self.factor}
+
+        cache = ResultCache()
+        contexts = []
+        for component in (
+            CountingComponent("geo"),
+            ConfiguredComponent(1),
+            ConfiguredComponent(2),
+            ConfiguredComponent(2),
+        ):
+            workflow = Workflow("w", result_cache=cache)
+            workflow.add_component(component)
+            context = await workflow.execute({"address": "Thonon"})
+            contexts.append(context.get_result("geo").metadata["cache"])
+
+        assert contexts == ["miss", "miss", "miss", "hit"]
+
+    @pytest.mark.asyncio
+    async def test_unhashable_input_runs_uncached(self):
+        """Inputs that cannot be hashed by content skip the cache."""
+        workflow, geo, _ = self.build(ResultCache())
+        context = await workflow.execute({"address": object()})
+
+        assert context.get_result("geo").is_success()
+        assert "cache" not in context.get_result("geo").metadata
+
+
+class BusyComponent(BlockingComponent):
+    """Blocks its worker for the requested duration."""
+
+    def build_payload(self, context):
+        return {"seconds": context.user_input.get("seconds", 0.1)}
+
+    @staticmethod
+    def compute(payload):
+        time.sleep(payload["seconds"])
+        return {"slept": payload["seconds"]}
+
+
+class TestBlockingComponent:
+    """Test offloading of blocking component bodies."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "mode", [ExecutionMode.THREAD, ExecutionMode.PROCESS]
+    )
+    async def test_event_loop_stays_responsive(self, mode):
+        """The loop keeps serving other components while compute runs."""
+        workflow = Workflow("blocking")
+        workflow.add_component(
+            BusyComponent("busy", ComponentType.ANALYZER, execution_mode=mode)
+        )
+        workflow.add_component(SleepComponent("ticker", 0.01))
+
+        ticks = []
+
+        async def heartbeat():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        context, _ = await asyncio.gather(
+            workflow.execute({"seconds": 0.2}), heartbeat()
+        )
+
+        assert context.get_data("busy") == {"slept": 0.2}
+        assert context.get_result("busy").metadata["execution_mode"] == (
+            mode.value
+        )
+        assert ticks[-1] - ticks[0] < 0.15
+
+    @pytest.mark.asyncio
+    async def test_payload_short_circuit(self):
+        """build_payload may return a result without computing."""
+
+        class MissingInput(BusyComponent):
+            def build_payload(self, context):
+                return ComponentResult(
+                    component_name=self.name,
+                    status=ComponentStatus.FAILED,
+                    error="missing",
+                )
+
+        workflow = Workflow("short")
+        workflow.add_component(MissingInput("busy", ComponentType.ANALYZER))
+
+        context = await workflow.execute({})
+
+        assert context.get_result("busy").error == "missing"
+
+
+class TestExecuteMany:
+    """Test batch execution through CompoundSystem.execute_many."""
+
+    def setup_method(self):
+        SleepComponent.active = 0
+        SleepComponent.peak = 0
+        self.system = CompoundSystem()
+        workflow = Workflow("batch")
+        workflow.add_component(SleepComponent("step", 0.01))
+        self.system.register_workflow(workflow)
+
+    @pytest.mark.asyncio
+    async def test_all_inputs_processed(self):
+        """Every input yields exactly one context."""
+        inputs = [{"row": i} for i in range(20)]
+
+        indices = [
+            context.metadata["batch_index"]
+            async for context in self.system.execute_many(
+                "batch", inputs, max_concurrency=4
+            )
+        ]
+
+        assert sorted(indices) == list(range(20))
+        assert SleepComponent.peak == 4
+
+    @pytest.mark.asyncio
+    async def test_backpressure_bounds_consumption(self):
+        """Inputs are only pulled as fast as results are consumed."""
+        pulled = 0
+
+        def rows():
+            nonlocal pulled
+            for i in range(100_000):
+                pulled += 1
+                yield {"row": i}
+
+        results = self.system.execute_many("batch", rows(), max_concurrency=2)
+        async for _ in results:
+            if SleepComponent.peak and pulled >= 5:
+                break
+        await results.aclose()
+
+        assert pulled < 20
+
+    @pytest.mark.asyncio
+    async def test_async_inputs_and_unknown_workflow(self):
+        """Async iterables are accepted; unknown workflows are rejected."""
+
+        async def rows():
+            for i in range(3):
+                yield {"row": i}
+
+        contexts = [
+            c async for c in self.system.execute_many("batch", rows())
+        ]
+        assert len(contexts) == 3
+
+        with pytest.raises(ValueError):
+            async for _ in self.system.execute_many("missing", []):
+                pass
+
+
+class QueryComponent(SleepComponent):
+    """Opens a sub-step span around its work."""
+
+    async def execute(self, context):
+        with trace_span("sql", rows=3):
+            return await super().execute(context)
+
+
+class TestTracing:
+    """Test span trees recorded by Workflow.execute."""
+
+    @pytest.mark.asyncio
+    async def test_span_tree_and_chrome_export(self, tmp_path):
+        """Workflow, component and sub-step spans are exported."""
+        tracer = Tracer(sample_rate=1.0)
+        workflow = Workflow("traced", tracer=tracer)
+        workflow.add_component(SleepComponent("a", 0.02))
+        workflow.add_component(QueryComponent("b", 0.02))
+
+        context = await workflow.execute({})
+
+        trace = tracer.get_trace(context.metadata["trace_id"])
+        assert trace.root.name == "workflow:traced"
+        assert trace.root.attributes["success"] is True
+        components = trace.children(trace.root)
+        assert {span.name for span in components} == {"a", "b"}
+        assert len({span.lane for span in components}) == 2
+
+        sql = trace.find("sql")
+        assert sql.parent_id == trace.find("b").span_id
+        assert sql.lane == trace.find("b").lane
+        assert trace.find("b").attributes["status"] == "success"
+
+        path = tmp_path / "trace.json"
+        assert tracer.export_chrome_trace(str(path)) == 1
+        events = json.loads(path.read_text())["traceEvents"]
+        assert {e["name"] for e in events if e["ph"] == "X"} == {
+            "workflow:traced",
+            "a",
+            "b",
+            "sql",
+        }
+
+    @pytest.mark.asyncio
+    async def test_unsampled_execution(self):
+        """Unsampled executions record nothing and sub-spans are no-ops."""
+        tracer = Tracer(sample_rate=0.0)
+        workflow = Workflow("untraced", tracer=tracer)
+        workflow.add_component(QueryComponent("b", 0.01))
+
+        context = await workflow.execute({})
+
+        assert context.get_result("b").is_success()
+        assert "trace_id" not in context.metadata
+        assert len(tracer.traces) == 0
+
+
+class TestMetrics:
+    """Test streaming latency histograms and bounded history."""
+
+    def test_histogram_percentiles(self):
+        """Percentiles are within the bucket relative error."""
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.record(float(value))
+
+        assert histogram.percentile(50) == pytest.approx(500, rel=0.1)
+        assert histogram.percentile(99) == pytest.approx(990, rel=0.1)
+        assert histogram.mean_ms == pytest.approx(500.5)
+
+    def test_rolling_window_expires(self):
+        """Samples leave the window but stay in lifetime totals."""
+        now = [0.0]
+        stats = RollingStats(window_s=10, slices=5, clock=lambda: now[0])
+        stats.record(10.0, True)
+        stats.record(20.0, False)
+
+        snapshot = stats.snapshot()
+        assert snapshot["count"] == 2
+        assert snapshot["success_rate"] == 0.5
+
+        now[0] = 15.0
+        stats.record(30.0, True)
+        snapshot = stats.snapshot()
+        assert snapshot["count"] == 1
+        assert snapshot["p50_ms"] == pytest.approx(30, rel=0.1)
+        assert snapshot["total"] == 3
+
+    @pytest.mark.asyncio
+    async def test_system_status_and_bounded_history(self):
+        """History is a ring buffer; status exposes per-component stats."""
+        system = CompoundSystem(history_size=3)
+        workflow = Workflow("metered")
+        workflow.add_component(SleepComponent("step", 0.001))
+        system.register_workflow(workflow)
+
+        for _ in range(5):
+            await system.execute_workflow("metered", {})
+
+        status = system.get_system_status()
+        assert len(system.execution_history) == 3
+        assert status["executions"] == 5
+        assert status["success_rate"] == 1.0
+        component = status["metrics"]["components"]["metered.step"]
+        assert component["count"] == 5
+        assert component["p95_ms"] >= 1.0
+
+
+class TestExecuteStream:
+    """Test streaming of component results."""
+
+    @pytest.mark.asyncio
+    async def test_results_stream_in_completion_order(self):
+        """Fast results arrive before slow enrichment finishes."""
+        workflow = Workflow("streamed")
+        workflow.add_component(SleepComponent("estimation", 0.01))
+        workflow.add_component(
+            SleepComponent("formatter", 0.01, deps=["estimation"])
+        )
+        workflow.add_component(SleepComponent("ai", 0.2))
+
+        start = time.perf_counter()
+        arrivals = {}
+        async for result in workflow.execute_stream({}):
+            arrivals[result.component_name] = time.perf_counter() - start
+
+        assert list(arrivals) == ["estimation", "formatter", "ai"]
+        assert arrivals["formatter"] < 0.1
+
+    @pytest.mark.asyncio
+    async def test_stream_fills_context_and_yields_skips(self):
+        """stream() records results in the context, skipped ones included."""
+        workflow = Workflow("streamed")
+        workflow.add_component(SleepComponent("a", 0.01))
+        workflow.add_component(SleepComponent("b", 0.01, deps=["a"]))
+        workflow.components["a"].enabled = False
+
+        context = workflow.create_context({"x": 1})
+        statuses = [r.status async for r in workflow.stream(context)]
+
+        assert statuses == [ComponentStatus.SKIPPED, ComponentStatus.SKIPPED]
+        assert set(context.intermediate_results) == {"a", "b"}
+
+    @pytest.mark.asyncio
+    async def test_closing_stream_cancels_running(self):
+        """Abandoning the stream cancels remaining components."""
+        SleepComponent.active = 0
+        workflow = Workflow("streamed")
+        workflow.add_component(SleepComponent("fast", 0.01))
+        workflow.add_component(SleepComponent("slow", 5.0))
+
+        results = workflow.execute_stream({})
+        first = await results.__anext__()
+        await results.aclose()
+        await asyncio.sleep(0)
+
+        assert first.component_name == "fast"
+        assert SleepComponent.active == 0
+
+
+class TestCoalescing:
+    """Test single-flight coalescing of identical requests."""
+
+    def build(self, coalesce):
+        system = CompoundSystem()
+        workflow = Workflow("estimate", coalesce=coalesce)
+        workflow.add_component(SleepComponent("step", 0.05))
+        system.register_workflow(workflow)
+        return system
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_share_execution(self):
+        """Equivalent inputs run once and share component results."""
+        system = self.build(coalesce=True)
+
+        inputs = [
+            {"address": "1 rue X", "surface": 80},
+            {"address": " 1 RUE  x", "surface": 80.0},
+            {"address": "2 rue Y", "surface": 80},
+        ]
+        contexts = await asyncio.gather(
+            *(system.execute_workflow("estimate", i) for i in inputs)
+        )
+
+        assert contexts[1].get_result("step") is contexts[0].get_result(
+            "step"
+        )
+        assert contexts[1].user_input == inputs[1]
+        assert contexts[1].metadata["coalesced_into"] == (
+            contexts[0].workflow_id
+        )
+        assert "coalesced_into" not in contexts[0].metadata
+        assert contexts[2].get_result("step") is not (
+            contexts[0].get_result("step")
+        )
+        status = system.get_system_status()
+        assert status["executions"] == 2
+        assert status["metrics"]["counters"]["coalesced.estimate"] == 1
+
+    @pytest.mark.asyncio
+    async def test_duplicate_batch_inputs_keep_their_index(self):
+        """Coalesced batch items each keep their own index and id."""
+        system = self.build(coalesce=True)
+        inputs = [{"address": "A"}, {"address": "B"}, {"address": "a"}]
+
+        contexts = [
+            context
+            async for context in system.execute_many(
+                "estimate", inputs, max_concurrency=3
+            )
+        ]
+
+        by_index = {c.metadata["batch_index"]: c for c in contexts}
+        assert sorted(by_index) == [0, 1, 2]
+        assert [by_index[i].workflow_id for i in range(3)] == [
+            "estimate-0",
+            "estimate-1",
+            "estimate-2",
+        ]
+        assert by_index[2].metadata["coalesced_into"] == "estimate-0"
+        assert system.get_system_status()["executions"] == 2
+
+    @pytest.mark.asyncio
+    async def test_coalescing_is_opt_in(self):
+        """Workflows without coalesce run every request."""
+        system = self.build(coalesce=False)
+
+        contexts = await asyncio.gather(
+            *(system.execute_workflow("estimate", {"a": 1}) for _ in range(3))
+        )
+
+        assert len({id(c) for c in contexts}) == 3
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """One caller giving up leaves the shared execution running."""
+        system = self.build(coalesce=True)
+
+        first, second = (
+            asyncio.ensure_future(system.execute_workflow("estimate", {}))
+            for _ in range(2)
+        )
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        context = await second
+        assert context.get_result("step").is_success()
+        assert system._in_flight == {}
+
+
+class FlakyComponent(Component):
+    """Fails a given number of times before succeeding."""
+
+    def __init__(self, failures, **kwargs):
+        super().__init__("flaky", ComponentType.RETRIEVER, **kwargs)
+        self.failures = failures
+        self.calls = 0
+
+    async def execute(self, context):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("service unavailable")
+        return ComponentResult(
+            component_name=self.name, status=ComponentStatus.SUCCESS
+        )
+
+
+FAST_RETRY = RetryPolicy(max_attempts=3, base_delay_s=0.001)
+
+
+class TestResilience:
+    """Test retries with backoff and circuit breaking."""
+
+    @pytest.mark.asyncio
+    async def test_idempotent_component_retried(self):
+        """Transient failures are retried up to max_attempts."""
+        flaky = FlakyComponent(2, retry_policy=FAST_RETRY, idempotent=True)
+        context = await Workflow("retry").add_component(flaky).execute({})
+
+        result = context.get_result("flaky")
+        assert result.is_success()
+        assert result.metadata["attempts"] == 3
+
+    @pytest.mark.asyncio
+    async def test_non_idempotent_component_not_retried(self):
+        """Retries require the idempotent flag."""
+        flaky = FlakyComponent(1, retry_policy=FAST_RETRY)
+        context = await Workflow("retry").add_component(flaky).execute({})
+
+        assert context.get_result("flaky").is_error()
+        assert flaky.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self):
+        """Once open, the breaker rejects calls without executing."""
+        breaker = CircuitBreaker("service", failure_threshold=2)
+        flaky = FlakyComponent(10, circuit_breaker=breaker)
+        workflow = Workflow("breaker").add_component(flaky)
+
+        for _ in range(3):
+            context = await workflow.execute({})
+
+        assert flaky.calls == 2
+        assert breaker.state == CircuitState.OPEN
+        assert context.get_result("flaky").metadata["circuit"] == "open"
+
+    @pytest.mark.asyncio
+    async def test_limiter_wait_does_not_trip_breaker(self):
+        """Deadlines spent waiting for a token are not service failures."""
+        now = [0.0]
+        breaker = CircuitBreaker(
+            "svc", failure_threshold=2, reset_timeout_s=10,
+            clock=lambda: now[0],
+        )
+        flaky = FlakyComponent(0, circuit_breaker=breaker, resource="svc")
+        limiter = RateLimiter()
+        limiter.configure("svc", rate_per_s=0.01, burst=1)
+        workflow = Workflow("limited", rate_limiter=limiter)
+        workflow.add_component(flaky)
+
+        await workflow.execute({})  # takes the only token
+        for _ in range(2):
+            context = await workflow.execute({}, deadline_s=0.05)
+            assert context.get_result("flaky").is_timed_out()
+
+        assert flaky.calls == 1
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.consecutive_failures == 0
+
+        # A half-open probe that never reached the service is given back
+        breaker.record_failure()
+        breaker.record_failure()
+        now[0] = 11
+        await workflow.execute({}, deadline_s=0.05)
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request()
+
+    def test_breaker_half_open_recovery(self):
+        """After the reset timeout one probe decides the state."""
+        now = [0.0]
+        breaker = CircuitBreaker(
+            "service", failure_threshold=1, reset_timeout_s=10,
+            clock=lambda: now[0],
+        )
+        breaker.record_failure()
+        assert not breaker.allow_request()
+
+        now[0] = 11
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+
+        now[0] = 22
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_backoff_is_capped_and_jittered(self):
+        """Delays grow exponentially up to max_delay_s."""
+        policy = RetryPolicy(base_delay_s=0.1, max_delay_s=0.5)
+        upper = lambda low, high: high
+
+        assert policy.delay(1, upper) == pytest.approx(0.1)
+        assert policy.delay(3, upper) == pytest.approx(0.4)
+        assert policy.delay(10, upper) == pytest.approx(0.5)
+        assert 0 <= policy.delay(2) <= 0.2
+
+
+class TestRateLimiting:
+    """Test token buckets and priority admission."""
+
+    def test_token_bucket(self):
+        """Burst is served at once, then tokens refill at the rate."""
+        now = [0.0]
+        bucket = TokenBucket(rate_per_s=2, burst=2, clock=lambda: now[0])
+
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == pytest.approx(0.5)
+        now[0] = 0.5
+        assert bucket.try_acquire() == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_overtakes_batch(self):
+        """Queued interactive calls are admitted before batch calls."""
+        limiter = RateLimiter().configure("ai", rate_per_s=50, burst=1)
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        await limiter.acquire()  # drain the burst
+        batch = [
+            asyncio.create_task(call(f"batch{i}", Priority.BATCH))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(
+            call("interactive", Priority.INTERACTIVE)
+        )
+        await asyncio.gather(*batch, interactive)
+
+        assert order[0] == "interactive"
+        status = limiter.get_status()
+        assert status["admitted"] == 5
+        assert status["max_queue_depth"] == 4
+        assert status["queue_depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_overtaken_head_is_woken(self):
+        """A sleeping head is woken when a higher priority call arrives."""
+        limiter = RateLimiter().configure("ai", rate_per_s=2, burst=1)
+        await limiter.acquire()  # drain the burst
+        batch = asyncio.create_task(limiter.acquire(Priority.BATCH))
+        await asyncio.sleep(0.01)
+        (head,) = limiter._queue
+        assert not head.event.is_set()
+
+        interactive = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter._queue[0] is not head
+        assert head.event.is_set()
+        batch.cancel()
+        await interactive
+
+    @pytest.mark.asyncio
+    async def test_workflow_components_rate_limited(self):
+        """Components are limited by resource name, then by type."""
+        limiter = RateLimiter()
+        limiter.configure("geo", rate_per_s=20, burst=1)
+        workflow = Workflow("limited", rate_limiter=limiter)
+        for i in range(3):
+            workflow.add_component(
+                SleepComponent(f"c{i}", 0.0, resource="geo")
+            )
+        system = CompoundSystem().register_workflow(workflow)
+
+        start = time.perf_counter()
+        await system.execute_workflow("limited", {})
+
+        assert time.perf_counter() - start >= 0.09
+        assert system.get_system_status()["rate_limits"]["geo"][
+            "admitted"
+        ] == 3
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_wait_respects_deadline(self):
+        """A call that cannot get a token in time times out."""
+        limiter = RateLimiter()
+        limiter.configure("analyzer", rate_per_s=1, burst=1)
+        workflow = Workflow("limited", rate_limiter=limiter)
+        workflow.add_component(SleepComponent("first", 0.0))
+        workflow.add_component(SleepComponent("second", 0.0))
+
+        context = await workflow.execute({}, deadline_s=0.1)
+
+        statuses = {r.status for r in context.intermediate_results.values()}
+        assert statuses == {ComponentStatus.SUCCESS, ComponentStatus.TIMED_OUT}
+
+
+class TestExecutionPlan:
+    """Test compiled, cached execution plans."""
+
+    @pytest.mark.asyncio
+    async def test_plan_reused_across_executions(self):
+        """The plan is compiled once for many executions."""
+        workflow = build_diamond()
+        plan = workflow.compile()
+
+        assert plan.levels == (("root",), ("a", "b", "c"), ("sink",))
+        assert plan.dependents["root"] == ("a", "b", "c")
+        assert plan.dependencies["sink"] == ("a", "b", "c")
+
+        calls = []
+        original = workflow.resolve_dependencies
+        workflow.resolve_dependencies = lambda: calls.append(1) or original()
+        await workflow.execute({})
+        await workflow.execute({})
+
+        assert calls == []
+        assert workflow.compile() is plan
+
+    def test_graph_changes_invalidate_plan(self):
+        """add_component and add_dependency trigger recompilation."""
+        workflow = build_diamond()
+        plan = workflow.compile()
+
+        extra = SleepComponent("extra", 0.01)
+        workflow.add_component(extra)
+        with_extra = workflow.compile()
+        assert with_extra is not plan
+        assert "extra" in with_extra.roots
+
+        extra.add_dependency("sink")
+        assert workflow.compile().levels[-1] == ("extra",)
+
+    def test_plan_is_immutable(self):
+        """Plans cannot be modified by executions."""
+        plan = build_diamond().compile()
+
+        with pytest.raises(TypeError):
+            plan.dependents["root"] = ()
+        with pytest.raises(AttributeError):
+            plan.order = ()
+
+
+class TestRerun:
+    """Test incremental recompute with Workflow.rerun."""
+
+    @pytest.mark.asyncio
+    async def test_only_affected_components_rerun(self):
+        """Changing surface keeps geocoding."""
+        from src.compound_workflows import WorkflowFactory
+
+        workflow = WorkflowFactory.create_property_estimation_workflow()
+        workflow.result_cache = ResultCache()
+        first = await workflow.execute(
+            {"address": "12 rue du Lac, Thonon", "surface": 100}
+        )
+
+        second = await workflow.rerun(
+            first, {"address": "12 rue du Lac, Thonon", "surface": 80}
+        )
+
+        reused = {
+            name
+            for name, result in second.intermediate_results.items()
+            if result.metadata.get("reused")
+        }
+        # The retriever reads surface too (it selects comparables by size)
+        assert reused == {"geocoding"}
+        assert second.get_result("scoring").metadata["target_surface"] == 80
+        assert not first.get_result("geocoding").metadata.get("reused")
+
+    @pytest.mark.asyncio
+    async def test_undeclared_inputs_always_rerun(self):
+        """Components without input_fields rerun on any change."""
+        workflow = Workflow("partial", result_cache=ResultCache())
+        declared = CountingComponent("declared")
+        undeclared = CountingComponent("undeclared")
+        undeclared.cacheable = False
+        undeclared.input_fields = None
+        workflow.add_component(declared).add_component(undeclared)
+
+        first = await workflow.execute({"address": "A", "surface": 1})
+        second = await workflow.rerun(first, {"address": "A", "surface": 2})
+        await workflow.rerun(second, {"address": "A", "surface": 2})
+
+        assert declared.calls == 1
+        assert undeclared.calls == 2
+        assert second.user_input["surface"] == 2
+
+
+class TestColumnarPayload:
+    """Test columnar payloads passed between components."""
+
+    def test_columns_are_read_only_views(self):
+        """Payload wraps frame columns without copying and freezes them."""
+        frame = pd.DataFrame({"price": [1.0, 2.0], "surface": [10.0, 20.0]})
+        payload = ColumnarPayload.from_frame(frame)
+
+        assert np.shares_memory(payload["price"], frame["price"].to_numpy())
+        with pytest.raises(ValueError):
+            payload["price"][0] = 5.0
+        assert payload.to_records()[1] == {"price": 2.0, "surface": 20.0}
+
+    def test_derived_payloads_share_columns(self):
+        """with_columns shares untouched columns; take reorders rows."""
+        payload = ColumnarPayload({"id": np.array([1, 2, 3])})
+        scored = payload.with_columns(score=[0.5, 0.9, 0.1])
+
+        assert scored["id"] is not payload["id"]
+        assert np.shares_memory(scored["id"], payload["id"])
+        assert scored.take([1, 0, 2])["id"].tolist() == [2, 1, 3]
+        assert "score" not in payload
+        with pytest.raises(ValueError):
+            payload.with_columns(score=[1.0])
+
+    def test_fingerprint_survives_pickling(self):
+        """Content hash is stable and unpickled payloads stay read-only."""
+        import pickle
+
+        payload = ColumnarPayload.from_records(
+            [{"address": "A", "price": 1}, {"address": "B", "price": 2}]
+        )
+        copy = pickle.loads(pickle.dumps(payload))
+
+        assert copy == payload
+        assert copy.fingerprint() == payload.fingerprint()
+        assert not copy["price"].flags.writeable
+
+    def test_arrow_round_trip(self):
+        """Arrow tables convert both ways when pyarrow is installed."""
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({"price": [1.0, 2.0]})
+
+        payload = ColumnarPayload.coerce(table)
+
+        assert payload["price"].tolist() == [1.0, 2.0]
+        assert payload.to_arrow().equals(table)
+
+    @pytest.mark.asyncio
+    async def test_workflow_passes_payload_by_reference(self):
+        """Scoring reads the retriever payload without per-row dicts."""
+        from src.compound_workflows import WorkflowFactory
+
+        workflow = WorkflowFactory.create_property_estimation_workflow()
+        for name in ("scoring", "estimation"):
+            workflow.components[name].execution_mode = ExecutionMode.THREAD
+
+        context = await workflow.execute(
+            {"address": "Thonon", "surface": 110}
+        )
+
+        retrieved = context.get_data("data_retriever")
+        scored = context.get_data("scoring")["scored_properties"]
+        assert isinstance(retrieved["comparable_properties"], ColumnarPayload)
+        assert len(scored) == retrieved["count"] > 0
+        assert scored["score"].tolist() == sorted(
+            scored["score"].tolist(), reverse=True
+        )
+        assert context.get_data("estimation")["comparables_count"] == (
+            len(scored)
+        )
+
+    def test_estimation_reliability(self):
+        """Confidence is computed over the comparables actually used."""
+        from src.compound_components import EstimationComponent
+        from src.estimation_algorithm import (
+            ComparablesStats,
+            ConfidenceCalculator,
+        )
+
+        frame = make_mutations(12)
+        frame.loc[0, "sbati"] = 0  # no usable price per m²
+        frame["score"] = np.linspace(90, 60, len(frame))
+        data = EstimationComponent.compute(
+            {
+                "properties": ColumnarPayload.from_frame(frame),
+                "target_surface": 100,
+            }
+        )
+
+        used = frame.iloc[1:]
+        expected = ConfidenceCalculator.calculate_confidence(
+            [], ComparablesStats.from_scored(
+                list(zip(used.to_dict("records"), used["score"]))
+            )
+        )
+        assert data["comparables_count"] == 11
+        assert data["fiabilite"] == expected
+        assert data["confidence"] == expected["score_global"] / 100
+
+
+class TestConditionalBranches:
+    """Test run conditions (conditional edges)."""
+
+    @pytest.mark.asyncio
+    async def test_false_condition_skips_branch(self):
+        """A false predicate skips the component and its dependents."""
+        tracer = Tracer(sample_rate=1.0)
+        workflow = Workflow(
+            "branching", result_cache=ResultCache(), tracer=tracer
+        )
+        core = CountingComponent("core")
+        research = CountingComponent("research").run_if(
+            lambda ctx: ctx.get_data("core")["address"] != "known",
+            reason="already known",
+            after=("core",),
+        )
+        summary = CountingComponent("summary", deps=("research",))
+        workflow.add_component(core).add_component(research)
+        workflow.add_component(summary)
+
+        context = await workflow.execute({"address": "known"})
+
+        skipped = context.get_result("research")
+        assert skipped.is_condition_skipped()
+        assert skipped.metadata["skip_condition"] == "already known"
+        assert context.get_result("summary").is_condition_skipped()
+        assert (research.calls, summary.calls) == (0, 0)
+        assert workflow.is_successful(context)
+        trace = tracer.get_trace(context.metadata["trace_id"])
+        assert trace.find("research").attributes["skip_reason"] == (
+            "already known"
+        )
+
+        await workflow.execute({"address": "new"})
+        assert research.calls == 1
+
+    def test_enrichment_rule(self):
+        """AI enrichment is skipped for reliable, well-supported estimates."""
+        from src.compound_workflows import needs_enrichment
+
+        def context_with(**estimation):
+            context = WorkflowContext(workflow_id="w", user_input={})
+            context.add_result(
+                ComponentResult(
+                    "estimation", ComponentStatus.SUCCESS, data=estimation
+                )
+            )
+            return context
+
+        def fiabilite(score, count):
+            return {"score_global": score, "nb_comparables": count}
+
+        assert not needs_enrichment(context_with(fiabilite=fiabilite(85, 12)))
+        assert not needs_enrichment(context_with(fiabilite=fiabilite(80, 10)))
+        assert needs_enrichment(context_with(fiabilite=fiabilite(85, 3)))
+        assert needs_enrichment(context_with(fiabilite=fiabilite(60, 30)))
+        # A 1% score is not read as a fraction
+        assert needs_enrichment(context_with(fiabilite=fiabilite(1, 30)))
+        # Priced comparables that score too low do not count
+        assert needs_enrichment(
+            context_with(fiabilite=fiabilite(85, 4), comparables_count=12)
+        )
+        assert needs_enrichment(context_with(confidence=0.9))
+
+
+class TestJobQueue:
+    """Test the durable job queue and its workers."""
+
+    def test_claims_by_priority_and_recovers_leases(self, tmp_path):
+        """Interactive jobs go first; expired leases are requeued."""
+        queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_s=0.0)
+        batch = queue.enqueue("wf", {"n": 1}, priority=Priority.BATCH)
+        urgent = queue.enqueue("wf", {"n": 2}, priority=Priority.INTERACTIVE)
+
+        first = queue.claim("w1")
+        assert first.job_id == urgent
+        assert first.status == JobStatus.RUNNING
+        # w1 "died": with a zero lease its job is claimable again
+        assert queue.claim("w2").job_id == urgent
+        assert queue.claim("w3").job_id == urgent
+        assert queue.claim("w4").job_id == batch
+        assert queue.get(urgent).attempts == 3
+        queue.lease_s = 300.0
+        # The batch job's zero lease expired too; urgent ran out of tries
+        assert queue.claim("w5").job_id == batch
+        assert queue.claim("w6") is None
+        assert queue.get(urgent).status == JobStatus.FAILED
+        queue.close()
+
+    def test_stale_worker_cannot_store_outcome(self, tmp_path):
+        """Only the worker holding the lease completes or fails a job."""
+        queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_s=0.0)
+        job_id = queue.enqueue("wf", {})
+        queue.claim("w1")
+        queue.lease_s = 300.0
+        # w1's lease expired: w2 owns the new attempt
+        assert queue.claim("w2").job_id == job_id
+
+        assert not queue.renew(job_id, "w1")
+        assert not queue.complete(job_id, "w1", {"stale": True})
+        assert not queue.fail(job_id, "w1", "stale")
+        assert queue.get(job_id).status == JobStatus.RUNNING
+        assert queue.renew(job_id, "w2")
+        assert queue.complete(job_id, "w2", {"n": 2})
+        # A finished job is not overwritten by a late duplicate either
+        assert not queue.fail(job_id, "w2", "late")
+        job = queue.get(job_id)
+        assert (job.status, job.result) == (JobStatus.SUCCEEDED, {"n": 2})
+        queue.close()
+
+    @pytest.mark.asyncio
+    async def test_worker_renews_lease_of_long_jobs(self, tmp_path):
+        """A job running past lease_s is not requeued under its worker."""
+        queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_s=0.1)
+        system = CompoundSystem("worker")
+        workflow = Workflow("wf", result_cache=ResultCache())
+        workflow.add_component(SleepComponent("step", delay=0.35))
+        system.register_workflow(workflow)
+        job_id = queue.enqueue("wf", {})
+
+        worker = QueueWorker(queue, system, worker_id="w")
+        assert await worker.run(exit_when_idle=True) == 1
+
+        job = queue.get(job_id)
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.attempts == 1
+        queue.close()
+
+    @pytest.mark.asyncio
+    async def test_worker_writes_results_back(self, tmp_path):
+        """A worker runs queued jobs and stores their contexts."""
+        queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+        system = CompoundSystem("worker")
+        workflow = Workflow("wf", result_cache=ResultCache())
+        workflow.add_component(CountingComponent("step"))
+        system.register_workflow(workflow)
+        ok = queue.enqueue("wf", {"address": "A"})
+        missing = queue.enqueue("unknown", {})
+
+        worker = QueueWorker(queue, system, worker_id="w")
+        assert await worker.run(exit_when_idle=True) == 2
+
+        job = queue.wait(ok, timeout_s=1)
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result["results"]["step"]["data"] == {"address": "A"}
+        assert job.worker_id == "w"
+        assert queue.get(missing).status == JobStatus.FAILED
+        assert "not found" in queue.get(missing).error
+        assert queue.counts()["succeeded"] == 1
+        queue.close()
+
+    def test_worker_processes(self, tmp_path, monkeypatch):
+        """Spawned worker processes serve the pre-built workflows."""
+        snapshot = tmp_path / "mutations.csv"
+        make_mutations().to_csv(snapshot, index=False)
+        monkeypatch.setenv(SNAPSHOT_ENV_VAR, str(snapshot))
+        path = str(tmp_path / "jobs.sqlite")
+        queue = JobQueue(path)
+        job_ids = [
+            queue.enqueue(
+                "property_estimation",
+                {"address": f"{n} rue du Lac, Thonon", "surface": 100},
+            )
+            for n in range(4)
+        ]
+
+        with WorkerPool(path, processes=2, poll_interval_s=0.05):
+            jobs = [queue.wait(job_id, timeout_s=60) for job_id in job_ids]
+
+        assert all(job.status == JobStatus.SUCCEEDED for job in jobs)
+        estimation = jobs[0].result["results"]["estimation"]["data"]
+        assert estimation["estimated_price"] > 0
+        queue.close()
+
+
+class TestRunLog:
+    """Test the persistent run log."""
+
+    @pytest.mark.asyncio
+    async def test_runs_logged_in_background(self, tmp_path):
+        """Each execution becomes one JSONL record with component data."""
+        run_log = RunLog(str(tmp_path / "runs.jsonl"))
+        system = CompoundSystem("logged", run_log=run_log)
+        workflow = Workflow("wf", result_cache=ResultCache())
+        workflow.add_component(CountingComponent("step"))
+        system.register_workflow(workflow)
+
+        await system.execute_workflow("wf", {"address": "A"}, "run-1")
+        await system.execute_workflow("wf", {"address": "A"}, "run-2")
+        await system.execute_workflow("wf", {"address": " a "}, "run-3")
+        assert run_log.flush(timeout_s=5)
+        run_log.close()
+
+        first, second, third = run_log.iter_records()
+        assert first["workflow_id"] == "run-1"
+        assert first["success"] is True
+        assert first["components"]["step"]["status"] == "success"
+        assert (first["cache_hits"], second["cache_hits"]) == (0, 1)
+        assert third["input_hash"] == first["input_hash"]
+        assert system.get_system_status()["run_log"]["written"] == 3
+
+    def test_rotation_and_slow_runs(self, tmp_path):
+        """Files rotate by size; slow_runs reads across all of them."""
+        run_log = RunLog(
+            str(tmp_path / "runs.jsonl"), max_bytes=200, backup_count=10
+        )
+        for index in range(10):
+            run_log.log(
+                {
+                    "ts": time.time(),
+                    "workflow": "wf",
+                    "total_ms": float(index),
+                    "components": {"a": {"ms": 1.0}, "b": {"ms": 2.0}},
+                }
+            )
+            run_log.flush(timeout_s=5)
+        run_log.close()
+
+        slow = run_log.slow_runs(min_ms=5, limit=3)
+
+        assert len(run_log.files()) > 1
+        assert [r["total_ms"] for r in slow] == [9.0, 8.0, 7.0]
+        assert slow[0]["slowest_component"] == "b"
+        assert not run_log.log({"late": True})
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+class TestSnapshotComparables:
+    """Test the in-memory comparables source and vectorized scoring."""
+
+    def test_filters_like_supabase(self):
+        """Only nearby, recent, same-type, in-range sales, nearest first."""
+        source = SnapshotComparablesSource(make_mutations())
+        comparables = source.get_comparables(
+            46.2044, 6.1432, "Appartement", 80, 120, rayon_km=3, limit=5
+        )
+
+        assert 0 < len(comparables) <= 5
+        assert comparables["distance_km"].is_monotonic_increasing
+        assert (comparables["distance_km"] <= 3).all()
+        assert comparables["sbati"].between(80, 120).all()
+        assert comparables["libtypbien"].eq("UN APPARTEMENT").all()
+        assert comparables["prix_m2"].tolist() == pytest.approx(
+            (comparables["valeurfonc"] / comparables["sbati"]).tolist()
+        )
+
+    def test_live_source_propagates_errors(self):
+        """The live source runs the bulk query and never hides failures."""
+
+        class FakeRetriever:
+            def __init__(self):
+                self.calls = []
+
+            def get_comparables_bulk(self, latitude, longitude, **kwargs):
+                self.calls.append(kwargs)
+                if kwargs["rayon_km"] > 5:
+                    raise ConnectionError("database unavailable")
+                return make_mutations(3)
+
+        retriever = FakeRetriever()
+        source = SupabaseComparablesSource(retriever)
+
+        assert len(source.get_comparables(46.2, 6.1, rayon_km=2)) == 3
+        assert retriever.calls[0]["rayon_km"] == 2
+        with pytest.raises(ConnectionError):
+            source.get_comparables(46.2, 6.1, rayon_km=10)
+
+    def test_array_scores_match_scalar_scores(self):
+        """calculate_scores_array agrees with the per-row score."""
+        mutations = make_mutations(20)
+        columns = {name: mutations[name].to_numpy() for name in mutations}
+        scores = SimilarityScorer.calculate_scores_array(
+            46.2044, 6.1432, 100, "Appartement", columns
+        )
+        expected = [
+            SimilarityScorer.calculate_comparable_score(
+                46.2044, 6.1432, 100, "Appartement", row
+            )
+            for row in mutations.to_dict("records")
+        ]
+        assert scores.tolist() == pytest.approx(expected)
+
+
+class TestAIResponseCache:
+    """Test AI prompt normalization, response cache and stub provider."""
+
+    def test_prompt_normalization(self):
+        """Spelling and nearby prices share one cache key."""
+        first = AIPrompt.build(
+            "market_analysis", "Thonon-lès-Bains", "Appartement", 312_000
+        )
+        second = AIPrompt.build(
+            "market_analysis", " THONON LES BAINS", "appartement", 348_500
+        )
+        assert first.text == second.text == (
+            "task=market_analysis|commune=thonon les bains"
+            "|type=appartement|price=300000-350000"
+        )
+        assert AIPrompt.build("x", "Evian", "Maison").price_bucket is None
+        assert StubAIProvider.answer(first) == StubAIProvider.answer(second)
+
+    def test_persistence_ttl_and_size(self, tmp_path):
+        """Entries survive reopening, expire and are LRU-bounded."""
+        path = str(tmp_path / "ai.sqlite")
+        prompts = [AIPrompt.build("t", f"c{n}", "maison") for n in range(3)]
+        cache = AIResponseCache(path, max_size=2)
+        cache.put("claude", prompts[0], {"n": 0})
+        cache.put("claude", prompts[1], {"n": 1})
+        assert cache.get("claude", prompts[0]) == {"n": 0}
+        cache.put("claude", prompts[2], {"n": 2})  # evicts prompts[1]
+        assert cache.get("claude", prompts[1]) is None
+        assert cache.get("grok", prompts[0]) is None
+        cache.close()
+
+        reopened = AIResponseCache(path, max_size=2)
+        assert reopened.get("claude", prompts[2]) == {"n": 2}
+        reopened.ttl_s = 0.0
+        assert reopened.get("claude", prompts[2]) is None
+        assert reopened.get_status()["expirations"] == 1
+        reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_components_reuse_answers(self):
+        """A second estimate in the same commune hits the cache."""
+        cache = AIResponseCache()
+        stubs = {}
+        for name in ("claude", "grok", "perplexity"):
+            stubs[name] = StubAIProvider(name)
+            set_ai_client(name, AIClient(stubs[name], cache))
+        try:
+            workflow = create_advanced_estimation_workflow(
+                skip_reliable_enrichment=False
+            )
+            first = await workflow.execute(
+                {"address": "1 rue du Lac, 74200 Thonon-les-Bains, France"}
+            )
+            second = await workflow.execute(
+                {"address": "9 quai de Rives, Thonon-les-Bains, France"}
+            )
+        finally:
+            reset_ai_clients()
+
+        research = second.get_result("perplexity_researcher")
+        assert research.metadata["ai_cache"] == "hit"
+        assert research.metadata["prompt"] == (
+            "task=market_research|commune=thonon les bains|type=appartement"
+        )
+        assert research.data == first.get_data("perplexity_researcher")
+        assert stubs["perplexity"].calls == 1
+        assert "confidence" in second.get_data("claude_analyzer")
+        # Claude runs before the estimation, so its prompt has no price
+        analysis = second.get_result("claude_analyzer")
+        assert analysis.metadata["prompt"] == (
+            "task=market_analysis|commune=thonon les bains|type=appartement"
+        )
+        assert stubs["claude"].calls == 1
+        assert second.get_data("grok_reasoner")["price_justification"]
+
+
+class FailingAIProvider(StubAIProvider):
+    async def complete_many(self, prompts):
+        raise RuntimeError("provider unavailable")
+
+
+class TestAIBatching:
+    """Test micro-batching of AI prompts."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_prompts_share_calls(self):
+        """Prompts are grouped by window and size, duplicates sent once."""
+        provider = StubAIProvider("claude")
+        batcher = AIBatcher(provider, window_s=0.01, max_batch=3)
+        prompts = [
+            AIPrompt.build("market_analysis", commune, "maison")
+            for commune in ["Evian", "Thonon", "evian", "Anthy", "Publier"]
+        ]
+
+        answers = await asyncio.gather(
+            *(batcher.complete(prompt) for prompt in prompts)
+        )
+
+        assert answers == [StubAIProvider.answer(p) for p in prompts]
+        # Third distinct prompt fills the first batch; the rest waits
+        # for the window
+        assert provider.batch_sizes == [3, 1]
+        status = batcher.get_status()
+        assert status["batches"] == 2
+        assert status["deduplicated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_fan_out(self):
+        """A failed batch call fails every waiting request."""
+        batcher = AIBatcher(FailingAIProvider("grok"), window_s=0.01)
+        prompts = [AIPrompt.build("t", c, "maison") for c in ("a", "b")]
+
+        results = await asyncio.gather(
+            *(batcher.complete(prompt) for prompt in prompts),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_call_fails_waiters(self):
+        """A cancelled batch call fails its waiters instead of hanging."""
+
+        class CancelledProvider(StubAIProvider):
+            async def complete_many(self, prompts):
+                raise asyncio.CancelledError()
+
+        batcher = AIBatcher(CancelledProvider("grok"), window_s=0.01)
+        prompts = [AIPrompt.build("t", c, "maison") for c in ("a", "b")]
+
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                *(batcher.complete(prompt) for prompt in prompts),
+                return_exceptions=True,
+            ),
+            timeout=1,
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert all("cancelled" in str(r) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_workflows(self):
+        """Concurrent workflows' AI requests reach the provider batched."""
+        providers = {}
+        for name in ("claude", "grok", "perplexity"):
+            providers[name] = StubAIProvider(name, latency_s=0.01)
+            set_ai_client(
+                name, AIClient(AIBatcher(providers[name]), cache=None)
+            )
+        try:
+            workflow = create_advanced_estimation_workflow(
+                skip_reliable_enrichment=False
+            )
+            contexts = await asyncio.gather(
+                *(
+                    workflow.execute({"address": f"{n} rue, {town}"})
+                    for n, town in enumerate(["Evian", "Thonon"] * 4)
+                )
+            )
+        finally:
+            reset_ai_clients()
+
+        assert all(c.get_data("claude_analyzer") for c in contexts)
+        assert sum(providers["perplexity"].batch_sizes) < len(contexts)
+        assert providers["perplexity"].calls < len(contexts)
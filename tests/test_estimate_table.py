@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test suite for EstimateTable / EstimatePrecomputer
+Tests batch precomputation, incremental refresh and surface interpolation
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.estimate_table import EstimatePrecomputer, EstimateTable
+
+
+def make_mutations(n, lat, lon, days_ago, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'idmutation': range(n),
+        'latitude': lat + rng.normal(0, 0.002, n),
+        'longitude': lon + rng.normal(0, 0.002, n),
+        'sbati': rng.uniform(20, 220, n),
+        'libtypbien': 'UN APPARTEMENT',
+        'datemut': (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d'),
+    })
+    df['valeurfonc'] = df['sbati'] * 4000
+    return df
+
+
+class TestEstimateTable(unittest.TestCase):
+    """Test precomputed estimate table"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.table = EstimateTable(os.path.join(self.tmp.name, 'estimates.sqlite'))
+        self.addresses = pd.DataFrame({
+            'address_id': ['74281_0001_00010', '74281_0002_00003'],
+            'insee_code': ['74281', '74281'],
+            'label': ['10 rue A, Thonon', '3 rue B, Thonon'],
+            'latitude': [46.3719, 46.3725],
+            'longitude': [6.4727, 6.4735],
+        })
+        self.precomputer = EstimatePrecomputer(self.table, surface_buckets=(50, 100))
+
+    def tearDown(self):
+        self.table.close()
+        self.tmp.cleanup()
+
+    def test_precompute_and_interpolated_lookup(self):
+        """Lookup interpolates price/m² between surface buckets"""
+        nb = self.precomputer.run(self.addresses, make_mutations(300, 46.372, 6.473, 60))
+        self.assertEqual(nb, 2)
+
+        result = self.table.lookup_point(46.37191, 6.47271, 'Appartement', 75)
+        self.assertIsNotNone(result)
+        self.assertEqual(result['source'], 'precalcul')
+        self.assertAlmostEqual(result['estimation']['prix_au_m2_eur'], 4000, delta=200)
+        self.assertAlmostEqual(result['estimation']['prix_estime_eur'], 75 * 4000, delta=15000)
+
+        # Point géocodé trop loin de toute adresse connue : pas de hit
+        self.assertIsNone(self.table.lookup_point(46.40, 6.50, 'Appartement', 75))
+
+    def test_incremental_refresh(self):
+        """Only addresses near new mutations are recomputed"""
+        self.precomputer.run(self.addresses, make_mutations(300, 46.372, 6.473, 60))
+        memes = make_mutations(300, 46.372, 6.473, 60)
+        self.assertEqual(self.precomputer.run(self.addresses, memes), 0)
+
+        # Nouvelle mutation à ~30 km : hors rayon, rien à recalculer
+        loin = make_mutations(1, 46.10, 6.20, 1, seed=1)
+        mutations = pd.concat([make_mutations(300, 46.372, 6.473, 60), loin], ignore_index=True)
+        self.assertEqual(self.precomputer.run(self.addresses, mutations), 0)
+
+        proche = make_mutations(1, 46.372, 6.473, 0, seed=2)
+        mutations = pd.concat([mutations, proche], ignore_index=True)
+        self.assertEqual(self.precomputer.run(self.addresses, mutations), 2)
+
+    def test_refresh_removes_buckets_that_no_longer_succeed(self):
+        """A recomputed address keeps only the buckets that still succeed"""
+        self.precomputer.run(self.addresses, make_mutations(300, 46.372, 6.473, 60))
+        petites = make_mutations(300, 46.372, 6.473, 60)
+        petites['sbati'] = petites['sbati'].clip(upper=60)
+        self.precomputer.run(self.addresses, petites, full=True)
+
+        buckets = {
+            row[0]
+            for row in self.table.conn.execute("SELECT DISTINCT surface_bucket FROM estimates")
+        }
+        self.assertEqual(buckets, {50.0})
+
+    def test_window_exits_and_stale_rows_trigger_refresh(self):
+        """Mutations leaving the window and old computations are refreshed"""
+        recente = make_mutations(300, 46.372, 6.473, 60)
+        self.precomputer.run(self.addresses, recente)
+
+        # Fenêtre précédente commencée un mois plus tôt : une mutation proche en est sortie
+        debut = (datetime.now() - timedelta(days=365 * 3 + 30)).strftime('%Y-%m-%d')
+        self.table.set_meta('window_start', debut)
+        sortie = make_mutations(1, 46.372, 6.473, 365 * 3 + 10, seed=3)
+        avec_sortie = pd.concat([recente, sortie], ignore_index=True)
+        self.assertEqual(self.precomputer.run(self.addresses, avec_sortie), 2)
+        self.assertEqual(self.precomputer.run(self.addresses, recente), 0)
+
+        with self.table.conn:
+            self.table.conn.execute(
+                "UPDATE address_runs SET computed_at = ? WHERE address_id = ?",
+                ((datetime.now() - timedelta(days=60)).isoformat(), '74281_0001_00010')
+            )
+        self.assertEqual(self.precomputer.run(self.addresses, recente), 1)
+
+    def test_lookup_returns_stored_comparables(self):
+        """A hit carries its scored comparables, best first, with their mutation rows"""
+        mutations = make_mutations(300, 46.372, 6.473, 60)
+        self.precomputer.run(self.addresses, mutations)
+
+        result = self.table.lookup_point(46.37191, 6.47271, 'Appartement', 90)
+        comparables = pd.DataFrame(result['comparables_with_scores'])
+        self.assertEqual(len(comparables), self.precomputer.comparables_stored)
+        self.assertTrue(comparables['score'].is_monotonic_decreasing)
+        self.assertTrue(comparables['sbati'].between(80, 120).all())  # tranche 100 m² ± 20 %
+        self.assertTrue((comparables['distance_km'] <= 10).all())
+
+        par_id = mutations.set_index(mutations['idmutation'].astype(str))
+        for comparable in result['comparables_with_scores']:
+            mutation = par_id.loc[comparable['idmutation']]
+            self.assertAlmostEqual(comparable['valeurfonc'], mutation['valeurfonc'])
+            self.assertAlmostEqual(comparable['prix_m2'], 4000)
+
+        # Les mutations qui ne servent plus sont purgées
+        autres = make_mutations(300, 46.372, 6.473, 60, seed=1)
+        self.precomputer.run(self.addresses, autres, full=True)
+        nb_orphelines = self.table.conn.execute(
+            "SELECT COUNT(*) FROM mutations WHERE idmutation NOT IN "
+            "(SELECT idmutation FROM estimate_comparables)"
+        ).fetchone()[0]
+        self.assertEqual(nb_orphelines, 0)
+
+    def test_build_params(self):
+        """The table serves only the criteria it was built with"""
+        self.precomputer.run(self.addresses, make_mutations(300, 46.372, 6.473, 60))
+        self.assertTrue(self.table.serves(rayon_km=10, annees=3, surface_tolerance=0.2))
+        self.assertFalse(self.table.serves(rayon_km=5, annees=3, surface_tolerance=0.2))
+        self.assertFalse(self.table.serves(rayon_km=10, annees=3, surface_tolerance=0.3))
+
+        # Paramètres modifiés : recalcul complet
+        autre = EstimatePrecomputer(self.table, surface_buckets=(50, 100), rayon_km=5.0)
+        self.assertEqual(autre.run(self.addresses, make_mutations(300, 46.372, 6.473, 60)), 2)
+        self.assertTrue(self.table.serves(rayon_km=5, annees=3, surface_tolerance=0.2))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
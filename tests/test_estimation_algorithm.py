@@ -10,7 +10,8 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 
-from src.estimation_algorithm import SimilarityScorer, EstimationAlgorithm
+from src.estimation_algorithm import SimilarityScorer, EstimationAlgorithm, ComparablesStats
+from src.scoring_tuner import ScoringTuner
 
 
 class TestSimilarityScorer(unittest.TestCase):
@@ -275,5 +276,193 @@ class TestComponentIntegration(unittest.TestCase):
             self.skipTest(f"Full workflow test failed: {str(e)}")
 
 
+class TestVectorizedScoring(unittest.TestCase):
+    """Test vectorized sub-scores against the scalar scorer"""
+
+    def test_matrix_product_matches_scalar_score(self):
+        """Weights · sub-scores must reproduce calculate_comparable_score"""
+        comparables = [
+            {
+                'latitude': 46.3787 + i * 0.004,
+                'longitude': 6.4812 - i * 0.003,
+                'sbati': 80 + i * 6,
+                'valeurfonc': 280000 + i * 5000,
+                'libtypbien': 'UN APPARTEMENT' if i % 3 else 'UNE MAISON',
+                'datemut': (datetime.now() - timedelta(days=200 * i)).strftime('%Y-%m-%d')
+            }
+            for i in range(8)
+        ]
+        features = SimilarityScorer.compute_raw_features(
+            46.3787, 6.4812, 100, "Appartement", comparables
+        )
+        sub_scores = SimilarityScorer.sub_scores_matrix(features)
+        scores = np.clip(sub_scores @ SimilarityScorer.weights_vector(), 0, 100)
+
+        for comparable, score in zip(comparables, scores):
+            expected = SimilarityScorer.calculate_comparable_score(
+                46.3787, 6.4812, 100, "Appartement", comparable
+            )
+            self.assertAlmostEqual(score, expected, places=6)
+
+
+class TestComparablesStats(unittest.TestCase):
+    """Test single-pass streaming statistics"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.scored = [
+            (
+                {
+                    'valeurfonc': float(p) if i % 9 else 0,
+                    'datemut': (datetime.now() - timedelta(days=int(d))).strftime('%Y-%m-%d')
+                },
+                float(s)
+            )
+            for i, (p, s, d) in enumerate(zip(
+                rng.uniform(200000, 400000, 50), rng.uniform(20, 95, 50), rng.integers(0, 1000, 50)
+            ))
+        ]
+
+    def test_matches_numpy(self):
+        """Welford moments must equal numpy on the filtered lists"""
+        stats = ComparablesStats.from_scored(self.scored)
+        valides = [(c, s) for c, s in self.scored if s >= 40]
+        prix = [c['valeurfonc'] for c, _ in valides if c['valeurfonc'] > 0]
+
+        self.assertEqual(stats.nb_valides, len(valides))
+        self.assertAlmostEqual(stats.score_mean, np.mean([s for _, s in valides]))
+        self.assertAlmostEqual(stats.prix_mean, np.mean(prix), places=4)
+        self.assertAlmostEqual(stats.prix_std, np.std(prix), places=4)
+        self.assertEqual(stats.score_max, max(s for _, s in valides))
+
+    def test_merge_equals_single_pass(self):
+        """Merging chunk accumulators gives the same result as one pass"""
+        full = ComparablesStats.from_scored(self.scored)
+        merged = ComparablesStats()
+        for start in range(0, 50, 13):
+            merged.merge(ComparablesStats.from_scored(self.scored[start:start + 13]))
+
+        for attr in ['nb_valides', 'nb_prix', 'score_min', 'prix_max', 'nb_dates']:
+            self.assertEqual(getattr(merged, attr), getattr(full, attr))
+        for attr in ['score_mean', 'score_m2', 'prix_mean', 'prix_m2', 'mois_mean', 'prix_pondere']:
+            self.assertAlmostEqual(getattr(merged, attr) / getattr(full, attr), 1.0, places=9)
+
+
+class TestEstimationSweep(unittest.TestCase):
+    """Test what-if sweep across surfaces, types and radii"""
+
+    def setUp(self):
+        self.estimator = EstimationAlgorithm()
+        self.target = {
+            'latitude': 46.3787, 'longitude': 6.4812, 'surface': 100, 'type': 'Appartement'
+        }
+        self.comparables = [
+            {
+                'latitude': 46.3787 + i * 0.003,
+                'longitude': 6.4812 + i * 0.002,
+                'sbati': 70 + i * 5,
+                'valeurfonc': 0 if i == 3 else 250000 + i * 12000,  # i = 3 : prix inconnu
+                'libtypbien': 'UNE MAISON' if i % 4 == 0 else 'UN APPARTEMENT',
+                'datemut': (datetime.now() - timedelta(days=60 * i)).strftime('%Y-%m-%d')
+            }
+            for i in range(12)
+        ]
+
+    def test_sweep_matches_estimate(self):
+        """Each cell of the grid must equal a full estimate() rerun"""
+        table = self.estimator.sweep(
+            self.target, self.comparables,
+            surfaces=[80, 100, 120], types=['Appartement', 'Maison'], radii=[1.0, 15.0]
+        )
+        self.assertEqual(len(table), 3 * 2 * 2)
+
+        for row in table.itertuples(index=False):
+            subset = [
+                c for c in self.comparables
+                if SimilarityScorer.haversine_distance(
+                    46.3787, 6.4812, c['latitude'], c['longitude']
+                ) <= row.rayon_km
+            ]
+            expected = self.estimator.estimate(46.3787, 6.4812, row.surface_m2, row.type, subset)
+            if expected['success']:
+                self.assertEqual(row.prix_estime_eur, expected['estimation']['prix_estime_eur'])
+                self.assertEqual(row.prix_min_eur, expected['estimation']['prix_min_eur'])
+                self.assertEqual(row.nb_comparables_utilises, expected['nb_comparables_utilises'])
+                self.assertAlmostEqual(
+                    row.score_moyen, expected['comparables_summary']['score_moyen'], delta=0.051
+                )
+            else:
+                self.assertTrue(np.isnan(row.prix_estime_eur))
+
+    def test_sweep_defaults_to_target(self):
+        """Without axes the sweep is a single-cell estimate"""
+        table = self.estimator.sweep(self.target, self.comparables)
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table['surface_m2'].iloc[0], 100)
+
+
+class TestScoringTuner(unittest.TestCase):
+    """Test grid search over scorer weights and tolerances"""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        n = 40
+        self.mutations = pd.DataFrame({
+            'latitude': 46.37 + rng.normal(0, 0.01, n),
+            'longitude': 6.47 + rng.normal(0, 0.01, n),
+            'sbati': rng.uniform(60, 120, n),
+            'libtypbien': ['UN APPARTEMENT'] * n,
+            'datemut': [
+                (datetime.now() - timedelta(days=int(d))).strftime('%Y-%m-%d')
+                for d in rng.integers(0, 900, n)
+            ],
+        })
+        self.mutations['valeurfonc'] = self.mutations['sbati'] * 4000 * rng.uniform(0.9, 1.1, n)
+
+    def test_weight_grid_sums_to_one(self):
+        """Every weight vector of the grid must sum to 1"""
+        grid = ScoringTuner.weight_grid(0.25)
+        self.assertEqual(grid.shape, (35, 4))
+        np.testing.assert_allclose(grid.sum(axis=1), 1.0)
+
+    def test_run_and_pareto_front(self):
+        """Tuning yields one row per configuration and a non-dominated front"""
+        cache = ScoringTuner.build_cache(self.mutations, max_candidats=15)
+        self.assertEqual(cache.nb_cas, 40)
+
+        tuner = ScoringTuner(n_jobs=1, chunk_size=8)
+        results = tuner.run(cache, weights=ScoringTuner.weight_grid(0.25),
+                            surface_tolerances=(0.2, 0.3), distances_max_km=(5.0, 15.0))
+        self.assertEqual(len(results), 35 * 4)
+
+        front = ScoringTuner.pareto_front(results)
+        self.assertGreater(len(front), 0)
+        # Front trié par erreur croissante : le volume doit être strictement croissant
+        self.assertTrue(front['nb_comparables_moyen'].is_monotonic_increasing)
+        self.assertAlmostEqual(front['mape'].iloc[0], results['mape'].min())
+
+    def test_process_pool_matches_serial_run(self):
+        """n_jobs > 1 (ProcessPool) gives the same results and Pareto front"""
+        cache = ScoringTuner.build_cache(self.mutations, max_candidats=15, rayon_max_km=20)
+        kwargs = dict(weights=ScoringTuner.weight_grid(0.5), surface_tolerances=(0.2, 0.3))
+
+        serial = ScoringTuner(n_jobs=1, chunk_size=2).run(cache, **kwargs)
+        parallel = ScoringTuner(n_jobs=2, chunk_size=2).run(cache, **kwargs)
+
+        pd.testing.assert_frame_equal(parallel, serial)
+        pd.testing.assert_frame_equal(
+            ScoringTuner.pareto_front(parallel), ScoringTuner.pareto_front(serial)
+        )
+
+    def test_distances_beyond_cache_radius_rejected(self):
+        """A distance max larger than the neighbour radius of the cache is refused"""
+        cache = ScoringTuner.build_cache(self.mutations, max_candidats=15)
+        self.assertEqual(cache.rayon_max_km, SimilarityScorer.DISTANCE_MAX_KM)
+        with self.assertRaises(ValueError):
+            ScoringTuner().run(
+                cache, weights=ScoringTuner.weight_grid(0.5), distances_max_km=(10.0, 20.0)
+            )
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test suite for PriceGrid
+Tests IDW smoothing, O(1) lookup and npz round-trip
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.price_grid import PriceGrid
+from src.supabase_data_retriever import MUTATIONS_ZONE_COLUMNS
+
+
+class TestPriceGrid(unittest.TestCase):
+    """Test precomputed price/m² grid"""
+
+    def setUp(self):
+        """Two clusters: Thonon apartments at 4000€/m², Annemasse at 5000€/m²"""
+        rng = np.random.default_rng(0)
+        thonon = pd.DataFrame({
+            'latitude': 46.3719 + rng.normal(0, 0.002, 30),
+            'longitude': 6.4727 + rng.normal(0, 0.002, 30),
+            'sbati': 80.0,
+        })
+        thonon['valeurfonc'] = 80 * 4000.0
+        annemasse = pd.DataFrame({
+            'latitude': 46.1896 + rng.normal(0, 0.002, 30),
+            'longitude': 6.2402 + rng.normal(0, 0.002, 30),
+            'sbati': 100.0,
+        })
+        annemasse['valeurfonc'] = 100 * 5000.0
+        self.mutations = pd.concat([thonon, annemasse], ignore_index=True)
+        self.mutations['libtypbien'] = 'UN APPARTEMENT'
+        self.grid = PriceGrid.build(self.mutations, cell_m=200, radius_m=1000)
+
+    def test_lookup_returns_local_price(self):
+        """Lookup near each cluster returns that cluster's price/m²"""
+        self.assertAlmostEqual(self.grid.prix_m2(46.3719, 6.4727, 'Appartement'), 4000, delta=1)
+        self.assertAlmostEqual(self.grid.prix_m2(46.1896, 6.2402, 'Studio'), 5000, delta=1)
+
+    def test_lookup_without_data(self):
+        """Unknown type, empty cell or point outside grid returns None"""
+        self.assertIsNone(self.grid.prix_m2(46.3719, 6.4727, 'Maison'))
+        self.assertIsNone(self.grid.prix_m2(46.28, 6.35, 'Appartement'))
+        self.assertIsNone(self.grid.prix_m2(45.0, 5.0, 'Appartement'))
+
+    def test_lookup_just_outside_lower_left_edge(self):
+        """Points less than one cell south or west of the origin are outside the grid"""
+        grid = self.grid
+        lon_sud = self.mutations.loc[self.mutations['latitude'].idxmin(), 'longitude']
+        lat_ouest = self.mutations.loc[self.mutations['longitude'].idxmin(), 'latitude']
+
+        self.assertIsNotNone(grid.prix_m2(grid.lat0 + grid.dlat / 2, lon_sud, 'Appartement'))
+        self.assertIsNone(grid.prix_m2(grid.lat0 - grid.dlat / 2, lon_sud, 'Appartement'))
+        self.assertIsNotNone(grid.prix_m2(lat_ouest, grid.lon0 + grid.dlon / 2, 'Appartement'))
+        self.assertIsNone(grid.prix_m2(lat_ouest, grid.lon0 - grid.dlon / 2, 'Appartement'))
+
+    def test_build_without_mutations(self):
+        """No mutations (e.g. query error) raises ValueError, not KeyError"""
+        for mutations in (pd.DataFrame(), pd.DataFrame(columns=MUTATIONS_ZONE_COLUMNS)):
+            with self.assertRaises(ValueError):
+                PriceGrid.build(mutations)
+
+    def test_provisional_estimate(self):
+        """Provisional estimate = cell price/m² × surface"""
+        result = self.grid.provisional_estimate(46.3719, 6.4727, 85, 'Appartement')
+        self.assertTrue(result['provisoire'])
+        self.assertAlmostEqual(result['prix_estime_eur'], 85 * 4000, delta=100)
+
+    def test_save_load_roundtrip(self):
+        """Grid survives npz round-trip"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'grid.npz')
+            self.grid.save(path)
+            loaded = PriceGrid.load(path)
+        self.assertEqual(loaded.shape, self.grid.shape)
+        self.assertEqual(loaded.types, self.grid.types)
+        self.assertEqual(
+            loaded.prix_m2(46.3719, 6.4727, 'Appartement'),
+            self.grid.prix_m2(46.3719, 6.4727, 'Appartement')
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()